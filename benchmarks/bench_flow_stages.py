@@ -0,0 +1,255 @@
+"""
+Latency and Playwright call counts of every flow stage, measured against the
+local stand-in site (stub_ebay) over a sweep of cards per page, variants per
+item and item limit.
+
+Run from the project root:
+    python -m benchmarks.bench_flow_stages [--cards-per-page 20,60] [--variants 0,2] [--limit 3,10]
+        [--repeat 3] [--output benchmark-results/flow_stages.json]
+        [--baseline benchmarks/baselines/flow_stages.json] [--threshold 0.25] [--save-baseline]
+
+With --baseline, exits with status 1 when a stage's median latency or call
+count grew by more than --threshold (and the latency by more than
+--min-delta-ms) compared with the stored results. Baselines are machine
+specific and not committed: record one with --save-baseline first; a
+--baseline that doesn't exist is an error otherwise. Any failed flow run also
+makes the exit status 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+from pages.search_page import SearchPage
+from pages.product_page import ProductPage
+from pages.cart_page import CartPage
+from stub_ebay.server import StubEbayServer
+from utils import item_cache, playwright_calls, screenshot_helper, site_urls
+
+STAGES = ("search", "apply_max_price_filter", "collect_item_urls_under_price", "add_to_cart", "get_total")
+
+CONTEXT_OPTIONS = {"viewport": {"width": 1920, "height": 1080}, "locale": "en-US"}
+
+DEFAULT_OUTPUT = "benchmark-results/flow_stages.json"
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0-100)"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def summarize(samples: list, calls: list) -> dict:
+    summary = {
+        "samples_ms": samples,
+        "count": len(samples),
+        "min_ms": min(samples),
+        "p50_ms": percentile(samples, 50),
+        "p90_ms": percentile(samples, 90),
+        "max_ms": max(samples),
+        "mean_ms": round(sum(samples) / len(samples), 1),
+    }
+    # Calls per stage run; the median keeps one odd retry from moving it
+    summary["calls"] = {kind: percentile([entry[kind] for entry in calls], 50) for kind in calls[0]}
+    return summary
+
+def case_id(params: dict) -> str:
+    return ",".join(f"{key}={value}" for key, value in params.items())
+
+@contextmanager
+def measure(raw: dict, stage: str):
+    """Time the block and count its Playwright calls into raw[stage]"""
+    with playwright_calls.count_calls() as counter:
+        start = time.perf_counter()
+        yield
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    entry = raw.setdefault(stage, {"samples": [], "calls": []})
+    entry["samples"].append(elapsed_ms)
+    entry["calls"].append(counter.totals())
+
+def run_flow(browser, raw: dict, query: str, max_price: int, limit: int):
+    context = browser.new_context(**CONTEXT_OPTIONS)
+    try:
+        page = context.new_page()
+        page.goto(site_urls.base_url())
+        search_page = SearchPage(page)
+
+        with measure(raw, "search"):
+            search_page.search(query)
+        with measure(raw, "apply_max_price_filter"):
+            search_page.apply_max_price_filter(max_price)
+        with measure(raw, "collect_item_urls_under_price"):
+            urls = search_page.collect_item_urls_under_price(max_price, limit)
+
+        for url in urls:
+            page.goto(url)
+            with measure(raw, "add_to_cart"):
+                ProductPage(page).add_to_cart()
+
+        cart_page = CartPage(page)
+        # Opening the cart is where its numbers are captured, so it belongs to the stage
+        with measure(raw, "get_total"):
+            cart_page.open()
+            cart_page.get_total()
+    finally:
+        context.close()
+
+def run_case(browser, params: dict, args) -> dict:
+    server = StubEbayServer(
+        catalog_size=args.catalog_size,
+        cards_per_page=params["cards_per_page"],
+        min_variants=params["variants"],
+        max_variants=params["variants"],
+        latency_ms=args.latency_ms,
+    )
+    server.start()
+    site_urls.configure(base_url=server.base_url, cart_url=server.cart_url)
+    random.seed(args.seed)
+
+    raw = {}
+    errors = []
+    try:
+        for repeat in range(args.repeat):
+            try:
+                run_flow(browser, raw, args.query, args.max_price, params["limit"])
+            except Exception as e:
+                errors.append(f"repeat {repeat + 1}: {str(e).splitlines()[0]}")
+                print(f"  {case_id(params)}: {errors[-1]}")
+    finally:
+        server.stop()
+
+    return {
+        "id": case_id(params),
+        "params": params,
+        "stages": {stage: summarize(raw[stage]["samples"], raw[stage]["calls"]) for stage in STAGES if stage in raw},
+        "errors": errors,
+    }
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[dict]:
+    """One row per case and stage present in both runs, flagged when it regressed"""
+    baseline_cases = {case["id"]: case for case in baseline.get("cases", [])}
+    rows = []
+    for case in results["cases"]:
+        before_case = baseline_cases.get(case["id"])
+        if not before_case:
+            continue
+        for stage, now in case["stages"].items():
+            before = before_case["stages"].get(stage)
+            if not before:
+                continue
+            delta_ms = now["p50_ms"] - before["p50_ms"]
+            slower = delta_ms > min_delta_ms and now["p50_ms"] > before["p50_ms"] * (1 + threshold)
+            more_calls = now["calls"]["round_trips"] > before["calls"]["round_trips"] * (1 + threshold)
+            rows.append({
+                "case": case["id"],
+                "stage": stage,
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": now["p50_ms"],
+                "delta_ms": round(delta_ms, 1),
+                "baseline_round_trips": before["calls"]["round_trips"],
+                "round_trips": now["calls"]["round_trips"],
+                "regressed": slower or more_calls,
+            })
+    return rows
+
+def print_results(results: dict):
+    print(f"{'case':<36} {'stage':<30} {'p50 ms':>9} {'p90 ms':>9} {'max ms':>9} {'trips':>6} {'locators':>9}")
+    for case in results["cases"]:
+        for stage, summary in case["stages"].items():
+            print(f"{case['id']:<36} {stage:<30} {summary['p50_ms']:>9.1f} {summary['p90_ms']:>9.1f} "
+                  f"{summary['max_ms']:>9.1f} {summary['calls']['round_trips']:>6} {summary['calls']['locator']:>9}")
+
+def write_json(path: str, data: dict):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards-per-page", default="20,60", help="Comma-separated sweep")
+    parser.add_argument("--variants", default="0,2", help="Variant widgets per item, comma-separated sweep")
+    parser.add_argument("--limit", default="3", help="Items to collect and add, comma-separated sweep")
+    parser.add_argument("--repeat", type=int, default=3, help="Flow runs per case")
+    parser.add_argument("--query", default="shoes")
+    parser.add_argument("--max-price", type=int, default=220)
+    parser.add_argument("--catalog-size", type=int, default=600)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Stub response latency")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random variant choice")
+    parser.add_argument("--browser-channel", default=None, help="e.g. msedge; bundled Chromium by default")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=None, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative growth (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=20, help="Ignore latency changes smaller than this")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline")
+    args = parser.parse_args()
+
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"Baseline {args.baseline} does not exist; record it with --save-baseline")
+
+    # Measure the flow itself: no screenshots, no cached shortcuts
+    screenshot_helper.configure(level="none")
+    item_cache.configure(enabled=False)
+
+    sweep = {
+        "cards_per_page": [int(value) for value in args.cards_per_page.split(",")],
+        "variants": [int(value) for value in args.variants.split(",")],
+        "limit": [int(value) for value in args.limit.split(",")],
+    }
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "baseline", "save_baseline", "threshold", "min_delta_ms")},
+        "cases": [],
+    }
+    with sync_playwright() as p:
+        browser = p.chromium.launch(channel=args.browser_channel, headless=not args.headed)
+        try:
+            for values in itertools.product(*sweep.values()):
+                params = dict(zip(sweep, values))
+                print(f"Running {case_id(params)} x{args.repeat}")
+                results["cases"].append(run_case(browser, params, args))
+        finally:
+            browser.close()
+
+    print_results(results)
+
+    exit_code = 0
+    failed_cases = [case for case in results["cases"] if case["errors"]]
+    for case in failed_cases:
+        print(f"ERRORS {case['id']}: {len(case['errors'])} of {args.repeat} runs failed ({case['errors'][0]})")
+    if failed_cases:
+        exit_code = 1
+
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        results["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "rows": rows}
+        regressions = [row for row in rows if row["regressed"]]
+        for row in regressions:
+            print(f"REGRESSION {row['case']} {row['stage']}: p50 {row['baseline_p50_ms']} -> {row['p50_ms']} ms, "
+                  f"round trips {row['baseline_round_trips']} -> {row['round_trips']}")
+        print(f"Compared {len(rows)} stages with {args.baseline}: {len(regressions)} regressed")
+        if regressions:
+            exit_code = 1
+
+    write_json(args.output, results)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        if failed_cases:
+            print("Not saving a baseline from a run with errors")
+            return exit_code
+        write_json(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for utils.price_utils.
+
+Run from the project root:
+    python -m benchmarks.bench_price_utils [--sizes 10,256,5000] [--repeat 5]
+"""
+import re
+import random
+import argparse
+import timeit
+from utils import price_utils
+from utils.price_utils import parse_price, parse_prices
+
+# The parse_price this module replaced, kept as the baseline
+LEGACY_RE = re.compile(r"([\d,.]+)")
+
+def legacy_parse_price(text: str):
+    if not text:
+        return None
+    match = LEGACY_RE.search(text)
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace(",", ""))
+    except ValueError:
+        return None
+
+def make_texts(size: int, seed: int = 1):
+    """Price and shipping strings shaped like eBay search cards"""
+    rng = random.Random(seed)
+    prices = []
+    for _ in range(size):
+        low = rng.randint(5, 3000)
+        if rng.random() < 0.1:
+            prices.append(f"ILS {low:,}.{rng.randint(0, 99):02d} to ILS {low + rng.randint(1, 500):,}.00")
+        else:
+            prices.append(f"ILS {low:,}.{rng.randint(0, 99):02d}")
+    shipping = [
+        rng.choice(["Free delivery", "+ILS 30.00 delivery", "+ILS 45.12 delivery", "+ILS 112.40 delivery",
+                    "Free International Shipping", None])
+        for _ in range(size)
+    ]
+    return prices, shipping
+
+def best_of(func, repeat: int, number: int) -> float:
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+def run(sizes, repeat: int):
+    rows = []
+    for size in sizes:
+        prices, shipping = make_texts(size)
+        texts = prices + shipping
+        number = max(1, 20000 // len(texts))
+
+        bulk_threshold = price_utils.BULK_THRESHOLD
+        try:
+            price_utils.BULK_THRESHOLD = len(texts) + 1
+            per_string = best_of(lambda: parse_prices(texts), repeat, number)
+            price_utils.BULK_THRESHOLD = 0
+            joined = best_of(lambda: parse_prices(texts), repeat, number)
+        finally:
+            price_utils.BULK_THRESHOLD = bulk_threshold
+
+        rows.append({
+            "strings": len(texts),
+            "legacy parse_price": best_of(lambda: [legacy_parse_price(text) for text in texts], repeat, number),
+            "parse_price": best_of(lambda: [parse_price(text) for text in texts], repeat, number),
+            "parse_prices (per string)": per_string,
+            "parse_prices (joined)": joined,
+        })
+
+    columns = list(rows[0])
+    print(" | ".join(f"{column:>26}" for column in columns))
+    for row in rows:
+        cells = [f"{row['strings']:>26}"]
+        for column in columns[1:]:
+            cells.append(f"{row['strings'] / row[column] / 1000:>20.0f} k/s")
+        print(" | ".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,128,1000,10000", help="Cards per run (price + shipping string each)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,287 @@
+import os
+import json
+import time
+import random
 import pytest
+import pytest_asyncio
 import allure
 from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 from allure_commons.types import AttachmentType
+from utils import screenshot_helper
+from utils.screenshot_helper import attach_screenshot
+from utils.context_pool import ContextPool
+from utils.network_rules import RULE_SETS, RequestBlocker
+from utils.trace_recorder import TRACE_MODES, TraceRecorder
+from utils.har_replay import DEFAULT_HAR_PATH, HAR_FALLBACKS, HAR_MODES, REPLAY_RANDOM_SEED, HarSession
+from utils import attachments, flow_steps, item_cache, rate_limiter, site_urls, step_metrics
+from utils.selector_resolver import attach_resolution_report, get_resolver
+from utils.scenarios import shard
 
-@pytest.fixture(scope="function")
-def page(request):
+CONTEXT_OPTIONS = {
+    "viewport": {'width': 1920, 'height': 1080},
+    "locale": 'en-US',
+    "timezone_id": 'Asia/Jerusalem'
+}
+
+LAUNCH_OPTIONS = {
+    "channel": "msedge",
+    "headless": False,
+    "slow_mo": 100
+}
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--context-mode",
+        default="recycle",
+        choices=["recycle", "fresh"],
+        help="recycle: reuse wiped contexts between tests; fresh: new context per test"
+    )
+    parser.addoption(
+        "--block-resources",
+        default="none",
+        help=f"Comma-separated request rule sets to apply ({', '.join(RULE_SETS)})"
+    )
+    parser.addoption(
+        "--trace-mode",
+        default="full",
+        choices=list(TRACE_MODES),
+        help="full: trace the whole test; chunks: one trace chunk per flow step, "
+             "keeping the last --trace-ring-size around a failure; off: no tracing"
+    )
+    parser.addoption("--trace-ring-size", type=int, default=3, help="Trace chunks kept in chunks mode")
+    parser.addoption(
+        "--screenshot-level",
+        default="all",
+        choices=list(screenshot_helper.LEVELS),
+        help="Which screenshots to attach: none, failures, key (key steps + failures) or all"
+    )
+    parser.addoption("--screenshot-format", default="png", choices=["png", "jpeg"])
+    parser.addoption("--screenshot-quality", type=int, default=80, help="JPEG quality (0-100)")
+    parser.addoption("--screenshot-viewport-only", action="store_true", help="Capture the viewport instead of the full page")
+    parser.addoption("--screenshot-max-size", default=None, metavar="WIDTHxHEIGHT",
+                     help="Scale screenshots down (aspect ratio kept) to fit within WIDTHxHEIGHT pixels")
+    parser.addoption("--no-screenshot-dedup", action="store_true",
+                     help="Attach screenshots even when identical to the previous one")
+    parser.addoption(
+        "--har-mode",
+        default="off",
+        choices=list(HAR_MODES),
+        help="record: save every request of the test to a HAR; replay: answer requests from that HAR"
+    )
+    parser.addoption("--har-path", default=DEFAULT_HAR_PATH,
+                     help="HAR file per test; {test} is replaced with the test name")
+    parser.addoption(
+        "--har-fallback",
+        default="abort",
+        choices=list(HAR_FALLBACKS),
+        help="On replay, abort requests missing from the HAR (strict) or let them fall through to the network"
+    )
+    parser.addoption("--no-item-cache", action="store_true",
+                     help="Don't read or write the per-item knowledge cache")
+    parser.addoption("--item-cache-ttl", type=float, default=item_cache.DEFAULT_TTL_HOURS,
+                     help="Hours before cached facts about an item are re-learned")
+    parser.addoption("--sync-attachments", action="store_true",
+                     help="Write Allure attachments on the test thread instead of in the background")
+    parser.addoption("--compress-attachments", action="store_true",
+                     help=f"Store text/JSON attachments of {attachments.COMPRESS_MIN_BYTES // 1024} KiB or more gzipped")
+    parser.addoption("--step-metrics", action="store_true",
+                     help="Record time, Playwright calls, waits and bytes per flow step")
+    parser.addoption("--step-metrics-file", default=step_metrics.DEFAULT_PATH,
+                     help="Flat CSV of every step of the run; {run_id} is replaced with the run's start time")
+    parser.addoption("--nav-rate", type=float, default=0,
+                     help="Navigations per second per host, shared by every worker process "
+                          f"(0, the default, disables the limit; {rate_limiter.DEFAULT_RATE:g} suits live eBay)")
+    parser.addoption("--nav-burst", type=int, default=rate_limiter.DEFAULT_BURST,
+                     help="Navigations allowed back to back after a quiet period")
+    parser.addoption("--shard-index", type=int, default=0, help="Which shard of the tests this process runs (0-based)")
+    parser.addoption("--shard-count", type=int, default=1,
+                     help="Split the collected tests round-robin into this many shards (see scripts/run_shards.py)")
+    parser.addoption("--stub-site", action="store_true",
+                     help="Run the flows against a local eBay stand-in instead of the live site")
+    parser.addoption("--stub-setting", action="append", default=[], metavar="KEY=VALUE",
+                     help="Override a stub site setting, e.g. latency_ms=200 or catalog_size=1000")
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_site(request):
+    """With --stub-site, serve the local eBay stand-in and point the flows at it"""
+    if not request.config.getoption("--stub-site"):
+        yield None
+        return
+    
+    # Imported here so live runs don't load the stub
+    from stub_ebay.__main__ import parse_setting
+    from stub_ebay.server import StubEbayServer
+    
+    settings = dict(parse_setting(s) for s in request.config.getoption("--stub-setting"))
+    server = StubEbayServer(**settings)
+    server.start()
+    site_urls.configure(base_url=server.base_url, cart_url=server.cart_url)
+    print(f"Stub site on {server.base_url} with {settings or 'default settings'}")
+    
+    yield server
+    
+    server.stop()
+    print(f"Stub site served: {server.stats()}")
+
+@pytest.fixture(scope="session")
+def context_pool(request):
+    """One browser for the whole session, handing out a clean context per test"""
     with sync_playwright() as p:
-        browser = p.chromium.launch(channel="msedge", headless=False, slow_mo=100)
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            locale='en-US',
-            timezone_id='Asia/Jerusalem'
+        pool = ContextPool.launch(
+            p.chromium,
+            LAUNCH_OPTIONS,
+            CONTEXT_OPTIONS,
+            mode=request.config.getoption("--context-mode")
         )
+        print(f"Browser launched in {pool.launch_ms} ms")
         
-        # Enable tracing for detailed debugging
-        context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        
-        page = context.new_page()
+        yield pool
         
-        # Attach browser info to Allure
+        pool.close()
+
+@pytest.fixture(scope="function")
+def page(request, context_pool):
+    context, timings = context_pool.acquire()
+    blocker = RequestBlocker.install(context, request.config.getoption("--block-resources"))
+    
+    # Enable tracing for detailed debugging
+    tracer = TraceRecorder(
+        context,
+        mode=request.config.getoption("--trace-mode"),
+        ring_size=request.config.getoption("--trace-ring-size")
+    )
+    tracer.start()
+    flow_steps.add_listener(tracer)
+    
+    # Record or replay the whole flow from a HAR
+    har_mode = request.config.getoption("--har-mode")
+    har = HarSession(
+        context,
+        mode=har_mode,
+        har_path=request.config.getoption("--har-path").format(test=request.node.name),
+        fallback=request.config.getoption("--har-fallback")
+    )
+    har.install()
+    if har_mode != "off":
+        random.seed(REPLAY_RANDOM_SEED)
+    
+    metrics = step_metrics.StepMetrics() if step_metrics.is_enabled() else None
+    if metrics:
+        metrics.start()
+    test_start = time.perf_counter()
+    
+    page = context.new_page()
+    
+    # Attach browser info to Allure
+    allure.dynamic.parameter("Browser", "Microsoft Edge")
+    allure.dynamic.parameter("Viewport", "1920x1080")
+    allure.attach(
+        json.dumps({
+            "browser_launch_ms": context_pool.launch_ms,
+            "context_acquire_ms": timings["acquire_ms"],
+            "context_reused": timings["reused"],
+            "context_mode": context_pool.mode
+        }, indent=2),
+        name="Browser Pool Timings",
+        attachment_type=AttachmentType.JSON
+    )
+    
+    yield page
+    
+    test_duration_ms = (time.perf_counter() - test_start) * 1000
+    flow_steps.remove_listener(tracer)
+    if metrics:
+        step_metrics.finish(metrics, request.node.name)
+    
+    har_comparison = har.finish()
+    if har_mode == "record":
+        allure.attach(
+            f"Recorded to {har.har_path}\nStep timings: {har.timings_path}",
+            name="HAR Recording",
+            attachment_type=AttachmentType.TEXT
+        )
+    elif har_mode == "replay":
+        allure.attach(
+            json.dumps({"har": har.har_path, "fallback": har.fallback, "steps": har_comparison}, indent=2),
+            name="HAR Replay Step Timings",
+            attachment_type=AttachmentType.JSON
+        )
+    
+    # On test failure, attach trace and screenshot
+    failed = request.node.rep_call.failed if hasattr(request.node, 'rep_call') else False
+    if failed:
+        attach_screenshot(page, "Failure Screenshot", kind="failure")
+    
+    # Save and attach trace (the full trace, or the last chunks before the failure)
+    trace_files = tracer.finish(failed, full_trace_path=f"trace_{request.node.name}.zip")
+    for trace_path in trace_files:
+        allure.attach.file(
+            trace_path,
+            name="Playwright Trace" if tracer.mode == "full" else f"Playwright Trace - {os.path.basename(trace_path)}",
+            attachment_type=AttachmentType.ZIP
+        )
+    tracer.cleanup()
+    
+    allure.attach(
+        json.dumps(tracer.stats(test_duration_ms), indent=2),
+        name="Tracing Overhead",
+        attachment_type=AttachmentType.JSON
+    )
+    
+    if blocker.rules:
+        allure.attach(
+            json.dumps(blocker.stats(), indent=2),
+            name="Network Blocking Stats",
+            attachment_type=AttachmentType.JSON
+        )
+    blocker.uninstall()
+    
+    attach_resolution_report()
+    attach_navigation_report()
+    
+    # Playwright writes a recorded HAR when its context closes
+    context_pool.release(context, reusable=not failed and har_mode != "record")
+    
+    # Everything this test attached is on disk before the next test starts
+    attachments.flush()
+
+@pytest_asyncio.fixture
+async def async_browser():
+    """One async_api browser shared by every flow of an async test"""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(**LAUNCH_OPTIONS)
         allure.dynamic.parameter("Browser", "Microsoft Edge")
         allure.dynamic.parameter("Viewport", "1920x1080")
         
-        yield page
-        
-        # On test failure, attach trace and screenshot
-        if request.node.rep_call.failed if hasattr(request.node, 'rep_call') else False:
-            allure.attach(
-                page.screenshot(full_page=True),
-                name="Failure Screenshot",
-                attachment_type=AttachmentType.PNG
-            )
-            
-            # Save and attach trace
-            trace_path = f"trace_{request.node.name}.zip"
-            context.tracing.stop(path=trace_path)
-            allure.attach.file(
-                trace_path,
-                name="Playwright Trace",
-                attachment_type=AttachmentType.ZIP
-            )
-        else:
-            context.tracing.stop()
+        yield browser
         
-        browser.close()
+        await browser.close()
+
+@pytest_asyncio.fixture
+async def new_async_context(request, async_browser):
+    """Factory for isolated async contexts (own cookies, own guest cart)"""
+    contexts = []
+    metrics = step_metrics.StepMetrics() if step_metrics.is_enabled() else None
+    if metrics:
+        metrics.start()
+    
+    async def factory():
+        context = await async_browser.new_context(**CONTEXT_OPTIONS)
+        contexts.append(context)
+        return context
+    
+    yield factory
+    
+    if metrics:
+        step_metrics.finish(metrics, request.node.name)
+    attach_resolution_report()
+    attach_navigation_report()
+    
+    for context in contexts:
+        await context.close()
+    
+    attachments.flush()
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
@@ -55,6 +293,93 @@ def pytest_runtest_makereport(item, call):
 def pytest_configure(config):
     config.addinivalue_line("markers", "e2e: mark test as end-to-end")
     
+    max_width = max_height = None
+    if config.getoption("--screenshot-max-size"):
+        max_width, max_height = (int(value) for value in config.getoption("--screenshot-max-size").lower().split("x"))
+    screenshot_helper.configure(
+        level=config.getoption("--screenshot-level"),
+        full_page=not config.getoption("--screenshot-viewport-only"),
+        image_type=config.getoption("--screenshot-format"),
+        quality=config.getoption("--screenshot-quality"),
+        max_width=max_width,
+        max_height=max_height,
+        dedup=not config.getoption("--no-screenshot-dedup")
+    )
+    
+    # Shards run at the same time, so each one gets its own timing file
+    step_metrics_file = config.getoption("--step-metrics-file")
+    if config.getoption("--shard-count") > 1:
+        root, ext = os.path.splitext(step_metrics_file)
+        step_metrics_file = f"{root}-shard-{config.getoption('--shard-index')}{ext}"
+    step_metrics.configure(
+        enabled=config.getoption("--step-metrics"),
+        path=step_metrics_file
+    )
+    
+    rate_limiter.configure(rate=config.getoption("--nav-rate"), burst=config.getoption("--nav-burst"))
+    
+    # Cached item facts change which requests a flow makes, so HAR runs don't use them
+    item_cache.configure(
+        ttl_hours=config.getoption("--item-cache-ttl"),
+        enabled=not config.getoption("--no-item-cache") and config.getoption("--har-mode") == "off"
+    )
+    
     # Set Allure report metadata
     allure.dynamic.feature("E2E Shopping Flow")
-    allure.dynamic.suite("eBay Automation Tests")
\ No newline at end of file
+    allure.dynamic.suite("eBay Automation Tests")
+
+def attach_navigation_report():
+    report = rate_limiter.get_rate_limiter().report()
+    if report:
+        allure.attach(
+            json.dumps(report, indent=2),
+            name="Navigation Throttling (this worker so far)",
+            attachment_type=AttachmentType.JSON
+        )
+
+def pytest_collection_modifyitems(config, items):
+    count = config.getoption("--shard-count")
+    if count <= 1:
+        return
+    selected = shard(items, config.getoption("--shard-index"), count)
+    keep = {id(item) for item in selected}
+    deselected = [item for item in items if id(item) not in keep]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+def pytest_sessionstart(session):
+    # Allure's file logger is registered during pytest_configure; take over its attachment writes now
+    if not session.config.getoption("--sync-attachments"):
+        attachments.install(compress=session.config.getoption("--compress-attachments"))
+
+def pytest_sessionfinish(session):
+    attachments.uninstall()
+    # Persist selector hit/miss counts so the next run tries the best candidates first
+    get_resolver().flush()
+
+def pytest_terminal_summary(terminalreporter):
+    stats = screenshot_helper.get_policy().stats
+    terminalreporter.write_line(
+        f"Screenshots: {stats['taken']} attached ({stats['bytes'] / 1024:.0f} KiB), "
+        f"{stats['skipped_by_level']} skipped by level, {stats['skipped_duplicate']} duplicates skipped, "
+        f"{stats['downscaled']} scaled down"
+    )
+    writer_stats = attachments.stats()
+    if writer_stats:
+        terminalreporter.write_line(
+            f"Attachments: {writer_stats['written']} written in the background ({writer_stats['bytes'] / 1024:.0f} KiB), "
+            f"{writer_stats['linked_files']} files linked, test thread waited {writer_stats['blocked_ms']:.0f} ms "
+            f"for queue space and {writer_stats['flush_ms']:.0f} ms for flushes"
+        )
+    for host, nav in rate_limiter.get_rate_limiter().report().items():
+        terminalreporter.write_line(
+            f"Navigations to {host}: {nav['navigations']} at {nav['achieved_rate_per_s']}/s "
+            f"(limit {nav['configured_rate_per_s']}/s), {nav['throttled_ms'] / 1000:.1f} s throttled, "
+            f"{nav['challenges']} challenge pages"
+        )
+    cache_stats = item_cache.get_item_cache().stats
+    terminalreporter.write_line(
+        f"Item cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['expired']} expired, "
+        f"{cache_stats['skipped_bad']} known-bad items skipped"
+    )
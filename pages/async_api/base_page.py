@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager
+from playwright.async_api import Page, Locator, expect
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from pages.base_page import DEFAULT_WAIT_CEILING_MS, DOM_SETTLED_JS
+import allure
+import json
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.flow_steps import step
+from utils.screenshot_helper import attach_screenshot_async
+from utils import step_metrics
+from utils.rate_limiter import get_rate_limiter, host_of
+
+class BasePage:
+    """async_api counterpart of pages.base_page.BasePage"""
+    def __init__(self, page: Page):
+        self.page = page
+        self.wait_log = []
+        step_metrics.watch_page(page)
+    
+    async def wait_for_page(self):
+        with step("Waiting for page to load"):
+            await self.page.wait_for_load_state("domcontentloaded")
+    
+    async def click(self, locator: str):
+        with step(f"Clicking element: {locator}"):
+            await self.page.locator(locator).click()
+
+    async def fill(self, locator: str, value: str):
+        with step(f"Filling '{locator}' with value"):
+            # Don't log sensitive data like passwords
+            if 'password' not in locator.lower() and 'pass' not in locator.lower():
+                allure.attach(value, name="Input Value", attachment_type=AttachmentType.TEXT)
+            await self.page.locator(locator).fill(value)
+
+    async def get_text(self, locator: str) -> str:
+        with step(f"Getting text from: {locator}"):
+            text = await self.page.locator(locator).inner_text()
+            allure.attach(text, name="Retrieved Text", attachment_type=AttachmentType.TEXT)
+            return text
+    
+    async def throttle_navigation(self):
+        """Wait for a navigation token before a click or key press that leaves the page"""
+        await get_rate_limiter().acquire_async(host_of(self.page.url))
+
+    async def take_screenshot(self, name: str, kind: str = "step"):
+        """Take and attach screenshot to Allure report (subject to the screenshot policy)"""
+        with step(f"Taking screenshot: {name}"):
+            await attach_screenshot_async(self.page, name, kind=kind)
+
+    # Condition-based waits, see pages.base_page.BasePage
+
+    @contextmanager
+    def _timed_wait(self, kind: str, target, timeout: int):
+        entry = {"kind": kind, "target": str(target), "ceiling_ms": timeout, "satisfied": False}
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.wait_log.append(entry)
+            step_metrics.record_wait(entry["elapsed_ms"])
+
+    async def wait_for_element(self, selector: str, state: str = "visible", timeout: int = DEFAULT_WAIT_CEILING_MS) -> bool:
+        with self._timed_wait(f"element {state}", selector, timeout) as entry:
+            try:
+                await self.page.wait_for_selector(selector, state=state, timeout=timeout)
+                entry["satisfied"] = True
+            except PlaywrightTimeoutError:
+                pass
+            return entry["satisfied"]
+
+    async def wait_for_dom_settled(self, quiet_ms: int = 300, timeout: int = DEFAULT_WAIT_CEILING_MS) -> bool:
+        with self._timed_wait("dom settled", f"quiet {quiet_ms} ms", timeout) as entry:
+            try:
+                entry["satisfied"] = await self.page.evaluate(DOM_SETTLED_JS, [quiet_ms, timeout])
+            except Exception as e:
+                entry["error"] = str(e).splitlines()[0]
+            return entry["satisfied"]
+
+    async def wait_for_response(self, url_or_predicate, action=None, timeout: int = DEFAULT_WAIT_CEILING_MS):
+        target = getattr(url_or_predicate, "__name__", url_or_predicate)
+        with self._timed_wait("response", target, timeout) as entry:
+            try:
+                async with self.page.expect_response(url_or_predicate, timeout=timeout) as response_info:
+                    if action:
+                        await action()
+                response = await response_info.value
+                entry["satisfied"] = True
+                entry["status"] = response.status
+                return response
+            except PlaywrightTimeoutError:
+                return None
+
+    async def wait_for_text_change(self, target, previous_text: str, timeout: int = DEFAULT_WAIT_CEILING_MS):
+        locator = target if isinstance(target, Locator) else self.page.locator(target).first
+        with self._timed_wait("text change", target, timeout) as entry:
+            try:
+                await expect(locator).not_to_have_text(previous_text, timeout=timeout)
+                entry["satisfied"] = True
+                return await locator.inner_text()
+            except (AssertionError, PlaywrightTimeoutError):
+                # The node can also detach between the text check and the read
+                return None
+
+    def attach_wait_timings(self, name: str = "Wait Timings"):
+        if self.wait_log:
+            attach(
+                json.dumps(self.wait_log, indent=2),
+                name=name,
+                attachment_type=AttachmentType.JSON
+            )
+        self.wait_log = []
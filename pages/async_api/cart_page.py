@@ -0,0 +1,138 @@
+from utils.price_utils import parse_price
+from utils.selector_resolver import resolve_async as resolve_selector_async
+from utils.site_urls import cart_url
+from utils.rate_limiter import navigate_async
+from pages.async_api.base_page import BasePage
+from pages.cart_page import (
+    CART_SUBTOTAL_SELECTOR, CART_TOTAL_FALLBACK_SELECTORS, CART_DOM_JS, CART_RESPONSE_TIMEOUT_MS, RENDERED_SUBTOTAL_JS,
+    cart_model_from_json, is_cart_response
+)
+
+class CartPage(BasePage):
+    """async_api counterpart of pages.cart_page.CartPage"""
+    def __init__(self, page):
+        super().__init__(page)
+        self.cart_responses = []
+        self.model = None
+
+    def _capture_response(self, response):
+        if is_cart_response(response):
+            self.cart_responses.append(response)
+
+    async def open(self):
+        self.cart_responses = []
+        self.model = None
+        self.page.on("response", self._capture_response)
+        response = await self.wait_for_response(
+            is_cart_response,
+            action=lambda: navigate_async(self.page, cart_url()),
+            timeout=CART_RESPONSE_TIMEOUT_MS
+        )
+        if response is None:
+            await self.page.wait_for_load_state("domcontentloaded")
+            await self.wait_for_element(".cartsummary", timeout=10000)
+
+    async def get_cart_model(self) -> dict:
+        """Line items, item prices, shipping and subtotal of the cart (see the sync CartPage)"""
+        if self.model is None:
+            try:
+                self.page.remove_listener("response", self._capture_response)
+            except Exception:
+                pass
+            self.model = await self._model_from_responses()
+            if self.model:
+                self.model["dom_subtotal"] = await self._rendered_subtotal()
+            else:
+                self.model = await self._model_from_dom()
+            print(f"Cart from {self.model['source']}: {self.model['item_count']} items, "
+                  f"subtotal {self.model['subtotal']} {self.model.get('currency') or 'ILS'}")
+        return self.model
+
+    async def _model_from_responses(self):
+        for response in reversed(self.cart_responses):
+            try:
+                model = cart_model_from_json(await response.json())
+            except Exception as e:
+                print(f"Could not read cart response {response.url}: {e}")
+                continue
+            if model:
+                return dict(model, source="response", response_url=response.url)
+        return None
+
+    async def _model_from_dom(self) -> dict:
+        subtotal = await self._dom_subtotal()
+        try:
+            rendered = await self.page.evaluate(CART_DOM_JS)
+        except Exception as e:
+            print(f"Could not read cart lines: {e}")
+            rendered = {"items": [], "items_total_text": "", "shipping_total_text": ""}
+
+        items = []
+        for row in rendered["items"]:
+            line_price = parse_price(row["price_text"])
+            items.append({
+                "item_id": row["item_id"],
+                "title": row["title"],
+                "price": round(line_price / row["quantity"], 2) if line_price else None,
+                "quantity": row["quantity"],
+                "shipping": None,
+            })
+        return {
+            "items": items,
+            "item_count": sum(item["quantity"] for item in items),
+            "items_total": parse_price(rendered["items_total_text"]),
+            "shipping_total": parse_price(rendered["shipping_total_text"]),
+            "subtotal": subtotal,
+            "dom_subtotal": subtotal,
+            "currency": None,
+            "source": "dom",
+        }
+
+    async def _rendered_subtotal(self):
+        """The rendered subtotal if it is on the page right now, else None (no waiting)"""
+        try:
+            return parse_price(await self.page.evaluate(RENDERED_SUBTOTAL_JS, CART_SUBTOTAL_SELECTOR))
+        except Exception as e:
+            print(f"Could not read the rendered subtotal: {e}")
+            return None
+
+    async def _dom_subtotal(self):
+        try:
+            await self.page.wait_for_selector(".cartsummary", timeout=10000)
+            
+            # A candidate only counts if its text parses as a price
+            resolution = await resolve_selector_async(
+                self.page, "cart_subtotal", [CART_SUBTOTAL_SELECTOR], accept=parse_price
+            )
+            if not resolution:
+                resolution = await resolve_selector_async(
+                    self.page,
+                    "cart_subtotal_fallback",
+                    CART_TOTAL_FALLBACK_SELECTORS,
+                    pick="last",
+                    accept=parse_price
+                )
+            if resolution:
+                total = parse_price(resolution["text"])
+                print(f"Cart subtotal via '{resolution['selector']}': {total} ILS")
+                return total
+            
+            print("ERROR: Could not find cart total")
+            await self.page.screenshot(path="debug_cart_total_not_found.png")
+            raise Exception("Could not find cart total on page")
+            
+        except Exception as e:
+            print(f"Error getting cart total: {e}")
+            await self.page.screenshot(path="error_cart_total.png")
+            raise
+
+    async def get_total(self):
+        """Get the cart subtotal (item + shipping total)"""
+        return (await self.get_cart_model())["subtotal"]
+    
+    async def get_item_count(self):
+        """Get the number of items in cart"""
+        try:
+            return (await self.get_cart_model())["item_count"] or 1
+        except Exception:
+            return 1
@@ -0,0 +1,25 @@
+from pages.async_api.base_page import BasePage
+from utils.site_urls import site_url
+from utils.rate_limiter import navigate_async
+
+class LoginPage(BasePage):
+    """async_api counterpart of pages.login_page.LoginPage"""
+    async def open(self):
+        """Open the login page"""
+        await navigate_async(self.page, site_url("/signin"))
+
+    async def login(self, username: str, password: str):
+        """
+        The login function to ebay platform.
+        
+        :param username: The mail to the platform.
+        :type username: str
+        :param password: The password to the platform.
+        :type password: str
+        """
+        
+        await self.page.fill('#userid', username)
+        await self.page.click("#signin-continue-btn")
+
+        await self.page.fill('#pass', password)
+        await self.page.click('#sgnBt')
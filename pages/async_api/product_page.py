@@ -0,0 +1,247 @@
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from pages.async_api.base_page import BasePage
+from pages.product_page import (
+    ADD_TO_CART_SELECTORS, DISCOVER_VARIANTS_JS, VARIANT_STATE_JS, plan_variant_selection,
+    ADD_TO_CART_URL_RE, ADD_TO_CART_CONFIRM_TIMEOUT_MS, CART_COUNT_JS, ADD_TO_CART_BEFORE_JS,
+    ADD_TO_CART_SETTLED_JS, add_to_cart_result
+)
+from utils.item_cache import get_item_cache, item_id_from_url
+from utils.selector_resolver import resolve_async as resolve_selector_async
+from utils.site_urls import cart_url
+
+class ProductPage(BasePage):
+    """async_api counterpart of pages.product_page.ProductPage"""
+    async def discover_variants(self) -> dict:
+        """Read all variant controls and their options in a single evaluation"""
+        return await self.page.evaluate(DISCOVER_VARIANTS_JS)
+
+    async def select_random_variants(self, variants: dict = None, preferred: dict = None) -> dict:
+        """Select random variants from both standard selects and custom listboxes"""
+        chosen = {}
+        try:
+            if variants is None:
+                variants = await self.discover_variants()
+            
+            plan = plan_variant_selection(variants, preferred)
+            print(f"Variant plan: {len(plan['listboxes'])} listboxes, {len(plan['selects'])} selects to set")
+            
+            for entry in plan["listboxes"]:
+                text = await self._apply_listbox_choice(entry, preferred)
+                if text:
+                    chosen[entry["label"]] = text
+            
+            for entry in plan["selects"]:
+                text = await self._apply_select_choice(entry)
+                if text:
+                    chosen[entry["label"]] = text
+            
+        except Exception as e:
+            print(f"Error in select_random_variants: {e}")
+        return chosen
+    
+    async def _apply_listbox_choice(self, entry: dict, preferred: dict = None):
+        """Open one custom eBay listbox and click only the planned option"""
+        idx = entry["index"]
+        button = self.page.locator("button[aria-haspopup='listbox']").nth(idx)
+        try:
+            if entry["choice"] is None and entry["options_loaded"]:
+                print(f"Listbox {idx}: No valid options")
+                return
+            # Without a controlled listbox there is nothing to pick from; opening it would only leave a popup over the page
+            if not entry["controls"]:
+                print(f"Listbox {idx}: No controlled listbox, skipping")
+                return
+            
+            before = await self.page.evaluate(VARIANT_STATE_JS)
+            await button.click()
+            await self.wait_for_element(f"#{entry['controls']} div[role='option']", timeout=2000)
+            
+            # Some listboxes only render their options once opened
+            if not entry["options_loaded"]:
+                # Looked up by the listbox it opened: the buttons may have shifted since the first discovery
+                controls = entry["controls"]
+                rediscovered = next(
+                    (listbox for listbox in (await self.discover_variants())["listboxes"] if listbox["controls"] == controls),
+                    None
+                )
+                if rediscovered is None:
+                    print(f"Listbox {idx}: #{controls} is gone after opening, closing")
+                    await button.click()
+                    await self.wait_for_element(f"#{controls}", state="hidden", timeout=1000)
+                    return
+                entry = plan_variant_selection({"listboxes": [dict(rediscovered, current="")]}, preferred)["listboxes"][0]
+                if entry["choice"] is None:
+                    print(f"Listbox {idx}: No valid options, closing")
+                    await button.click()
+                    await self.wait_for_element(f"#{entry['controls']}", state="hidden", timeout=1000)
+                    return
+            
+            print(f"Listbox {idx}: Selecting '{entry['choice']['text']}'")
+            await self.page.locator(f"#{entry['controls']} div[role='option']").nth(entry["choice"]["index"]).click()
+            await self._wait_for_variant_applied(before, f"listbox {idx}")
+            return entry["choice"]["text"]
+            
+        except Exception as e:
+            print(f"Listbox {idx}: Error - {e}")
+            try:
+                await self.page.keyboard.press("Escape")
+            except Exception:
+                pass
+    
+    async def _apply_select_choice(self, entry: dict):
+        """Set one standard <select> to the planned option"""
+        idx = entry["index"]
+        try:
+            before = await self.page.evaluate(VARIANT_STATE_JS)
+            print(f"Select {idx}: Selecting '{entry['choice']['text']}'")
+            await self.page.locator("select:not([hidden])").nth(idx).select_option(value=entry["choice"]["value"])
+            await self._wait_for_variant_applied(before, f"select {idx}")
+            return entry["choice"]["text"]
+        except Exception as e:
+            print(f"Select {idx}: Error - {e}")
+    
+    async def _wait_for_variant_applied(self, before: str, target: str, timeout: int = 2000) -> bool:
+        """Wait for the price, Add-to-cart state or shown variant values to change"""
+        with self._timed_wait("variant applied", target, timeout) as entry:
+            try:
+                await self.page.wait_for_function(
+                    f"(before) => ({VARIANT_STATE_JS})() !== before",
+                    arg=before,
+                    timeout=timeout
+                )
+                entry["satisfied"] = True
+            except PlaywrightTimeoutError:
+                pass
+            return entry["satisfied"]
+
+    async def click_and_confirm_add_to_cart(self, click, timeout: int = ADD_TO_CART_CONFIRM_TIMEOUT_MS) -> dict:
+        """Await `click` and wait for the cart to confirm it (see the sync ProductPage)"""
+        before, since = await self.page.evaluate(ADD_TO_CART_BEFORE_JS)
+        responses = []
+        
+        def capture(response):
+            if ADD_TO_CART_URL_RE.search(response.url):
+                responses.append(response)
+        
+        self.page.on("response", capture)
+        start = time.perf_counter()
+        try:
+            await click()
+            with self._timed_wait("add to cart confirmed", "add-to-cart response or cart badge", timeout) as entry:
+                settled = None
+                try:
+                    handle = await self.page.wait_for_function(
+                        ADD_TO_CART_SETTLED_JS,
+                        arg=[before, since, ADD_TO_CART_URL_RE.pattern],
+                        timeout=timeout
+                    )
+                    settled = await handle.json_value()
+                except PlaywrightTimeoutError:
+                    pass
+                except Exception as e:
+                    # The addToCart link navigates to the cart, taking the evaluation context with it
+                    entry["error"] = str(e).splitlines()[0]
+                    await self.page.wait_for_load_state("domcontentloaded")
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                
+                status = body = None
+                if responses:
+                    status = responses[-1].status
+                    try:
+                        body = await responses[-1].json()
+                    except Exception:
+                        pass
+                try:
+                    after = await self.page.evaluate(CART_COUNT_JS)
+                except Exception:
+                    after = None
+                error = None
+                if settled == "variant error":
+                    try:
+                        error = (await self.page.locator(".x-msku-error:visible").first.inner_text(timeout=1000)).strip()
+                    except Exception:
+                        error = "variant selection error"
+                result = add_to_cart_result(
+                    before, after, status, body,
+                    on_cart_page=self.page.url.startswith(cart_url()),
+                    error=error,
+                    elapsed_ms=elapsed_ms
+                )
+                entry["satisfied"] = result["confirmed"]
+        finally:
+            self.page.remove_listener("response", capture)
+        return result
+
+    async def add_to_cart(self, confirm_timeout: int = ADD_TO_CART_CONFIRM_TIMEOUT_MS, item_url: str = None) -> dict:
+        """
+        Add item to cart, selecting variants if needed. Raises unless the cart
+        confirms the item within `confirm_timeout` ms.
+
+        :param item_url: The listing being added; the page's URL when not given
+
+        :return: The confirmation (see pages.product_page.add_to_cart_result)
+        """
+        # Taken up front: after a failure the page may be on the cart or an error page
+        item_id = item_id_from_url(item_url or self.page.url)
+        try:
+            print(f"Processing product page: {self.page.url}")
+            
+            await self.page.wait_for_load_state("domcontentloaded")
+            await self.wait_for_dom_settled(timeout=3000)
+            
+            # What earlier runs learned about this listing
+            known = get_item_cache().get(item_id) or {}
+            
+            if known.get("has_variants") is False:
+                variants = {"listboxes": [], "selects": []}
+                print(f"Item {item_id} is known to have no variants")
+            else:
+                variants = await self.discover_variants()
+            listbox_count = len(variants["listboxes"])
+            select_count = len(variants["selects"])
+            print(f"Found {listbox_count} listbox components and {select_count} select elements")
+            
+            if listbox_count > 0 or select_count > 0:
+                print("Selecting variants...")
+                variant_choices = await self.select_random_variants(variants, known.get("variant_choices"))
+            else:
+                variant_choices = {}
+                print("No variants to select")
+            
+            print("Looking for 'Add to cart' button...")
+            
+            resolution = await resolve_selector_async(
+                self.page,
+                "add_to_cart_button",
+                ADD_TO_CART_SELECTORS,
+                prefer=known.get("add_to_cart_selector")
+            )
+            if not resolution:
+                print("ERROR: Could not find 'Add to cart' button")
+                await self.page.screenshot(path="debug_no_add_to_cart.png")
+                raise Exception("Could not find 'Add to cart' button")
+            
+            print(f"Found button via '{resolution['selector']}': text='{resolution['text']}'")
+            result = await self.click_and_confirm_add_to_cart(
+                lambda: resolution["locator"].click(timeout=5000),
+                timeout=confirm_timeout
+            )
+            if not result["confirmed"]:
+                raise Exception(f"Add to cart not confirmed after {result['elapsed_ms']} ms: {result['error']}")
+            print(f"Add to cart confirmed via {result['via']} in {result['elapsed_ms']} ms "
+                  f"(cart count: {result['cart_count']})")
+            
+            get_item_cache().record_added(
+                item_id,
+                has_variants=listbox_count > 0 or select_count > 0,
+                variant_choices=variant_choices,
+                add_to_cart_selector=resolution["selector"]
+            )
+            return result
+            
+        except Exception as e:
+            print(f"Error adding to cart: {e}")
+            get_item_cache().record_failed(item_id, str(e))
+            await self.page.screenshot(path=f"error_add_to_cart.png")
+            raise
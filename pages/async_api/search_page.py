@@ -0,0 +1,121 @@
+from pages.async_api.base_page import BasePage
+from pages.search_page import EXTRACT_CARDS_JS, SearchPage as SyncSearchPage
+import allure
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot_async
+from utils.rate_limiter import check_for_challenge_async
+import json
+
+class SearchPage(BasePage):
+    """
+    async_api counterpart of pages.search_page.SearchPage.
+
+    Cards are always read with the bulk in-page evaluation; the pricing and URL
+    checks are plain Python and shared with the sync page object.
+    """
+    _collect_from_cards = SyncSearchPage._collect_from_cards
+    _qualifying_cards = SyncSearchPage._qualifying_cards
+    _is_valid_ebay_url = SyncSearchPage._is_valid_ebay_url
+    _is_known_bad = SyncSearchPage._is_known_bad
+
+    async def search(self, query: str):
+        allure.attach(f"Search query: {query}", name="Query", attachment_type=AttachmentType.TEXT)
+        search_bar = self.page.locator("input[aria-label='Search for anything']")
+        await search_bar.fill(query)
+        await self.throttle_navigation()
+        await self.page.keyboard.press("Enter")
+        await self._wait_for_results()
+
+    async def apply_max_price_filter(self, max_price: int):
+        """Apply max price filter using the sidebar filter"""
+        try:
+            allure.attach(f"Max price: {max_price} ILS", name="Price Filter", attachment_type=AttachmentType.TEXT)
+            
+            await self.page.wait_for_selector("input[aria-label*='Maximum Value']", timeout=10000)
+            
+            max_price_input = self.page.locator("input[aria-label*='Maximum Value']")
+            await max_price_input.fill(str(max_price))
+            
+            # Press Tab to move focus away and enable the button
+            await self.page.keyboard.press("Tab")
+            await self.wait_for_element("button[aria-label='Submit price range']:not([disabled])", timeout=2000)
+            
+            submit_button = self.page.locator("button[aria-label='Submit price range']")
+            await self.throttle_navigation()
+            await submit_button.click()
+            
+            await self._wait_for_results()
+            
+            await attach_screenshot_async(self.page, "After Price Filter Applied", kind="step")
+            
+        except Exception as e:
+            allure.attach(f"Error applying price filter: {str(e)}", 
+                         name="Filter Error", 
+                         attachment_type=AttachmentType.TEXT)
+            print(f"Could not apply price filter via UI: {e}")
+            print("Falling back to URL-based filtering...")
+            current_url = self.page.url
+            if "_udhi=" not in current_url:
+                separator = "&" if "?" in current_url else "?"
+                new_url = f"{current_url}{separator}_udhi={max_price}"
+                await self.throttle_navigation()
+                await self.page.goto(new_url)
+                await self._wait_for_results()
+
+    async def _wait_for_results(self):
+        await self.page.wait_for_load_state("domcontentloaded")
+        await self.wait_for_element("li.s-card", state="attached")
+        await check_for_challenge_async(self.page)
+
+    async def collect_item_urls_under_price(self, max_price: int, limit: int):
+        urls = []
+        page_count = 0
+        max_pages = 5
+        
+        collected_items_details = []
+        
+        while len(urls) < limit and page_count < max_pages:
+            page_count += 1
+            
+            try:
+                await self.page.wait_for_selector("li.s-card", timeout=10000)
+            except Exception:
+                print(f"No items found on page {page_count}")
+                break
+            
+            cards = await self.page.eval_on_selector_all("li.s-card", EXTRACT_CARDS_JS)
+            print(f"Found {len(cards)} items on page {page_count}")
+            self._collect_from_cards(cards, max_price, limit, urls, collected_items_details)
+
+            # Paging Logic
+            if len(urls) < limit:
+                try:
+                    next_btn = self.page.locator("a.pagination__next")
+                    
+                    if await next_btn.count() > 0 and await next_btn.is_visible():
+                        is_disabled = await next_btn.get_attribute("aria-disabled")
+                        if is_disabled != "true":
+                            print(f"Going to next page...")
+                            await self.throttle_navigation()
+                            await next_btn.click()
+                            await self._wait_for_results()
+                        else:
+                            print("Next button is disabled")
+                            break
+                    else:
+                        print("No next button found")
+                        break
+                except Exception as e:
+                    print(f"Pagination error: {e}")
+                    break
+        
+        print(f"Collected {len(urls)} URLs total")
+        
+        attach(
+            json.dumps(collected_items_details, indent=2),
+            name="Collected Items Details",
+            attachment_type=AttachmentType.JSON
+        )
+        
+        return urls
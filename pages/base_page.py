@@ -1,15 +1,49 @@
-from playwright.sync_api import Page
+import time
+from contextlib import contextmanager
+from playwright.sync_api import Page, Locator, expect
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import allure
+import json
 from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot
+from utils import step_metrics
+from utils.rate_limiter import get_rate_limiter, host_of
+
+DEFAULT_WAIT_CEILING_MS = 10000
+
+# Resolves true once no node is added/removed/retexted for quietMs, or false
+# when ceilingMs passes first. Attribute churn (carousels, timers) is ignored.
+DOM_SETTLED_JS = """
+([quietMs, ceilingMs]) => new Promise((resolve) => {
+    let quietTimer = null;
+    let ceilingTimer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => done(true), quietMs);
+    });
+    const done = (settled) => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(ceilingTimer);
+        resolve(settled);
+    };
+    observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    quietTimer = setTimeout(() => done(true), quietMs);
+    ceilingTimer = setTimeout(() => done(false), ceilingMs);
+})
+"""
 
 class BasePage:
     def __init__(self, page: Page):
         self.page = page
-    
+        self.wait_log = []
+        step_metrics.watch_page(page)
+
     def wait_for_page(self):
         with allure.step("Waiting for page to load"):
             self.page.wait_for_load_state("domcontentloaded")
-    
+
     def click(self, locator: str):
         with allure.step(f"Clicking element: {locator}"):
             self.page.locator(locator).click()
@@ -26,13 +60,91 @@ class BasePage:
             text = self.page.locator(locator).inner_text()
             allure.attach(text, name="Retrieved Text", attachment_type=AttachmentType.TEXT)
             return text
-    
-    def take_screenshot(self, name: str):
-        """Take and attach screenshot to Allure report"""
+
+    def throttle_navigation(self):
+        """Wait for a navigation token before a click or key press that leaves the page"""
+        get_rate_limiter().acquire(host_of(self.page.url))
+
+    def take_screenshot(self, name: str, kind: str = "step"):
+        """Take and attach screenshot to Allure report (subject to the screenshot policy)"""
         with allure.step(f"Taking screenshot: {name}"):
-            screenshot = self.page.screenshot(full_page=True)
-            allure.attach(
-                screenshot,
+            attach_screenshot(self.page, name, kind=kind)
+
+    # Condition-based waits. Each one returns as soon as its condition holds,
+    # gives up at `timeout` ms without raising, and records what it waited for,
+    # for how long, and whether the condition was met in self.wait_log.
+
+    @contextmanager
+    def _timed_wait(self, kind: str, target, timeout: int):
+        entry = {"kind": kind, "target": str(target), "ceiling_ms": timeout, "satisfied": False}
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self.wait_log.append(entry)
+            step_metrics.record_wait(entry["elapsed_ms"])
+
+    def wait_for_element(self, selector: str, state: str = "visible", timeout: int = DEFAULT_WAIT_CEILING_MS) -> bool:
+        """Wait until `selector` is attached/detached/visible/hidden"""
+        with self._timed_wait(f"element {state}", selector, timeout) as entry:
+            try:
+                self.page.wait_for_selector(selector, state=state, timeout=timeout)
+                entry["satisfied"] = True
+            except PlaywrightTimeoutError:
+                pass
+            return entry["satisfied"]
+
+    def wait_for_dom_settled(self, quiet_ms: int = 300, timeout: int = DEFAULT_WAIT_CEILING_MS) -> bool:
+        """Wait until the DOM has had no structural or text mutations for `quiet_ms`"""
+        with self._timed_wait("dom settled", f"quiet {quiet_ms} ms", timeout) as entry:
+            try:
+                entry["satisfied"] = self.page.evaluate(DOM_SETTLED_JS, [quiet_ms, timeout])
+            except Exception as e:
+                # Navigating away destroys the evaluation context
+                entry["error"] = str(e).splitlines()[0]
+            return entry["satisfied"]
+
+    def wait_for_response(self, url_or_predicate, action=None, timeout: int = DEFAULT_WAIT_CEILING_MS):
+        """
+        Wait for a response matching a URL glob/regex or predicate, optionally
+        triggered by `action`. Returns the response, or None at the ceiling.
+        """
+        target = getattr(url_or_predicate, "__name__", url_or_predicate)
+        with self._timed_wait("response", target, timeout) as entry:
+            try:
+                with self.page.expect_response(url_or_predicate, timeout=timeout) as response_info:
+                    if action:
+                        action()
+                response = response_info.value
+                entry["satisfied"] = True
+                entry["status"] = response.status
+                return response
+            except PlaywrightTimeoutError:
+                return None
+
+    def wait_for_text_change(self, target, previous_text: str, timeout: int = DEFAULT_WAIT_CEILING_MS):
+        """
+        Wait until the text of `target` (selector or Locator) differs from
+        `previous_text`, e.g. a price updating after a variant is chosen.
+        Returns the new text, or None at the ceiling.
+        """
+        locator = target if isinstance(target, Locator) else self.page.locator(target).first
+        with self._timed_wait("text change", target, timeout) as entry:
+            try:
+                expect(locator).not_to_have_text(previous_text, timeout=timeout)
+                entry["satisfied"] = True
+                return locator.inner_text()
+            except (AssertionError, PlaywrightTimeoutError):
+                # The node can also detach between the text check and the read
+                return None
+
+    def attach_wait_timings(self, name: str = "Wait Timings"):
+        """Attach the recorded waits to Allure and start a new log"""
+        if self.wait_log:
+            attach(
+                json.dumps(self.wait_log, indent=2),
                 name=name,
-                attachment_type=AttachmentType.PNG
-            )
\ No newline at end of file
+                attachment_type=AttachmentType.JSON
+            )
+        self.wait_log = []
@@ -1,71 +1,287 @@
 from utils.price_utils import parse_price
+from utils.selector_resolver import resolve as resolve_selector
+from utils.site_urls import cart_url
+from utils.rate_limiter import navigate, host_of
 from pages.base_page import BasePage
 
+# Where eBay has shown the cart subtotal. The first visible SUBTOTAL node is
+# the cart's; the other layouts put it in their last total row.
+CART_SUBTOTAL_SELECTOR = "[data-test-id='SUBTOTAL']"
+CART_TOTAL_FALLBACK_SELECTORS = [
+    ".total-row [data-test-id='SUBTOTAL']",
+    "div.total-row .val-col",
+    ".cart-summary-line-item .total-row",
+]
+
+# Cart-summary keys of cart JSON payloads, in order of preference. Only the
+# summary object itself is read, so line items' own totals never count.
+SUBTOTAL_KEYS = ("subtotal", "cartSubtotal", "cartTotal")
+ITEM_COUNT_KEYS = ("item_count", "itemCount")
+ITEMS_TOTAL_KEYS = ("items_total", "itemsTotal", "itemTotal")
+SHIPPING_TOTAL_KEYS = ("shipping_total", "shippingTotal")
+# Where payloads have nested the summary object below the top level
+SUMMARY_CONTAINER_KEYS = ("cart", "summary", "cartSummary", "data")
+LINE_ITEM_KEYS = ("items", "lineItems", "line_items", "cartItems")
+ITEM_ID_KEYS = ("item_id", "itemId", "listingId", "id")
+ITEM_PRICE_KEYS = ("price", "itemPrice", "unitPrice")
+ITEM_SHIPPING_KEYS = ("shipping", "shippingCost", "shipping_cost")
+QUANTITY_KEYS = ("quantity", "qty")
+
+# How long open() waits for the cart's JSON response before falling back to the rendered summary
+CART_RESPONSE_TIMEOUT_MS = 10000
+
+# The first visible rendered subtotal's text, or null; read once, without waiting
+RENDERED_SUBTOTAL_JS = """
+(selector) => {
+    const el = Array.from(document.querySelectorAll(selector))
+        .find((node) => node.offsetWidth || node.offsetHeight || node.getClientRects().length);
+    return el ? (el.innerText || el.textContent || '').trim() : null;
+}
+"""
+
+# Line items and summary figures of a rendered cart, for when no cart response arrives
+CART_DOM_JS = """
+() => {
+    const text = (el) => (el ? el.innerText || el.textContent || '' : '').trim();
+    return {
+        items: Array.from(document.querySelectorAll('.cart-bucket .item-container')).map((row) => {
+            const link = row.querySelector("a[href*='/itm/']");
+            const match = link ? link.getAttribute('href').match(/\\/itm\\/(\\d+)/) : null;
+            const quantity = text(row.querySelector('.item-quantity, [data-test-id="qty-dropdown"]')).match(/\\d+/);
+            return {
+                item_id: match ? match[1] : null,
+                title: text(link),
+                quantity: quantity ? Number(quantity[0]) : 1,
+                price_text: text(row.querySelector('.item-price, [data-test-id="ITEM_PRICE"]')),
+            };
+        }),
+        items_total_text: text(document.querySelector("[data-test-id='ITEM_TOTAL']")),
+        shipping_total_text: text(document.querySelector("[data-test-id='SHIPPING']")),
+    };
+}
+"""
+
+def _amount(value):
+    """A number from a cart payload value: a number, price text, or {"value"/"amount": ...}"""
+    if isinstance(value, dict):
+        value = next((value[key] for key in ("value", "amount", "convertedFromValue") if key in value), None)
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_price(str(value))
+
+def _first(data: dict, keys: tuple):
+    return next((data[key] for key in keys if key in data), None)
+
+def _find_summary(payload, max_depth: int = 3):
+    """
+    The cart summary object: the payload itself or one nested under
+    SUMMARY_CONTAINER_KEYS, whichever first carries a subtotal. Lists (line
+    items) and other keys are never searched.
+    """
+    level = [payload]
+    for _ in range(max_depth):
+        for node in level:
+            if _amount(_first(node, SUBTOTAL_KEYS)) is not None:
+                return node
+        level = [node[key] for node in level for key in SUMMARY_CONTAINER_KEYS if isinstance(node.get(key), dict)]
+    return None
+
+def cart_model_from_json(payload):
+    """
+    Build a cart model from a cart JSON response.
+
+    :return: {"items": [{"item_id", "title", "price", "quantity", "shipping"}],
+        "item_count", "items_total", "shipping_total", "subtotal", "currency"},
+        or None when the payload has no cart subtotal
+    """
+    summary = _find_summary(payload) if isinstance(payload, dict) else None
+    if summary is None:
+        return None
+
+    items = []
+    for line in _first(summary, LINE_ITEM_KEYS) or []:
+        if not isinstance(line, dict):
+            continue
+        quantity = _amount(_first(line, QUANTITY_KEYS))
+        items.append({
+            "item_id": str(_first(line, ITEM_ID_KEYS) or "") or None,
+            "title": line.get("title"),
+            "price": _amount(_first(line, ITEM_PRICE_KEYS)),
+            "quantity": int(quantity) if quantity else 1,
+            "shipping": _amount(_first(line, ITEM_SHIPPING_KEYS)) or 0,
+        })
+
+    items_total = _amount(_first(summary, ITEMS_TOTAL_KEYS))
+    if items_total is None and items and all(item["price"] is not None for item in items):
+        items_total = round(sum(item["price"] * item["quantity"] for item in items), 2)
+    shipping_total = _amount(_first(summary, SHIPPING_TOTAL_KEYS))
+    if shipping_total is None and items:
+        shipping_total = round(sum(item["shipping"] for item in items), 2)
+
+    count = _amount(_first(summary, ITEM_COUNT_KEYS))
+    return {
+        "items": items,
+        "item_count": int(count) if count is not None else sum(item["quantity"] for item in items),
+        "items_total": items_total,
+        "shipping_total": shipping_total,
+        "subtotal": _amount(_first(summary, SUBTOTAL_KEYS)),
+        "currency": summary.get("currency"),
+    }
+
+def is_cart_response(response) -> bool:
+    """An XHR/fetch JSON response from the cart's host"""
+    try:
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return False
+        if "json" not in (response.headers.get("content-type") or ""):
+            return False
+        return host_of(response.url) == host_of(cart_url())
+    except Exception:
+        return False
+
 class CartPage(BasePage):
+    """
+    The cart. open() records the cart's JSON responses while the page loads,
+    and get_cart_model() builds the line items and totals from them. The
+    rendered cart is only read when no cart response came back.
+    """
+    def __init__(self, page):
+        super().__init__(page)
+        self.cart_responses = []
+        self.model = None
+
+    def _capture_response(self, response):
+        if is_cart_response(response):
+            self.cart_responses.append(response)
+
     def open(self):
-        self.page.goto("https://cart.ebay.com")
-        self.page.wait_for_load_state("domcontentloaded")
-        self.page.wait_for_timeout(2000)  # Wait for cart to fully load
+        self.cart_responses = []
+        self.model = None
+        self.page.on("response", self._capture_response)
+        # The cart's numbers are known once its JSON response is in; the
+        # rendered summary is only waited for when no such response comes
+        response = self.wait_for_response(
+            is_cart_response,
+            action=lambda: navigate(self.page, cart_url()),
+            timeout=CART_RESPONSE_TIMEOUT_MS
+        )
+        if response is None:
+            self.page.wait_for_load_state("domcontentloaded")
+            self.wait_for_element(".cartsummary", timeout=10000)
 
-    def get_total(self):
-        """Get the cart subtotal (item + shipping total)"""
+    def get_cart_model(self) -> dict:
+        """
+        Line items, item prices, shipping and subtotal of the cart.
+
+        :return: cart_model_from_json's dict plus "source" ("response" or "dom"),
+            "dom_subtotal" (the rendered subtotal; for responses only if it is
+            already on the page, otherwise None) and,
+            for responses, "response_url"
+        """
+        if self.model is None:
+            try:
+                self.page.remove_listener("response", self._capture_response)
+            except Exception:
+                pass
+            self.model = self._model_from_responses()
+            if self.model:
+                # Cross-checked by assertCartTotalNotExceeds when the page already shows one
+                self.model["dom_subtotal"] = self._rendered_subtotal()
+            else:
+                self.model = self._model_from_dom()
+            print(f"Cart from {self.model['source']}: {self.model['item_count']} items, "
+                  f"subtotal {self.model['subtotal']} {self.model.get('currency') or 'ILS'}")
+        return self.model
+
+    def _model_from_responses(self):
+        # The last response describes the cart as it ended up
+        for response in reversed(self.cart_responses):
+            try:
+                model = cart_model_from_json(response.json())
+            except Exception as e:
+                print(f"Could not read cart response {response.url}: {e}")
+                continue
+            if model:
+                return dict(model, source="response", response_url=response.url)
+        return None
+
+    def _model_from_dom(self) -> dict:
+        subtotal = self._dom_subtotal()
+        try:
+            rendered = self.page.evaluate(CART_DOM_JS)
+        except Exception as e:
+            print(f"Could not read cart lines: {e}")
+            rendered = {"items": [], "items_total_text": "", "shipping_total_text": ""}
+
+        items = []
+        for row in rendered["items"]:
+            line_price = parse_price(row["price_text"])
+            items.append({
+                "item_id": row["item_id"],
+                "title": row["title"],
+                # The rendered price is for the whole line
+                "price": round(line_price / row["quantity"], 2) if line_price else None,
+                "quantity": row["quantity"],
+                "shipping": None,
+            })
+        return {
+            "items": items,
+            "item_count": sum(item["quantity"] for item in items),
+            "items_total": parse_price(rendered["items_total_text"]),
+            "shipping_total": parse_price(rendered["shipping_total_text"]),
+            "subtotal": subtotal,
+            "dom_subtotal": subtotal,
+            "currency": None,
+            "source": "dom",
+        }
+
+    def _rendered_subtotal(self):
+        """The rendered subtotal if it is on the page right now, else None (no waiting)"""
+        try:
+            return parse_price(self.page.evaluate(RENDERED_SUBTOTAL_JS, CART_SUBTOTAL_SELECTOR))
+        except Exception as e:
+            print(f"Could not read the rendered subtotal: {e}")
+            return None
+
+    def _dom_subtotal(self):
+        """Read the subtotal (items + shipping) from the rendered summary"""
         try:
             # Wait for cart summary to load
             self.page.wait_for_selector(".cartsummary", timeout=10000)
-            
-            # Get the subtotal (this includes items + shipping)
-            subtotal_element = self.page.locator("[data-test-id='SUBTOTAL']")
-            
-            if subtotal_element.count() > 0 and subtotal_element.is_visible():
-                subtotal_text = subtotal_element.inner_text()
-                total = parse_price(subtotal_text)
-                
-                if total:
-                    print(f"Cart subtotal: {total} ILS")
-                    return total
-            
-            # Fallback: try other selectors
-            print("Primary selector failed, trying alternatives...")
-            
-            alternative_selectors = [
-                ".total-row [data-test-id='SUBTOTAL']",
-                "div.total-row .val-col",
-                ".cart-summary-line-item .total-row",
-            ]
-            
-            for selector in alternative_selectors:
-                try:
-                    element = self.page.locator(selector).last  # Get last total row
-                    if element.count() > 0:
-                        text = element.inner_text()
-                        total = parse_price(text)
-                        if total:
-                            print(f"Found total via '{selector}': {total}")
-                            return total
-                except:
-                    continue
-            
-            # If still not found, take screenshot and raise error
+
+            # A candidate only counts if its text parses as a price
+            resolution = resolve_selector(self.page, "cart_subtotal", [CART_SUBTOTAL_SELECTOR], accept=parse_price)
+            if not resolution:
+                resolution = resolve_selector(
+                    self.page,
+                    "cart_subtotal_fallback",
+                    CART_TOTAL_FALLBACK_SELECTORS,
+                    pick="last",
+                    accept=parse_price
+                )
+            if resolution:
+                total = parse_price(resolution["text"])
+                print(f"Cart subtotal via '{resolution['selector']}': {total} ILS")
+                return total
+
             print("ERROR: Could not find cart total")
             self.page.screenshot(path="debug_cart_total_not_found.png")
             raise Exception("Could not find cart total on page")
-            
+
         except Exception as e:
             print(f"Error getting cart total: {e}")
             self.page.screenshot(path="error_cart_total.png")
             raise
-    
+
+    def get_total(self):
+        """Get the cart subtotal (item + shipping total)"""
+        return self.get_cart_model()["subtotal"]
+
     def get_item_count(self):
         """Get the number of items in cart"""
         try:
-            # Look for "Item (X)" text
-            item_count_element = self.page.locator("[data-test-id='ITEM_TOTAL']")
-            if item_count_element.count() > 0:
-                # This will give us the item price, but we can count items differently
-                pass
-            
-            # Alternative: count cart items
-            cart_items = self.page.locator(".cart-bucket .item-container").count()
-            return cart_items if cart_items > 0 else 1
-        except:
-            return 1  # Default to 1 if can't determine
\ No newline at end of file
+            return self.get_cart_model()["item_count"] or 1
+        except Exception:
+            return 1  # Default to 1 if can't determine
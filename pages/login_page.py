@@ -1,10 +1,12 @@
 from pages.base_page import BasePage
+from utils.site_urls import site_url
+from utils.rate_limiter import navigate
 
 class LoginPage(BasePage):
     """This is the login page structure and functions."""
     def open(self):
         """Open the login page"""
-        self.page.goto("https://www.ebay.com/signin")
+        navigate(self.page, site_url("/signin"))
 
     def login(self, username: str, password: str):
         """
@@ -1,212 +1,464 @@
+import re
+import time
 import random
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from pages.base_page import BasePage
+from utils.item_cache import get_item_cache, item_id_from_url
+from utils.selector_resolver import resolve as resolve_selector
+from utils.site_urls import cart_url
+
+SKIP_KEYWORDS = ['quantity', 'qty', 'amount']
+
+# Known Add-to-cart button layouts; tried in order of past success
+ADD_TO_CART_SELECTORS = [
+    "a:has-text('Add to cart')",
+    "button:has-text('Add to cart')",
+    "a.ux-call-to-action--primary:has-text('Add')",
+    "a[href*='addToCart']",
+    "#atcBtn_btn",
+    "a.btn--primary:has-text('Add')",
+]
+
+# Reads every listbox, select and option (with disabled state) in one pass
+DISCOVER_VARIANTS_JS = """
+() => {
+    const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const text = (el) => (el ? el.innerText || el.textContent || '' : '').trim();
+    const listboxes = Array.from(document.querySelectorAll("button[aria-haspopup='listbox']")).map((button, index) => {
+        const controls = button.getAttribute('aria-controls');
+        const listbox = controls ? document.getElementById(controls) : null;
+        const options = listbox ? Array.from(listbox.querySelectorAll("div[role='option']")) : [];
+        return {
+            index: index,
+            visible: isVisible(button),
+            label: text(button.querySelector('.btn__label')),
+            current: text(button.querySelector('.btn__text')),
+            controls: controls,
+            options: options.map((option, optionIndex) => ({
+                index: optionIndex,
+                text: text(option.querySelector('.listbox__value')),
+                disabled: option.getAttribute('aria-disabled') === 'true',
+            })),
+        };
+    });
+    const selects = Array.from(document.querySelectorAll('select:not([hidden])')).map((select, index) => ({
+        index: index,
+        visible: isVisible(select),
+        label: select.getAttribute('aria-label') || '',
+        options: Array.from(select.options).map((option) => ({
+            value: option.value,
+            text: option.text.trim(),
+            disabled: option.disabled,
+        })),
+    }));
+    return { listboxes: listboxes, selects: selects };
+}
+"""
+
+# Everything a variant choice visibly changes: price, Add-to-cart state and the
+# values shown on the variant controls
+VARIANT_STATE_JS = """
+() => {
+    const price = document.querySelector('.x-price-primary, [itemprop="price"]');
+    const atc = document.querySelector("#atcBtn_btn, a[href*='addToCart']");
+    const values = Array.from(document.querySelectorAll("button[aria-haspopup='listbox'] .btn__text, select:not([hidden])"))
+        .map((el) => el.value !== undefined && el.tagName === 'SELECT' ? el.value : el.textContent.trim());
+    return [
+        price ? price.textContent.trim() : '',
+        atc ? String(atc.getAttribute('aria-disabled') || atc.disabled || '') : '',
+        values.join('|'),
+    ].join('#');
+}
+"""
+
+# Requests that put an item in the cart: the product page's XHR/fetch call, or
+# the addToCart link that navigates to the cart
+ADD_TO_CART_URL_RE = re.compile(r"addToCart|/cart/(api/)?add\b|/atc\b", re.I)
+ADD_TO_CART_CONFIRM_TIMEOUT_MS = 10000
+# Keys add-to-cart responses have used for the number of items in the cart
+CART_COUNT_KEYS = ("item_count", "itemCount", "cartCount", "cart_count")
+
+# The number on the header's cart badge (eBay hides it at 0); null without a badge
+CART_COUNT_JS = """
+() => {
+    const badge = document.querySelector('#gh-cart-n, .gh-cart__icon');
+    if (!badge) return null;
+    const match = (badge.textContent + ' ' + (badge.getAttribute('aria-label') || '')).match(/\\d+/);
+    return match ? Number(match[0]) : 0;
+}
+"""
+
+# Taken right before the click: the badge count and the page's clock. The
+# resource timing buffer is raised so the add-to-cart request can't be dropped
+# from a full one.
+ADD_TO_CART_BEFORE_JS = f"""
+() => {{
+    performance.setResourceTimingBufferSize(5000);
+    return [({CART_COUNT_JS})(), performance.now()];
+}}
+"""
+
+# Truthy once the badge shows another number, an add-to-cart request sent
+# after `since` has completed, or eBay complains about a missing variant
+ADD_TO_CART_SETTLED_JS = f"""
+([before, since, pattern]) => {{
+    const count = ({CART_COUNT_JS})();
+    if (count !== null && count !== before) return 'badge';
+    const re = new RegExp(pattern, 'i');
+    if (performance.getEntriesByType('resource')
+            .some((entry) => entry.startTime >= since && entry.responseEnd > 0 && re.test(entry.name))) {{
+        return 'request';
+    }}
+    const error = document.querySelector('.x-msku-error:not([hidden])');
+    return error && error.textContent.trim() ? 'variant error' : false;
+}}
+"""
+
+def add_to_cart_result(before, after, response_status=None, response_body=None, on_cart_page: bool = False,
+                       error: str = None, elapsed_ms: float = 0.0) -> dict:
+    """
+    Decide whether an Add-to-cart click made it into the cart.
+
+    :param before: Cart badge count before the click (None without a badge)
+    :param after: Cart badge count after confirmation or timeout
+    :param response_status: Status of the add-to-cart response, if one came back
+    :param response_body: Its JSON body, if any
+    :param on_cart_page: Whether the click navigated to the cart
+    :param error: Problem shown on the page (e.g. a variant still to select)
+    :return: {"confirmed", "via", "cart_count", "previous_count", "status", "elapsed_ms", "error"}
+    """
+    result = {
+        "confirmed": False,
+        "via": None,
+        "cart_count": after,
+        "previous_count": before,
+        "status": response_status,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "error": error,
+    }
+    if isinstance(response_body, dict):
+        count = next((response_body[key] for key in CART_COUNT_KEYS if key in response_body), None)
+        if isinstance(count, int):
+            result["cart_count"] = count
+
+    if response_status is not None:
+        result["via"] = "response"
+        result["confirmed"] = response_status < 400
+        if not result["confirmed"]:
+            result["error"] = error or f"add-to-cart request failed with HTTP {response_status}"
+    elif after is not None and after != before and (before is None or after > before):
+        result["via"] = "badge"
+        result["confirmed"] = True
+    elif on_cart_page:
+        result["via"] = "navigation"
+        result["confirmed"] = True
+    elif not error:
+        result["error"] = "no add-to-cart response and no change of the cart badge"
+    return result
+
+def _is_skipped(label: str) -> bool:
+    return any(keyword in label.lower() for keyword in SKIP_KEYWORDS)
+
+def _choose(valid_options: list, preferred_text: str = None):
+    for option in valid_options:
+        if preferred_text and option["text"] == preferred_text:
+            return option
+    return random.choice(valid_options) if valid_options else None
+
+def plan_variant_selection(variants: dict, preferred: dict = None) -> dict:
+    """
+    Decide which option to pick for every variant control of a discovered
+    variant model. Controls that are hidden, quantity pickers or already
+    chosen are left alone; disabled, placeholder and out-of-stock options are
+    never picked.
+
+    :param preferred: {control label: option text} that worked before; used when still valid
+    :return: {"listboxes": [...], "selects": [...]} with one entry per control to set
+    """
+    plan = {"listboxes": [], "selects": []}
+    preferred = preferred or {}
+    
+    for listbox in variants.get("listboxes", []):
+        if not listbox["visible"] or _is_skipped(listbox["label"]):
+            continue
+        if listbox["current"].lower() != "select" and listbox["current"].strip():
+            continue
+        valid_options = [
+            option for option in listbox["options"]
+            if not option["disabled"] and option["text"]
+            and "select" not in option["text"].lower() and "out of stock" not in option["text"].lower()
+        ]
+        plan["listboxes"].append({
+            "index": listbox["index"],
+            "label": listbox["label"],
+            "controls": listbox["controls"],
+            "options_loaded": bool(listbox["options"]),
+            "choice": _choose(valid_options, preferred.get(listbox["label"])),
+        })
+    
+    for select in variants.get("selects", []):
+        if not select["visible"] or _is_skipped(select["label"]):
+            continue
+        valid_options = [
+            option for option in select["options"]
+            if not option["disabled"] and option["value"] not in ["-1", "0", ""]
+            and option["text"] and "select" not in option["text"].lower()
+        ]
+        if valid_options:
+            plan["selects"].append({
+                "index": select["index"],
+                "label": select["label"],
+                "choice": _choose(valid_options, preferred.get(select["label"])),
+            })
+    
+    return plan
 
 class ProductPage(BasePage):
-    def select_random_variants(self):
-        """Select random variants from both standard selects and custom listboxes"""
+    def discover_variants(self) -> dict:
+        """Read all variant controls and their options in a single evaluation"""
+        return self.page.evaluate(DISCOVER_VARIANTS_JS)
+
+    def select_random_variants(self, variants: dict = None, preferred: dict = None) -> dict:
+        """
+        Select random variants from both standard selects and custom listboxes
+
+        :param preferred: {control label: option text} to pick when still available
+        :return: {control label: option text} of the options that were picked
+        """
+        chosen = {}
         try:
-            self.page.wait_for_load_state("domcontentloaded")
-            self.page.wait_for_timeout(1000)
+            if variants is None:
+                variants = self.discover_variants()
             
-            # Handle custom listbox variants (like size, color selectors)
-            self._select_listbox_variants()
+            plan = plan_variant_selection(variants, preferred)
+            print(f"Variant plan: {len(plan['listboxes'])} listboxes, {len(plan['selects'])} selects to set")
             
-            # Handle standard select dropdowns (if any)
-            self._select_standard_dropdowns()
+            for entry in plan["listboxes"]:
+                text = self._apply_listbox_choice(entry, preferred)
+                if text:
+                    chosen[entry["label"]] = text
+            
+            for entry in plan["selects"]:
+                text = self._apply_select_choice(entry)
+                if text:
+                    chosen[entry["label"]] = text
             
         except Exception as e:
             print(f"Error in select_random_variants: {e}")
+        return chosen
     
-    def _select_listbox_variants(self):
-        """Handle custom eBay listbox components"""
+    def _apply_listbox_choice(self, entry: dict, preferred: dict = None):
+        """Open one custom eBay listbox and click only the planned option; returns the option text"""
+        idx = entry["index"]
+        button = self.page.locator("button[aria-haspopup='listbox']").nth(idx)
         try:
-            # Find all listbox buttons (the custom dropdowns)
-            listbox_buttons = self.page.locator("button[aria-haspopup='listbox']").all()
-            print(f"Found {len(listbox_buttons)} listbox components")
+            if entry["choice"] is None and entry["options_loaded"]:
+                print(f"Listbox {idx}: No valid options")
+                return
+            # Without a controlled listbox there is nothing to pick from; opening it would only leave a popup over the page
+            if not entry["controls"]:
+                print(f"Listbox {idx}: No controlled listbox, skipping")
+                return
             
-            for idx, button in enumerate(listbox_buttons):
-                try:
-                    if not button.is_visible():
-                        continue
-                    
-                    # Get the button text to see what this is for
-                    button_label = button.locator(".btn__label").inner_text() if button.locator(".btn__label").count() > 0 else ""
-                    button_text = button.locator(".btn__text").inner_text() if button.locator(".btn__text").count() > 0 else ""
-                    
-                    print(f"Listbox {idx}: label='{button_label}', current='{button_text}'")
-                    
-                    # Skip if it's quantity
-                    skip_keywords = ['quantity', 'qty', 'amount']
-                    if any(keyword in button_label.lower() for keyword in skip_keywords):
-                        print(f"Listbox {idx}: Skipping quantity selector")
-                        continue
-                    
-                    # Skip if already selected (not "Select")
-                    if button_text.lower() != "select" and button_text.strip():
-                        print(f"Listbox {idx}: Already selected, skipping")
-                        continue
-                    
-                    # Click button to open the listbox
+            before = self.page.evaluate(VARIANT_STATE_JS)
+            button.click()
+            self.wait_for_element(f"#{entry['controls']} div[role='option']", timeout=2000)
+            
+            # Some listboxes only render their options once opened
+            if not entry["options_loaded"]:
+                # Looked up by the listbox it opened: the buttons may have shifted since the first discovery
+                controls = entry["controls"]
+                rediscovered = next(
+                    (listbox for listbox in self.discover_variants()["listboxes"] if listbox["controls"] == controls),
+                    None
+                )
+                if rediscovered is None:
+                    print(f"Listbox {idx}: #{controls} is gone after opening, closing")
                     button.click()
-                    self.page.wait_for_timeout(500)
-                    
-                    # Get the listbox ID from aria-controls
-                    listbox_id = button.get_attribute("aria-controls")
-                    
-                    if listbox_id:
-                        # Find all valid options in the opened listbox
-                        listbox = self.page.locator(f"#{listbox_id}")
-                        options = listbox.locator("div[role='option']").all()
-                        
-                        valid_options = []
-                        for option in options:
-                            # Skip disabled options
-                            is_disabled = option.get_attribute("aria-disabled") == "true"
-                            if is_disabled:
-                                continue
-                            
-                            # Get option text
-                            option_text = option.locator(".listbox__value").inner_text().strip()
-                            
-                            # Skip placeholder and out of stock options
-                            if "select" in option_text.lower() or "out of stock" in option_text.lower():
-                                continue
-                            
-                            if option_text:
-                                valid_options.append({
-                                    'element': option,
-                                    'text': option_text
-                                })
-                        
-                        print(f"Listbox {idx}: Found {len(valid_options)} valid options")
-                        
-                        # Select a random valid option
-                        if valid_options:
-                            chosen = random.choice(valid_options)
-                            print(f"Listbox {idx}: Selecting '{chosen['text']}'")
-                            chosen['element'].click()
-                            self.page.wait_for_timeout(500)
-                        else:
-                            print(f"Listbox {idx}: No valid options, closing")
-                            # Close the listbox by clicking the button again
-                            button.click()
-                            self.page.wait_for_timeout(300)
-                    
-                except Exception as e:
-                    print(f"Listbox {idx}: Error - {e}")
-                    # Try to close any open listbox
-                    try:
-                        self.page.keyboard.press("Escape")
-                    except:
-                        pass
-                    continue
-                    
+                    self.wait_for_element(f"#{controls}", state="hidden", timeout=1000)
+                    return
+                entry = plan_variant_selection({"listboxes": [dict(rediscovered, current="")]}, preferred)["listboxes"][0]
+                if entry["choice"] is None:
+                    print(f"Listbox {idx}: No valid options, closing")
+                    button.click()
+                    self.wait_for_element(f"#{entry['controls']}", state="hidden", timeout=1000)
+                    return
+            
+            print(f"Listbox {idx}: Selecting '{entry['choice']['text']}'")
+            self.page.locator(f"#{entry['controls']} div[role='option']").nth(entry["choice"]["index"]).click()
+            self._wait_for_variant_applied(before, f"listbox {idx}")
+            return entry["choice"]["text"]
+            
         except Exception as e:
-            print(f"Error in _select_listbox_variants: {e}")
+            print(f"Listbox {idx}: Error - {e}")
+            # Try to close any open listbox
+            try:
+                self.page.keyboard.press("Escape")
+            except:
+                pass
     
-    def _select_standard_dropdowns(self):
-        """Handle standard HTML select dropdowns"""
+    def _apply_select_choice(self, entry: dict):
+        """Set one standard <select> to the planned option; returns the option text"""
+        idx = entry["index"]
         try:
-            all_selects = self.page.locator("select:not([hidden])").all()
-            print(f"Found {len(all_selects)} standard select elements")
-            
-            for idx, select in enumerate(all_selects):
+            before = self.page.evaluate(VARIANT_STATE_JS)
+            print(f"Select {idx}: Selecting '{entry['choice']['text']}'")
+            self.page.locator("select:not([hidden])").nth(idx).select_option(value=entry["choice"]["value"])
+            self._wait_for_variant_applied(before, f"select {idx}")
+            return entry["choice"]["text"]
+        except Exception as e:
+            print(f"Select {idx}: Error - {e}")
+    
+    def _wait_for_variant_applied(self, before: str, target: str, timeout: int = 2000) -> bool:
+        """Wait for the price, Add-to-cart state or shown variant values to change"""
+        with self._timed_wait("variant applied", target, timeout) as entry:
+            try:
+                self.page.wait_for_function(
+                    f"(before) => ({VARIANT_STATE_JS})() !== before",
+                    arg=before,
+                    timeout=timeout
+                )
+                entry["satisfied"] = True
+            except PlaywrightTimeoutError:
+                pass
+            return entry["satisfied"]
+
+    def click_and_confirm_add_to_cart(self, click, timeout: int = ADD_TO_CART_CONFIRM_TIMEOUT_MS) -> dict:
+        """
+        Run `click` and wait for the cart to confirm it: the add-to-cart
+        response, the cart badge changing, or a navigation to the cart,
+        whichever comes first.
+
+        :return: See add_to_cart_result
+        """
+        before, since = self.page.evaluate(ADD_TO_CART_BEFORE_JS)
+        responses = []
+        
+        def capture(response):
+            if ADD_TO_CART_URL_RE.search(response.url):
+                responses.append(response)
+        
+        self.page.on("response", capture)
+        start = time.perf_counter()
+        try:
+            click()
+            with self._timed_wait("add to cart confirmed", "add-to-cart response or cart badge", timeout) as entry:
+                settled = None
                 try:
-                    if not select.is_visible():
-                        continue
-                    
-                    aria_label = select.get_attribute("aria-label") or ""
-                    
-                    # Skip quantity selectors
-                    skip_keywords = ['quantity', 'qty', 'amount']
-                    if any(keyword in aria_label.lower() for keyword in skip_keywords):
-                        continue
-                    
-                    # Get valid options
-                    valid_options = []
-                    options = select.locator("option").all()
-                    
-                    for option in options:
-                        if option.get_attribute("disabled"):
-                            continue
-                        value = option.get_attribute("value") or ""
-                        text = option.inner_text().strip()
-                        
-                        if value and value not in ["-1", "0", ""] and text:
-                            if "select" not in text.lower():
-                                valid_options.append({'value': value, 'text': text})
-                    
-                    if valid_options:
-                        chosen = random.choice(valid_options)
-                        print(f"Select {idx}: Selecting '{chosen['text']}'")
-                        select.select_option(value=chosen['value'])
-                        self.page.wait_for_timeout(500)
-                        
+                    settled = self.page.wait_for_function(
+                        ADD_TO_CART_SETTLED_JS,
+                        arg=[before, since, ADD_TO_CART_URL_RE.pattern],
+                        timeout=timeout
+                    ).json_value()
+                except PlaywrightTimeoutError:
+                    pass
                 except Exception as e:
-                    print(f"Select {idx}: Error - {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error in _select_standard_dropdowns: {e}")
+                    # The addToCart link navigates to the cart, taking the evaluation context with it
+                    entry["error"] = str(e).splitlines()[0]
+                    self.page.wait_for_load_state("domcontentloaded")
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                
+                status = body = None
+                if responses:
+                    status = responses[-1].status
+                    try:
+                        body = responses[-1].json()
+                    except Exception:
+                        pass
+                try:
+                    after = self.page.evaluate(CART_COUNT_JS)
+                except Exception:
+                    after = None
+                error = None
+                if settled == "variant error":
+                    try:
+                        error = self.page.locator(".x-msku-error:visible").first.inner_text(timeout=1000).strip()
+                    except Exception:
+                        error = "variant selection error"
+                result = add_to_cart_result(
+                    before, after, status, body,
+                    on_cart_page=self.page.url.startswith(cart_url()),
+                    error=error,
+                    elapsed_ms=elapsed_ms
+                )
+                entry["satisfied"] = result["confirmed"]
+        finally:
+            self.page.remove_listener("response", capture)
+        return result
+
+    def add_to_cart(self, confirm_timeout: int = ADD_TO_CART_CONFIRM_TIMEOUT_MS, item_url: str = None) -> dict:
+        """
+        Add item to cart, selecting variants if needed. Raises unless the cart
+        confirms the item within `confirm_timeout` ms.
 
-    def add_to_cart(self):
-        """Add item to cart, selecting variants if needed"""
+        :param item_url: The listing being added; the page's URL when not given.
+            Outcomes are recorded against it even if the page ends up elsewhere.
+
+        :return: The confirmation (see add_to_cart_result)
+        """
+        # Taken up front: after a failure the page may be on the cart or an error page
+        item_id = item_id_from_url(item_url or self.page.url)
         try:
             print(f"Processing product page: {self.page.url}")
             
             # Wait for page to load
             self.page.wait_for_load_state("domcontentloaded")
-            self.page.wait_for_timeout(1500)
+            self.wait_for_dom_settled(timeout=3000)
+            
+            # What earlier runs learned about this listing
+            known = get_item_cache().get(item_id) or {}
             
             # Check if variants need to be selected
-            listbox_count = self.page.locator("button[aria-haspopup='listbox']").count()
-            select_count = self.page.locator("select:not([hidden])").count()
+            if known.get("has_variants") is False:
+                variants = {"listboxes": [], "selects": []}
+                print(f"Item {item_id} is known to have no variants")
+            else:
+                variants = self.discover_variants()
+            listbox_count = len(variants["listboxes"])
+            select_count = len(variants["selects"])
             print(f"Found {listbox_count} listbox components and {select_count} select elements")
             
             if listbox_count > 0 or select_count > 0:
                 print("Selecting variants...")
-                self.select_random_variants()
+                variant_choices = self.select_random_variants(variants, known.get("variant_choices"))
             else:
+                variant_choices = {}
                 print("No variants to select")
             
-            # Wait a bit for any updates
-            self.page.wait_for_timeout(1000)
-            
             # Try to find and click "Add to cart" button
             print("Looking for 'Add to cart' button...")
             
-            add_to_cart_selectors = [
-                "a:has-text('Add to cart')",
-                "button:has-text('Add to cart')",
-                "a.ux-call-to-action--primary:has-text('Add')",
-                "a[href*='addToCart']",
-                "#atcBtn_btn",
-                "a.btn--primary:has-text('Add')",
-            ]
-            
-            button_clicked = False
-            for selector in add_to_cart_selectors:
-                try:
-                    button = self.page.locator(selector).first
-                    if button.count() > 0 and button.is_visible():
-                        button_text = button.inner_text()
-                        print(f"Found button: text='{button_text}'")
-                        button.click(timeout=5000)
-                        button_clicked = True
-                        print("Successfully clicked 'Add to cart' button")
-                        break
-                except:
-                    continue
-            
-            if not button_clicked:
+            resolution = resolve_selector(
+                self.page,
+                "add_to_cart_button",
+                ADD_TO_CART_SELECTORS,
+                prefer=known.get("add_to_cart_selector")
+            )
+            if not resolution:
                 print("ERROR: Could not find 'Add to cart' button")
                 self.page.screenshot(path="debug_no_add_to_cart.png")
                 raise Exception("Could not find 'Add to cart' button")
             
-            # Wait for cart action to complete
-            self.page.wait_for_timeout(2000)
+            print(f"Found button via '{resolution['selector']}': text='{resolution['text']}'")
+            result = self.click_and_confirm_add_to_cart(
+                lambda: resolution["locator"].click(timeout=5000),
+                timeout=confirm_timeout
+            )
+            if not result["confirmed"]:
+                raise Exception(f"Add to cart not confirmed after {result['elapsed_ms']} ms: {result['error']}")
+            print(f"Add to cart confirmed via {result['via']} in {result['elapsed_ms']} ms "
+                  f"(cart count: {result['cart_count']})")
+            
+            get_item_cache().record_added(
+                item_id,
+                has_variants=listbox_count > 0 or select_count > 0,
+                variant_choices=variant_choices,
+                add_to_cart_selector=resolution["selector"]
+            )
+            return result
             
         except Exception as e:
             print(f"Error adding to cart: {e}")
+            get_item_cache().record_failed(item_id, str(e))
             self.page.screenshot(path=f"error_add_to_cart.png")
             raise
\ No newline at end of file
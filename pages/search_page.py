@@ -1,15 +1,41 @@
-from utils.price_utils import parse_price
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from utils.price_utils import parse_price, parse_prices
 from pages.base_page import BasePage
 import allure
 from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot
+from utils.item_cache import get_item_cache, item_id_from_url
+from utils.site_urls import is_site_url
+from utils.rate_limiter import check_for_challenge, navigate
+
+# Mirrors the per-locator reads in _collect_from_locators: first visible
+# .s-card__price, first span mentioning delivery/shipping, and every /itm/ link.
+EXTRACT_CARDS_JS = """
+(cards) => cards.map((card) => {
+    const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const price = card.querySelector('.s-card__price');
+    const shipping = Array.from(card.querySelectorAll('span'))
+        .find((span) => /delivery|shipping/i.test(span.textContent));
+    const links = Array.from(card.querySelectorAll("a[href*='/itm/']"))
+        .map((a) => ({ href: a.getAttribute('href') }));
+    return {
+        price_text: price && isVisible(price) ? price.innerText : null,
+        shipping_text: shipping ? shipping.innerText : null,
+        links: links,
+    };
+})
+"""
 
 class SearchPage(BasePage):
     def search(self, query: str):
         allure.attach(f"Search query: {query}", name="Query", attachment_type=AttachmentType.TEXT)
         search_bar = self.page.locator("input[aria-label='Search for anything']")
         search_bar.fill(query)
+        self.throttle_navigation()
         self.page.keyboard.press("Enter")
-        self.page.wait_for_load_state("networkidle")
+        self._wait_for_results()
 
     def apply_max_price_filter(self, max_price: int):
         """Apply max price filter using the sidebar filter"""
@@ -27,20 +53,17 @@ class SearchPage(BasePage):
             self.page.keyboard.press("Tab")
             
             # Wait for button to become enabled
-            self.page.wait_for_timeout(500)
+            self.wait_for_element("button[aria-label='Submit price range']:not([disabled])", timeout=2000)
             
             # Click the submit button
             submit_button = self.page.locator("button[aria-label='Submit price range']")
+            self.throttle_navigation()
             submit_button.click()
             
             # Wait for results to update
-            self.page.wait_for_load_state("networkidle")
+            self._wait_for_results()
             
-            allure.attach(
-                self.page.screenshot(full_page=True),
-                name="After Price Filter Applied",
-                attachment_type=AttachmentType.PNG
-            )
+            attach_screenshot(self.page, "After Price Filter Applied", kind="step")
             
         except Exception as e:
             allure.attach(f"Error applying price filter: {str(e)}", 
@@ -52,10 +75,27 @@ class SearchPage(BasePage):
             if "_udhi=" not in current_url:
                 separator = "&" if "?" in current_url else "?"
                 new_url = f"{current_url}{separator}_udhi={max_price}"
+                self.throttle_navigation()
                 self.page.goto(new_url)
-                self.page.wait_for_load_state("networkidle")
+                self._wait_for_results()
+
+    def _wait_for_results(self):
+        """Wait for a results page to render its cards instead of for network idle"""
+        self.page.wait_for_load_state("domcontentloaded")
+        self.wait_for_element("li.s-card", state="attached")
+        check_for_challenge(self.page)
 
-    def collect_item_urls_under_price(self, max_price: int, limit: int):
+    def collect_item_urls_under_price(self, max_price: int, limit: int, bulk: bool = True, prefetch_pages: int = 0):
+        """
+        Collect item URLs whose price + shipping fits the budget.
+
+        :param bulk: Read all cards of a results page in one in-page evaluation.
+            When False (or if the evaluation fails) every card is read through
+            individual locators instead.
+        :param prefetch_pages: After the first page, load this many following
+            result pages at once in background tabs instead of clicking "next"
+            (bulk mode only).
+        """
         urls = []
         page_count = 0
         max_pages = 5
@@ -71,100 +111,32 @@ class SearchPage(BasePage):
                 print(f"No items found on page {page_count}")
                 break
             
-            items = self.page.locator("li.s-card").all()
-            print(f"Found {len(items)} items on page {page_count}")
-
-            for item in items:
-                if len(urls) >= limit:
-                    break
-                
+            if bulk:
                 try:
-                    # Get item price
-                    price_locator = item.locator(".s-card__price").first
-                    
-                    if price_locator.count() > 0 and price_locator.is_visible():
-                        price_text = price_locator.inner_text()
-                        item_price = parse_price(price_text)
-                        
-                        if not item_price:
-                            continue
-                        
-                        # Get shipping cost
-                        shipping_price = 0
-                        try:
-                            shipping_locator = item.locator("span:has-text('delivery'), span:has-text('shipping')").first
-                            if shipping_locator.count() > 0:
-                                shipping_text = shipping_locator.inner_text()
-                                shipping_price = parse_price(shipping_text)
-                                
-                                if not shipping_price:
-                                    if "free" in shipping_text.lower():
-                                        shipping_price = 0
-                                    else:
-                                        shipping_price = 0
-                        except Exception as e:
-                            shipping_price = 0
-                        
-                        # Calculate total price
-                        total_price = item_price + shipping_price
-                        
-                        print(f"Item price: {item_price}, Shipping: {shipping_price}, Total: {total_price}")
-                        
-                        if total_price <= max_price:
-                            # Get the link
-                            all_links = item.locator("a[href*='/itm/']").all()
-                            
-                            for link in all_links:
-                                url = link.get_attribute("href")
-                                
-                                if url and "/itm/" in url:
-                                    if url.startswith("http"):
-                                        clean_url = url.split("?")[0]
-                                        
-                                        if self._is_valid_ebay_url(clean_url) and clean_url not in urls:
-                                            print(f"✓ Adding: {clean_url} (item: {item_price}, shipping: {shipping_price}, total: {total_price})")
-                                            urls.append(clean_url)
-                                            
-                                            collected_items_details.append({
-                                                "url": clean_url,
-                                                "item_price": item_price,
-                                                "shipping_price": shipping_price,
-                                                "total_price": total_price
-                                            })
-                                            break
-                        else:
-                            print(f"✗ Skipping: total price {total_price} exceeds budget {max_price}")
-                            
+                    cards = self._extract_cards()
                 except Exception as e:
-                    print(f"Error processing item: {e}")
-                    continue
+                    print(f"Bulk extraction failed, falling back to locators: {e}")
+                    bulk = False
+
+            if bulk:
+                print(f"Found {len(cards)} items on page {page_count}")
+                self._collect_from_cards(cards, max_price, limit, urls, collected_items_details)
+            else:
+                self._collect_from_locators(max_price, limit, urls, collected_items_details, page_count)
+
+            if prefetch_pages > 0 and bulk and len(urls) < limit:
+                self._collect_prefetched(max_price, limit, urls, collected_items_details,
+                                         first_page=page_count + 1, max_pages=max_pages, window=prefetch_pages)
+                break
 
             # Paging Logic
-            if len(urls) < limit:
-                try:
-                    next_btn = self.page.locator("a.pagination__next")
-                    
-                    if next_btn.count() > 0 and next_btn.is_visible():
-                        is_disabled = next_btn.get_attribute("aria-disabled")
-                        if is_disabled != "true":
-                            print(f"Going to next page...")
-                            next_btn.click()
-                            self.page.wait_for_load_state("networkidle")
-                        else:
-                            print("Next button is disabled")
-                            break
-                    else:
-                        print("No next button found")
-                        break
-                except Exception as e:
-                    print(f"Pagination error: {e}")
-                    break
+            if len(urls) < limit and not self._go_to_next_page():
+                break
         
         print(f"Collected {len(urls)} URLs total")
         
         # Attach collected items details to Allure
-        import json
-        allure.attach(
+        attach(
             json.dumps(collected_items_details, indent=2),
             name="Collected Items Details",
             attachment_type=AttachmentType.JSON
@@ -172,19 +144,271 @@ class SearchPage(BasePage):
         
         return urls
 
+    def iter_qualifying_items(self, max_price: int, limit: int = None, max_pages: int = 5):
+        """
+        Yield the items that fit the budget one by one, as soon as their card
+        is parsed. The next results page is only loaded once the consumer asks
+        for an item beyond the current page, so whatever the consumer does
+        with an item (e.g. start loading it in another tab) overlaps with the
+        rest of the search. Closing the generator stops the search.
+
+        :param limit: Stop after this many items (None = until the results run out)
+        :return: Generator of item details ({"url", "item_price", "shipping_price", ...})
+        """
+        urls = []
+        collected_items_details = []
+        page_count = 0
+        
+        try:
+            while page_count < max_pages:
+                page_count += 1
+                
+                try:
+                    self.page.wait_for_selector("li.s-card", timeout=10000)
+                    cards = self._extract_cards()
+                except Exception as e:
+                    print(f"No items found on page {page_count}: {e}")
+                    return
+                
+                print(f"Found {len(cards)} items on page {page_count}")
+                for details in self._qualifying_cards(cards, max_price, urls):
+                    urls.append(details["url"])
+                    collected_items_details.append(details)
+                    yield details
+                    
+                    if limit and len(urls) >= limit:
+                        return
+                
+                if not self._go_to_next_page():
+                    return
+        finally:
+            print(f"Yielded {len(urls)} items from {page_count} pages")
+            attach(
+                json.dumps(collected_items_details, indent=2),
+                name="Collected Items Details",
+                attachment_type=AttachmentType.JSON
+            )
+
+    def _go_to_next_page(self) -> bool:
+        """Click "next" and wait for the results; False when there is no further page"""
+        try:
+            next_btn = self.page.locator("a.pagination__next")
+            
+            if next_btn.count() > 0 and next_btn.is_visible():
+                is_disabled = next_btn.get_attribute("aria-disabled")
+                if is_disabled != "true":
+                    print(f"Going to next page...")
+                    self.throttle_navigation()
+                    next_btn.click()
+                    self._wait_for_results()
+                    return True
+                print("Next button is disabled")
+            else:
+                print("No next button found")
+        except Exception as e:
+            print(f"Pagination error: {e}")
+        return False
+
+    def _extract_cards(self, page=None) -> list:
+        """Read price, shipping and item links of every result card in one evaluation"""
+        return (page or self.page).eval_on_selector_all("li.s-card", EXTRACT_CARDS_JS)
+
+    def _results_page_url(self, page_number: int) -> str:
+        """Current results URL (query + filters) pointing at another page number"""
+        parts = urlsplit(self.page.url)
+        query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "_pgn"]
+        query.append(("_pgn", str(page_number)))
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def _collect_prefetched(self, max_price: int, limit: int, urls: list, collected_items_details: list,
+                            first_page: int, max_pages: int, window: int):
+        """
+        Load result pages first_page..max_pages in windows of `window` background
+        tabs. Every tab of a window starts loading up front; pages are parsed in
+        order as each one renders, and the rest of the window is closed (which
+        cancels its load) once `limit` items are collected.
+        """
+        context = self.page.context
+        tabs = []
+        
+        try:
+            page_number = first_page
+            while len(urls) < limit and page_number <= max_pages:
+                numbers = list(range(page_number, min(page_number + window, max_pages + 1)))
+                page_number = numbers[-1] + 1
+                
+                while len(tabs) < len(numbers):
+                    tabs.append(context.new_page())
+                
+                for tab, number in zip(tabs, numbers):
+                    print(f"Prefetching page {number}...")
+                    navigate(tab, self._results_page_url(number), wait_until="commit")
+                
+                for tab, number in zip(tabs, numbers):
+                    try:
+                        tab.wait_for_selector("li.s-card", state="attached", timeout=10000)
+                        cards = self._extract_cards(tab)
+                    except Exception as e:
+                        print(f"No items found on page {number}: {e}")
+                        return
+                    
+                    print(f"Found {len(cards)} items on page {number}")
+                    self._collect_from_cards(cards, max_price, limit, urls, collected_items_details)
+                    
+                    if len(urls) >= limit:
+                        break
+        finally:
+            for tab in tabs:
+                try:
+                    tab.close()
+                except Exception:
+                    pass
+
+    def _collect_from_cards(self, cards: list, max_price: int, limit: int, urls: list, collected_items_details: list):
+        """Filter and price cards returned by _extract_cards"""
+        if len(urls) >= limit:
+            return
+        for details in self._qualifying_cards(cards, max_price, urls):
+            urls.append(details["url"])
+            collected_items_details.append(details)
+            if len(urls) >= limit:
+                break
+
+    def _qualifying_cards(self, cards: list, max_price: int, urls: list):
+        """
+        Yield the details of every card returned by _extract_cards whose price
+        + shipping fits the budget. URLs already in `urls` are skipped; the
+        caller appends each yielded URL before asking for the next one.
+        """
+        prices = parse_prices([card.get("price_text") for card in cards])
+        shipping_prices = parse_prices([card.get("shipping_text") for card in cards])
+        
+        for index, card in enumerate(cards):
+            try:
+                item_price = prices.amount(index)
+                if not item_price:
+                    continue
+
+                # "Free delivery in 2-4 days" has numbers that aren't a cost;
+                # cards without a shipping line have no amount
+                shipping_price = 0 if shipping_prices.is_free(index) else shipping_prices.amount(index) or 0
+                total_price = item_price + shipping_price
+
+                print(f"Item price: {item_price}, Shipping: {shipping_price}, Total: {total_price}")
+
+                if total_price > max_price:
+                    print(f"✗ Skipping: total price {total_price} exceeds budget {max_price}")
+                    continue
+
+                details = None
+                for link in card.get("links", []):
+                    url = link.get("href")
+
+                    if url and "/itm/" in url and url.startswith("http"):
+                        clean_url = url.split("?")[0]
+
+                        if self._is_valid_ebay_url(clean_url) and clean_url not in urls:
+                            if self._is_known_bad(clean_url):
+                                continue
+                            print(f"✓ Adding: {clean_url} (item: {item_price}, shipping: {shipping_price}, total: {total_price})")
+                            details = {
+                                "url": clean_url,
+                                "item_price": item_price,
+                                "shipping_price": shipping_price,
+                                "total_price": total_price
+                            }
+                            break
+
+            except Exception as e:
+                print(f"Error processing item: {e}")
+                continue
+
+            if details:
+                yield details
+
+    def _collect_from_locators(self, max_price: int, limit: int, urls: list, collected_items_details: list, page_count: int):
+        """Per-locator fallback: query every card through separate Playwright calls"""
+        items = self.page.locator("li.s-card").all()
+        print(f"Found {len(items)} items on page {page_count}")
+
+        for item in items:
+            if len(urls) >= limit:
+                break
+            
+            try:
+                # Get item price
+                price_locator = item.locator(".s-card__price").first
+                
+                if price_locator.count() > 0 and price_locator.is_visible():
+                    price_text = price_locator.inner_text()
+                    item_price = parse_price(price_text)
+                    
+                    if not item_price:
+                        continue
+                    
+                    # Get shipping cost
+                    shipping_price = 0
+                    try:
+                        shipping_locator = item.locator("span:has-text('delivery'), span:has-text('shipping')").first
+                        if shipping_locator.count() > 0:
+                            # "Free delivery" (even "in 2-4 days") costs nothing
+                            shipping = parse_prices([shipping_locator.inner_text()])
+                            shipping_price = 0 if shipping.is_free(0) else shipping.amount(0) or 0
+                    except Exception as e:
+                        shipping_price = 0
+                    
+                    # Calculate total price
+                    total_price = item_price + shipping_price
+                    
+                    print(f"Item price: {item_price}, Shipping: {shipping_price}, Total: {total_price}")
+                    
+                    if total_price <= max_price:
+                        # Get the link
+                        all_links = item.locator("a[href*='/itm/']").all()
+                        
+                        for link in all_links:
+                            url = link.get_attribute("href")
+                            
+                            if url and "/itm/" in url:
+                                if url.startswith("http"):
+                                    clean_url = url.split("?")[0]
+                                    
+                                    if self._is_valid_ebay_url(clean_url) and clean_url not in urls:
+                                        if self._is_known_bad(clean_url):
+                                            continue
+                                        print(f"✓ Adding: {clean_url} (item: {item_price}, shipping: {shipping_price}, total: {total_price})")
+                                        urls.append(clean_url)
+                                        
+                                        collected_items_details.append({
+                                            "url": clean_url,
+                                            "item_price": item_price,
+                                            "shipping_price": shipping_price,
+                                            "total_price": total_price
+                                        })
+                                        break
+                    else:
+                        print(f"✗ Skipping: total price {total_price} exceeds budget {max_price}")
+                        
+            except Exception as e:
+                print(f"Error processing item: {e}")
+                continue
+
+    def _is_known_bad(self, url: str) -> bool:
+        """Whether earlier runs repeatedly failed to add this item to the cart"""
+        if get_item_cache().is_known_bad(item_id_from_url(url)):
+            print(f"✗ Skipping: {url} failed to add to cart in earlier runs")
+            return True
+        return False
+
     def _is_valid_ebay_url(self, url: str) -> bool:
         """Validate that the URL is a real eBay item URL"""
-        import re
-        
-        if "www.ebay.com" not in url:
+        if not is_site_url(url):
             return False
         
-        match = re.search(r'/itm/(\d+)', url)
-        if not match:
+        item_id = item_id_from_url(url)
+        if not item_id:
             return False
         
-        item_id = match.group(1)
-        
         invalid_ids = ['123456', '000000', '111111', '999999']
         if item_id in invalid_ids:
             return False
@@ -0,0 +1,153 @@
+"""
+Run the test suite split into shards, one pytest process (and so one browser)
+per shard, each writing its own Allure results. Then merge the shards into one
+results directory and summarize the run.
+
+Run from the project root:
+    python -m scripts.run_shards [--shards 4] [--alluredir allure-results] [-- <extra pytest args>]
+    python -m scripts.run_shards --merge-only
+
+Shard i writes to <alluredir>/shard-<i> and logs to <alluredir>/shard-<i>.log.
+The merged results go to <alluredir>, plus shard-summary.json with scenarios
+completed per minute.
+"""
+import os
+import sys
+import json
+import glob
+import fnmatch
+import time
+import shutil
+import argparse
+import subprocess
+
+DEFAULT_TESTS = "tests/test_e2e_flow.py"
+
+# What a run leaves in the results directory, and so what a merge replaces
+MERGED_RESULT_PATTERNS = ("*-result.json", "*-container.json", "*-attachment*")
+
+def shard_dir(alluredir: str, index: int) -> str:
+    return os.path.join(alluredir, f"shard-{index}")
+
+def run_shards(shards: int, alluredir: str, tests: str, pytest_args: list[str]) -> list[dict]:
+    """Start every shard at once and wait for all of them"""
+    os.makedirs(alluredir, exist_ok=True)
+    # Shard directories of an earlier, wider run would otherwise be merged too
+    for stale in glob.glob(os.path.join(alluredir, "shard-*")):
+        if os.path.isdir(stale):
+            shutil.rmtree(stale)
+    processes = []
+    for index in range(shards):
+        command = [
+            sys.executable, "-m", "pytest", tests,
+            "--shard-index", str(index),
+            "--shard-count", str(shards),
+            f"--alluredir={shard_dir(alluredir, index)}",
+            "--clean-alluredir",
+            *pytest_args,
+        ]
+        log = open(os.path.join(alluredir, f"shard-{index}.log"), "w", encoding="utf-8")
+        print(f"Shard {index}: {' '.join(command[1:])}")
+        processes.append({
+            "index": index,
+            "process": subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT),
+            "log": log,
+            "start": time.perf_counter(),
+        })
+
+    shard_runs = []
+    for entry in processes:
+        exit_code = entry["process"].wait()
+        entry["log"].close()
+        shard_runs.append({
+            "shard": entry["index"],
+            "exit_code": exit_code,
+            "duration_s": round(time.perf_counter() - entry["start"], 1),
+        })
+        print(f"Shard {entry['index']} finished with exit code {exit_code}")
+    return shard_runs
+
+def merge_results(alluredir: str) -> list[str]:
+    """
+    Copy every shard's results into `alluredir`. Allure names its files by
+    UUID, so shards never collide. Results, containers and attachments from an
+    earlier run are removed first; anything else (categories.json,
+    environment.properties, executor.json, history/) is kept.
+
+    :return: The shard directories merged
+    """
+    shard_dirs = sorted(glob.glob(os.path.join(alluredir, "shard-*")))
+    shard_dirs = [path for path in shard_dirs if os.path.isdir(path)]
+    for entry in os.listdir(alluredir):
+        path = os.path.join(alluredir, entry)
+        if os.path.isfile(path) and any(fnmatch.fnmatch(entry, pattern) for pattern in MERGED_RESULT_PATTERNS):
+            os.remove(path)
+    for directory in shard_dirs:
+        for name in os.listdir(directory):
+            shutil.copy2(os.path.join(directory, name), os.path.join(alluredir, name))
+    return shard_dirs
+
+def summarize(shard_dirs: list[str], shard_runs: list[dict] = None) -> dict:
+    """Outcome counts and throughput of the merged results"""
+    results = []
+    for directory in shard_dirs:
+        for path in glob.glob(os.path.join(directory, "*-result.json")):
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            result["_shard"] = os.path.basename(directory)
+            results.append(result)
+
+    statuses = {}
+    for result in results:
+        statuses[result.get("status", "unknown")] = statuses.get(result.get("status", "unknown"), 0) + 1
+
+    # Allure times are epoch milliseconds; the run spans the first start to the last stop
+    starts = [result["start"] for result in results if result.get("start")]
+    stops = [result["stop"] for result in results if result.get("stop")]
+    wall_minutes = (max(stops) - min(starts)) / 60000 if starts and stops else 0
+    completed = statuses.get("passed", 0) + statuses.get("failed", 0) + statuses.get("broken", 0)
+
+    per_shard = {}
+    for result in results:
+        shard = per_shard.setdefault(result["_shard"], {"scenarios": 0, "passed": 0, "test_minutes": 0.0})
+        shard["scenarios"] += 1
+        shard["passed"] += result.get("status") == "passed"
+        if result.get("start") and result.get("stop"):
+            shard["test_minutes"] = round(shard["test_minutes"] + (result["stop"] - result["start"]) / 60000, 2)
+
+    return {
+        "scenarios": len(results),
+        "statuses": statuses,
+        "wall_minutes": round(wall_minutes, 2),
+        "scenarios_per_minute": round(completed / wall_minutes, 2) if wall_minutes else None,
+        "shards": per_shard,
+        "shard_runs": shard_runs or [],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Worker processes, each with its own browser")
+    parser.add_argument("--alluredir", default="allure-results")
+    parser.add_argument("--tests", default=DEFAULT_TESTS, help="What each shard runs")
+    parser.add_argument("--merge-only", action="store_true", help="Merge and summarize existing shard results")
+    parser.add_argument("pytest_args", nargs="*", help="Passed to every shard (put them after --)")
+    args = parser.parse_args()
+
+    shard_runs = None
+    if not args.merge_only:
+        shard_runs = run_shards(args.shards, args.alluredir, args.tests, args.pytest_args)
+
+    shard_dirs = merge_results(args.alluredir)
+    summary = summarize(shard_dirs, shard_runs)
+    with open(os.path.join(args.alluredir, "shard-summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"Merged {len(shard_dirs)} shards into {args.alluredir}: {summary['scenarios']} scenarios {summary['statuses']}")
+    print(f"{summary['scenarios_per_minute']} scenarios/minute over {summary['wall_minutes']} minutes")
+    if shard_runs and any(run["exit_code"] not in (0, 5) for run in shard_runs):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
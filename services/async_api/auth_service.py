@@ -0,0 +1,136 @@
+import os
+import allure
+from allure_commons.types import AttachmentType
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from utils.flow_steps import flow_step, step
+from utils.screenshot_helper import attach_screenshot_async
+from utils.site_urls import site_url
+from utils.rate_limiter import get_rate_limiter, host_of
+from services.auth_service import (
+    DEFAULT_CACHE_TTL_HOURS, SESSION_CHECK_PATH, LOGIN_SETTLE_TIMEOUT_MS, RESTORE_STORAGE_JS,
+    load_storage_state, invalidate_storage_state, write_storage_state, session_accepted
+)
+from pages.async_api.login_page import LoginPage
+
+# allure.step / flow_step can't decorate coroutines (the step would close before
+# the coroutine runs), so the async services open their steps inside the body.
+
+async def authenticate_from_data(page, auth_data: dict):
+    with flow_step("Authenticating user from test data"):
+        if not auth_data.get("enabled", False):
+            allure.attach("Authentication skipped (disabled in config)",
+                         name="Auth Status",
+                         attachment_type=AttachmentType.TEXT)
+            return
+
+        await _login_with_cache(
+            page,
+            auth_data["username"],
+            auth_data["password"],
+            use_cache=auth_data.get("cache", True),
+            ttl_hours=auth_data.get("cache_ttl_hours", DEFAULT_CACHE_TTL_HOURS)
+        )
+
+        await attach_screenshot_async(page, "After Login", kind="key")
+
+async def authenticate_from_env(page, use_cache: bool = True, ttl_hours: float = DEFAULT_CACHE_TTL_HOURS):
+    with flow_step("Authenticating user from environment variables"):
+        username = os.getenv("EBAY_USERNAME")
+        password = os.getenv("EBAY_PASSWORD")
+
+        if not username or not password:
+            raise EnvironmentError("Missing EBAY_USERNAME / EBAY_PASSWORD")
+
+        await _login_with_cache(page, username, password, use_cache=use_cache, ttl_hours=ttl_hours)
+
+async def _login_with_cache(page, username: str, password: str, use_cache: bool = True,
+                            ttl_hours: float = DEFAULT_CACHE_TTL_HOURS):
+    """async_api counterpart of services.auth_service._login_with_cache (same cache files)"""
+    if use_cache:
+        with step("Checking cached login state"):
+            state = load_storage_state(username, ttl_hours)
+
+            if state is None:
+                status = "miss"
+            else:
+                await apply_storage_state(page, state)
+                await wait_for_login_settled(page)
+                if await is_session_valid(page):
+                    status = "hit"
+                else:
+                    status = "rejected"
+                    invalidate_storage_state(username)
+                    await page.context.clear_cookies()
+
+            allure.attach(f"Login cache {status} for {username}",
+                         name="Auth Cache",
+                         attachment_type=AttachmentType.TEXT)
+
+            if status == "hit":
+                return
+
+    login_page = LoginPage(page)
+
+    with step("Opening login page"):
+        await login_page.open()
+
+    with step(f"Logging in as {username}"):
+        await login_page.login(username, password)
+
+    await wait_for_login_settled(page)
+
+    # Only cache a login the site actually accepted
+    if use_cache and await is_session_valid(page):
+        await page.wait_for_load_state("domcontentloaded")
+        write_storage_state(username, await page.context.storage_state())
+
+async def apply_storage_state(page, state: dict):
+    """async_api version of services.auth_service.apply_storage_state"""
+    await page.context.add_cookies(state.get("cookies", []))
+    if state.get("origins"):
+        try:
+            await page.evaluate(RESTORE_STORAGE_JS, state["origins"])
+        except Exception as e:
+            print(f"Could not restore Web Storage: {e}")
+
+async def wait_for_login_settled(page, timeout: int = LOGIN_SETTLE_TIMEOUT_MS):
+    """async_api version of services.auth_service.wait_for_login_settled"""
+    try:
+        await page.wait_for_url(lambda url: "/signin" not in url, wait_until="domcontentloaded", timeout=timeout)
+    except PlaywrightTimeoutError:
+        print(f"Login did not leave the sign-in page within {timeout} ms: {page.url}")
+    await page.wait_for_load_state("domcontentloaded")
+
+async def is_session_valid(page) -> bool:
+    """async_api version of services.auth_service.is_session_valid"""
+    try:
+        await get_rate_limiter().acquire_async(host_of(site_url(SESSION_CHECK_PATH)))
+        response = await page.context.request.get(site_url(SESSION_CHECK_PATH), max_redirects=0, timeout=10000)
+    except Exception as e:
+        print(f"Session check failed: {e}")
+        return False
+
+    return session_accepted(response)
+
+async def authenticate(page, auth_config: dict):
+    mode = auth_config.get("mode", "guest")
+
+    allure.attach(f"Authentication mode: {mode}",
+                 name="Auth Mode",
+                 attachment_type=AttachmentType.TEXT)
+
+    if mode == "data":
+        await authenticate_from_data(page, auth_config)
+    elif mode == "env":
+        await authenticate_from_env(
+            page,
+            use_cache=auth_config.get("cache", True),
+            ttl_hours=auth_config.get("cache_ttl_hours", DEFAULT_CACHE_TTL_HOURS)
+        )
+    elif mode == "guest":
+        allure.attach("Proceeding as guest user",
+                     name="Guest Mode",
+                     attachment_type=AttachmentType.TEXT)
+        return
+    else:
+        raise ValueError(f"Unsupported auth mode: {mode}")
@@ -0,0 +1,190 @@
+import asyncio
+import allure
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.flow_steps import flow_step, step
+from utils.rate_limiter import navigate_async
+from utils.screenshot_helper import attach_screenshot_async
+from utils.item_cache import get_item_cache
+from pages.async_api.product_page import ProductPage
+from pages.async_api.cart_page import CartPage
+import json
+
+async def addItemsToCart(page, urls: list[str], concurrency: int = 1, fail_fast: bool = True):
+    """
+    async_api counterpart of services.cart_service.addItemsToCart.
+
+    With concurrency > 1 up to that many items are handled at the same time,
+    each in its own tab of the page's BrowserContext (one shared guest cart).
+    
+    :param page: Playwright page object
+    :param urls: List of product URLs to add
+    :param concurrency: Maximum number of items processed at once
+    :param fail_fast: Cancel the remaining items and re-raise on the first failure
+    """
+    with flow_step("Adding items to cart"):
+        allure.dynamic.title(f"Adding {len(urls)} items to cart")
+        
+        attach(
+            json.dumps({"items_to_add": len(urls), "urls": urls, "concurrency": concurrency}, indent=2),
+            name="Items to Add",
+            attachment_type=AttachmentType.JSON
+        )
+        
+        added_items = []
+        failed_items = []
+        
+        if concurrency <= 1:
+            for idx, url in enumerate(urls, 1):
+                await add_item(page, idx, url, len(urls), added_items, failed_items, fail_fast)
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def worker(idx: int, url: str):
+                async with semaphore:
+                    tab = await page.context.new_page()
+                    try:
+                        await add_item(tab, idx, url, len(urls), added_items, failed_items, fail_fast)
+                    finally:
+                        await tab.close()
+
+            tasks = [asyncio.create_task(worker(idx, url)) for idx, url in enumerate(urls, 1)]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        
+        added_items.sort(key=lambda item: item["index"])
+        failed_items.sort(key=lambda item: item["index"])
+        summary = {
+            "total_items": len(urls),
+            "successfully_added": len(added_items),
+            "failed": len(failed_items),
+            "added_items": added_items,
+            "failed_items": failed_items,
+            "item_cache": dict(get_item_cache().stats)
+        }
+        
+        attach(
+            json.dumps(summary, indent=2),
+            name="Add to Cart Summary",
+            attachment_type=AttachmentType.JSON
+        )
+
+async def add_item(page, idx: int, url: str, total: int, added_items: list, failed_items: list, fail_fast: bool):
+    """Add a single item on `page`, recording the outcome in added_items / failed_items"""
+    product_page = ProductPage(page)
+
+    with flow_step(f"Adding item {idx}/{total}"):
+        try:
+            allure.attach(url, name=f"Item {idx} URL", attachment_type=AttachmentType.TEXT)
+
+            with step(f"Navigating to product page"):
+                await navigate_async(page, url)
+                await page.wait_for_load_state("domcontentloaded")
+
+            await attach_screenshot_async(page, f"Item_{idx}_Product_Page", kind="step")
+
+            with step("Adding item to cart"):
+                try:
+                    confirmation = await product_page.add_to_cart(item_url=url)
+                finally:
+                    product_page.attach_wait_timings(f"Item_{idx}_Wait_Timings")
+
+            await attach_screenshot_async(page, f"Item_{idx}_Added_Confirmation", kind="key")
+
+            added_items.append({
+                "index": idx,
+                "url": url,
+                "status": "success",
+                "confirmed_via": confirmation["via"],
+                "cart_count": confirmation["cart_count"],
+                "confirm_ms": confirmation["elapsed_ms"]
+            })
+
+        except Exception as e:
+            allure.attach(
+                f"Failed to add item {idx}: {str(e)}",
+                name=f"Item_{idx}_Error",
+                attachment_type=AttachmentType.TEXT
+            )
+
+            await attach_screenshot_async(page, f"Item_{idx}_Error_Screenshot", kind="failure")
+
+            failed_items.append({"index": idx, "url": url, "error": str(e)})
+            if fail_fast:
+                raise
+
+async def assertCartTotalNotExceeds(page, budget_per_item: int, items_count: int):
+    """
+    async_api counterpart of services.cart_service.assertCartTotalNotExceeds
+    
+    :param page: Playwright page object
+    :param budget_per_item: Maximum price per item
+    :param items_count: Number of items in cart
+    """
+    with flow_step("Verifying cart total does not exceed budget"):
+        cart_page = CartPage(page)
+        
+        with step("Opening shopping cart"):
+            await cart_page.open()
+        
+        await attach_screenshot_async(page, "Shopping_Cart_Full_View", kind="step")
+        
+        with step("Reading cart contents"):
+            cart = await cart_page.get_cart_model()
+            total = cart["subtotal"]
+        
+        cart_page.attach_wait_timings("Cart Wait Timings")
+        
+        max_allowed = budget_per_item * items_count
+        # Both sides are exact amounts; round away float noise before comparing
+        difference = round(max_allowed - total, 2)
+        
+        verification_data = {
+            "cart_total": f"{total} ILS",
+            "budget_per_item": f"{budget_per_item} ILS",
+            "number_of_items": items_count,
+            "max_allowed_total": f"{max_allowed} ILS",
+            "within_budget": difference >= 0,
+            "difference": f"{difference} ILS" if difference >= 0 else f"{difference} ILS (OVER BUDGET)",
+            "cart_source": cart["source"],
+            "dom_subtotal": cart["dom_subtotal"],
+            "cart_item_count": cart["item_count"],
+            "items_total": cart["items_total"],
+            "shipping_total": cart["shipping_total"],
+            "line_items": cart["items"]
+        }
+        
+        attach(
+            json.dumps(verification_data, indent=2),
+            name="Budget Verification Details",
+            attachment_type=AttachmentType.JSON
+        )
+        
+        await attach_screenshot_async(page, "Final_Cart_Verification", kind="key")
+        
+        # A cart response and the rendered summary must name the same subtotal
+        assert cart["dom_subtotal"] is None or round(cart["dom_subtotal"] - total, 2) == 0, (
+            f"Cart subtotal mismatch: {total} ILS from {cart.get('response_url')}, "
+            f"{cart['dom_subtotal']} ILS on the page"
+        )
+        
+        assert difference >= 0, (
+            f"\n{'='*50}\n"
+            f"BUDGET EXCEEDED!\n"
+            f"{'='*50}\n"
+            f"Cart Total: {total} ILS\n"
+            f"Max Allowed: {max_allowed} ILS ({budget_per_item} ILS × {items_count} items)\n"
+            f"Over Budget By: {-difference} ILS\n"
+            f"{'='*50}"
+        )
+        
+        allure.attach(
+            "✓ Cart total is within budget",
+            name="Verification Result",
+            attachment_type=AttachmentType.TEXT
+        )
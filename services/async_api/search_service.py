@@ -0,0 +1,56 @@
+from pages.async_api.search_page import SearchPage
+import allure
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.flow_steps import flow_step, step
+from utils.screenshot_helper import attach_screenshot_async
+import json
+
+async def searchItemsByNameUnderPrice(page, query: str, max_price: int, limit: int = 5):
+    """
+    async_api counterpart of services.search_service.searchItemsByNameUnderPrice
+    
+    :param query: Search query
+    :param max_price: Maximum price per item (including shipping)
+    :param limit: Number of items to collect
+    :return: List of item URLs
+    """
+    with flow_step("Searching items by name under price"):
+        attach(
+            json.dumps({
+                "query": query,
+                "max_price": max_price,
+                "limit": limit
+            }, indent=2),
+            name="Search Parameters",
+            attachment_type=AttachmentType.JSON
+        )
+        
+        search_page = SearchPage(page)
+
+        with step(f"Searching for '{query}'"):
+            await search_page.search(query)
+            
+        with step(f"Applying max price filter: {max_price} ILS"):
+            await search_page.apply_max_price_filter(max_price)
+        
+        with step(f"Collecting up to {limit} items under {max_price} ILS"):
+            urls = await search_page.collect_item_urls_under_price(
+                max_price=max_price,
+                limit=limit
+            )
+        
+        search_page.attach_wait_timings("Search Wait Timings")
+        
+        attach(
+            json.dumps({
+                "total_items_found": len(urls),
+                "urls": urls
+            }, indent=2),
+            name="Collected Items",
+            attachment_type=AttachmentType.JSON
+        )
+        
+        await attach_screenshot_async(page, "Search Results Page", kind="key")
+        
+        return urls
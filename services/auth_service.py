@@ -1,9 +1,37 @@
 import os
+import json
+import time
+import hashlib
 import allure
 from allure_commons.types import AttachmentType
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from utils.screenshot_helper import attach_screenshot
+from utils.flow_steps import flow_step
+from utils.site_urls import site_url
+from utils.rate_limiter import get_rate_limiter, host_of
 from pages.login_page import LoginPage
 
-@allure.step("Authenticating user from test data")
+AUTH_CACHE_DIR = os.getenv("EBAY_AUTH_CACHE_DIR", ".auth")
+DEFAULT_CACHE_TTL_HOURS = 12
+
+# Signed-in users get this page; signed-out ones are redirected to /signin
+SESSION_CHECK_PATH = "/mye/myebay/summary"
+
+# How long a sign-in (or restored session) gets to leave the /signin pages
+LOGIN_SETTLE_TIMEOUT_MS = 15000
+
+# Restores Web Storage from a storage_state for the page's current origin
+RESTORE_STORAGE_JS = """
+(origins) => {
+    const entry = origins.find((origin) => origin.origin === window.location.origin);
+    if (!entry) return;
+    for (const item of entry.localStorage) {
+        window.localStorage.setItem(item.name, item.value);
+    }
+}
+"""
+
+@flow_step("Authenticating user from test data")
 def authenticate_from_data(page, auth_data: dict):
     if not auth_data.get("enabled", False):
         allure.attach("Authentication skipped (disabled in config)", 
@@ -11,31 +39,55 @@ def authenticate_from_data(page, auth_data: dict):
                      attachment_type=AttachmentType.TEXT)
         return
 
-    login_page = LoginPage(page)
-    
-    with allure.step("Opening login page"):
-        login_page.open()
-    
-    with allure.step(f"Logging in as {auth_data['username']}"):
-        login_page.login(
-            auth_data["username"],
-            auth_data["password"]
-        )
-    
-    allure.attach(
-        page.screenshot(),
-        name="After Login",
-        attachment_type=AttachmentType.PNG
+    _login_with_cache(
+        page,
+        auth_data["username"],
+        auth_data["password"],
+        use_cache=auth_data.get("cache", True),
+        ttl_hours=auth_data.get("cache_ttl_hours", DEFAULT_CACHE_TTL_HOURS)
     )
+    
+    attach_screenshot(page, "After Login", kind="key")
 
-@allure.step("Authenticating user from environment variables")
-def authenticate_from_env(page):
+@flow_step("Authenticating user from environment variables")
+def authenticate_from_env(page, use_cache: bool = True, ttl_hours: float = DEFAULT_CACHE_TTL_HOURS):
     username = os.getenv("EBAY_USERNAME")
     password = os.getenv("EBAY_PASSWORD")
 
     if not username or not password:
         raise EnvironmentError("Missing EBAY_USERNAME / EBAY_PASSWORD")
 
+    _login_with_cache(page, username, password, use_cache=use_cache, ttl_hours=ttl_hours)
+
+def _login_with_cache(page, username: str, password: str, use_cache: bool = True,
+                      ttl_hours: float = DEFAULT_CACHE_TTL_HOURS):
+    """
+    Reuse a cached signed-in storage state when it is still accepted,
+    otherwise sign in through the UI and cache the new state.
+    """
+    if use_cache:
+        with allure.step("Checking cached login state"):
+            state = load_storage_state(username, ttl_hours)
+            
+            if state is None:
+                status = "miss"
+            else:
+                apply_storage_state(page, state)
+                wait_for_login_settled(page)
+                if is_session_valid(page):
+                    status = "hit"
+                else:
+                    status = "rejected"
+                    invalidate_storage_state(username)
+                    page.context.clear_cookies()
+            
+            allure.attach(f"Login cache {status} for {username}",
+                         name="Auth Cache",
+                         attachment_type=AttachmentType.TEXT)
+            
+            if status == "hit":
+                return
+    
     login_page = LoginPage(page)
     
     with allure.step("Opening login page"):
@@ -43,6 +95,111 @@ def authenticate_from_env(page):
     
     with allure.step(f"Logging in as {username}"):
         login_page.login(username, password)
+    
+    wait_for_login_settled(page)
+    
+    # Only cache a login the site actually accepted
+    if use_cache and is_session_valid(page):
+        save_storage_state(page, username)
+
+def storage_state_path(username: str) -> str:
+    """Per-user cache file (the username is hashed so it doesn't leak into file names)"""
+    digest = hashlib.sha256(username.lower().encode("utf-8")).hexdigest()[:16]
+    return os.path.join(AUTH_CACHE_DIR, f"storage_state_{digest}.json")
+
+def save_storage_state(page, username: str):
+    """Save the context's cookies and Web Storage after a successful login"""
+    page.wait_for_load_state("domcontentloaded")
+    write_storage_state(username, page.context.storage_state())
+
+def write_storage_state(username: str, state: dict):
+    """Write `state` to the user's cache file"""
+    os.makedirs(AUTH_CACHE_DIR, exist_ok=True)
+    path = storage_state_path(username)
+    # Written aside and swapped in, so a parallel run never reads half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "saved_at": time.time(),
+            "storage_state": state
+        }, f)
+    os.replace(tmp_path, path)
+
+def load_storage_state(username: str, ttl_hours: float = DEFAULT_CACHE_TTL_HOURS):
+    """
+    Return the cached storage state for `username`, or None when there is no
+    cache file, it is older than the TTL, or all of its cookies have expired.
+
+    The result can also be passed to browser.new_context(storage_state=...).
+    """
+    path = storage_state_path(username)
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    now = time.time()
+    if now - cached.get("saved_at", 0) > ttl_hours * 3600:
+        invalidate_storage_state(username)
+        return None
+    
+    state = cached.get("storage_state") or {}
+    cookies = state.get("cookies", [])
+    # Session cookies have expires == -1
+    if not any(cookie.get("expires", -1) == -1 or cookie["expires"] > now for cookie in cookies):
+        invalidate_storage_state(username)
+        return None
+    
+    return state
+
+def invalidate_storage_state(username: str):
+    try:
+        os.remove(storage_state_path(username))
+    except OSError:
+        pass
+
+def apply_storage_state(page, state: dict):
+    """
+    Load a storage state into the page's already-created context: all cookies,
+    plus Web Storage for the origin the page is on. No init script is added,
+    so a pooled context doesn't carry the login into the next test.
+    """
+    page.context.add_cookies(state.get("cookies", []))
+    if state.get("origins"):
+        try:
+            page.evaluate(RESTORE_STORAGE_JS, state["origins"])
+        except Exception as e:
+            print(f"Could not restore Web Storage: {e}")
+
+def wait_for_login_settled(page, timeout: int = LOGIN_SETTLE_TIMEOUT_MS):
+    """
+    Wait for the sign-in redirects to finish, so the session cookies are set
+    before is_session_valid checks them
+    """
+    try:
+        page.wait_for_url(lambda url: "/signin" not in url, wait_until="domcontentloaded", timeout=timeout)
+    except PlaywrightTimeoutError:
+        # Still on /signin (e.g. a captcha or wrong password); the check will say so
+        print(f"Login did not leave the sign-in page within {timeout} ms: {page.url}")
+    page.wait_for_load_state("domcontentloaded")
+
+def is_session_valid(page) -> bool:
+    """Cheap check through the context's request API - no page is rendered"""
+    try:
+        get_rate_limiter().acquire(host_of(site_url(SESSION_CHECK_PATH)))
+        response = page.context.request.get(site_url(SESSION_CHECK_PATH), max_redirects=0, timeout=10000)
+    except Exception as e:
+        print(f"Session check failed: {e}")
+        return False
+    
+    return session_accepted(response)
+
+def session_accepted(response) -> bool:
+    """Whether the SESSION_CHECK_PATH response is for a signed-in user"""
+    if 300 <= response.status < 400:
+        return "signin" not in response.headers.get("location", "")
+    return response.ok
 
 def authenticate(page, auth_config: dict):
     mode = auth_config.get("mode", "guest")
@@ -54,7 +211,11 @@ def authenticate(page, auth_config: dict):
     if mode == "data":
         authenticate_from_data(page, auth_config)
     elif mode == "env":
-        authenticate_from_env(page)
+        authenticate_from_env(
+            page,
+            use_cache=auth_config.get("cache", True),
+            ttl_hours=auth_config.get("cache_ttl_hours", DEFAULT_CACHE_TTL_HOURS)
+        )
     elif mode == "guest":
         allure.attach("Proceeding as guest user", 
                      name="Guest Mode", 
@@ -1,26 +1,33 @@
 import allure
 from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot
+from utils.flow_steps import flow_step
+from utils.rate_limiter import check_for_challenge, navigate
+from utils.item_cache import get_item_cache
 from pages.product_page import ProductPage
 from pages.cart_page import CartPage
 import json
 
-@allure.step("Adding items to cart")  # ← Fixed: removed {len(urls)}
-def addItemsToCart(page, urls: list[str]):
+@flow_step("Adding items to cart")  # ← Fixed: removed {len(urls)}
+def addItemsToCart(page, urls: list[str], concurrency: int = 1, fail_fast: bool = True):
     """
     Add multiple items to shopping cart
     
     :param page: Playwright page object
     :param urls: List of product URLs to add
+    :param concurrency: Number of product pages loaded at once. Extra tabs are
+        opened in the same BrowserContext, so every item lands in one guest cart.
+    :param fail_fast: Re-raise on the first failed item. When False, failures
+        are recorded in the summary and the remaining items are still added.
     """
     
     # Log the count inside the function instead
     allure.dynamic.title(f"Adding {len(urls)} items to cart")
     
-    product_page = ProductPage(page)
-    
     # Attach items to be added
-    allure.attach(
-        json.dumps({"items_to_add": len(urls), "urls": urls}, indent=2),
+    attach(
+        json.dumps({"items_to_add": len(urls), "urls": urls, "concurrency": concurrency}, indent=2),
         name="Items to Add",
         attachment_type=AttachmentType.JSON
     )
@@ -28,51 +35,11 @@ def addItemsToCart(page, urls: list[str]):
     added_items = []
     failed_items = []
     
-    for idx, url in enumerate(urls, 1):
-        with allure.step(f"Adding item {idx}/{len(urls)}"):
-            try:
-                allure.attach(url, name=f"Item {idx} URL", attachment_type=AttachmentType.TEXT)
-                
-                with allure.step(f"Navigating to product page"):
-                    page.goto(url)
-                    page.wait_for_load_state("domcontentloaded")
-                
-                # Screenshot before adding
-                allure.attach(
-                    page.screenshot(full_page=True),
-                    name=f"Item_{idx}_Product_Page",
-                    attachment_type=AttachmentType.PNG
-                )
-                
-                with allure.step("Adding item to cart"):
-                    product_page.add_to_cart()
-                
-                # Screenshot after adding
-                allure.attach(
-                    page.screenshot(full_page=True),
-                    name=f"Item_{idx}_Added_Confirmation",
-                    attachment_type=AttachmentType.PNG
-                )
-                
-                added_items.append({"index": idx, "url": url, "status": "success"})
-                
-            except Exception as e:
-                error_msg = f"Failed to add item {idx}: {str(e)}"
-                allure.attach(
-                    error_msg,
-                    name=f"Item_{idx}_Error",
-                    attachment_type=AttachmentType.TEXT
-                )
-                
-                # Screenshot on error
-                allure.attach(
-                    page.screenshot(full_page=True),
-                    name=f"Item_{idx}_Error_Screenshot",
-                    attachment_type=AttachmentType.PNG
-                )
-                
-                failed_items.append({"index": idx, "url": url, "error": str(e)})
-                raise  # Re-raise to fail the test
+    if concurrency <= 1:
+        for idx, url in enumerate(urls, 1):
+            add_item(page, idx, url, len(urls), added_items, failed_items, fail_fast)
+    else:
+        _add_items_in_tabs(page, urls, concurrency, added_items, failed_items, fail_fast)
     
     # Summary of additions
     summary = {
@@ -80,16 +47,107 @@ def addItemsToCart(page, urls: list[str]):
         "successfully_added": len(added_items),
         "failed": len(failed_items),
         "added_items": added_items,
-        "failed_items": failed_items
+        "failed_items": failed_items,
+        "item_cache": dict(get_item_cache().stats)
     }
     
-    allure.attach(
+    attach(
         json.dumps(summary, indent=2),
         name="Add to Cart Summary",
         attachment_type=AttachmentType.JSON
     )
 
-@allure.step("Verifying cart total does not exceed budget")
+def _add_items_in_tabs(page, urls: list[str], concurrency: int, added_items: list, failed_items: list, fail_fast: bool):
+    """
+    Process urls in waves of `concurrency` sibling tabs.
+
+    Every tab of a wave starts its navigation before any of them is handled, so
+    the product pages load in parallel while the previous tab is being added.
+    """
+    context = page.context
+    tabs = [page] + [context.new_page() for _ in range(min(concurrency, len(urls)) - 1)]
+    
+    try:
+        for start in range(0, len(urls), len(tabs)):
+            wave = list(zip(tabs, enumerate(urls[start:start + len(tabs)], start + 1)))
+            
+            navigation_errors = {}
+            for tab, (idx, url) in wave:
+                try:
+                    navigate(tab, url, wait_until="commit")
+                except Exception as e:
+                    navigation_errors[idx] = e
+            
+            for tab, (idx, url) in wave:
+                add_item(tab, idx, url, len(urls), added_items, failed_items, fail_fast,
+                         navigation_started=True, navigation_error=navigation_errors.get(idx))
+    finally:
+        for tab in tabs[1:]:
+            try:
+                tab.close()
+            except Exception:
+                pass
+
+def add_item(page, idx: int, url: str, total: int, added_items: list, failed_items: list, fail_fast: bool,
+             navigation_started: bool = False, navigation_error: Exception = None):
+    """
+    Add a single item on `page`, recording the outcome in added_items / failed_items
+
+    :param total: Shown as "item idx/total"; None when the number of items isn't known up front
+    """
+    product_page = ProductPage(page)
+
+    with flow_step(f"Adding item {idx}/{total}" if total else f"Adding item {idx}"):
+        try:
+            allure.attach(url, name=f"Item {idx} URL", attachment_type=AttachmentType.TEXT)
+
+            with allure.step(f"Navigating to product page"):
+                if navigation_error:
+                    raise navigation_error
+                if not navigation_started:
+                    navigate(page, url)
+                page.wait_for_load_state("domcontentloaded")
+                if navigation_started:
+                    # The tab's goto only waited for the commit
+                    check_for_challenge(page)
+
+            # Screenshot before adding
+            attach_screenshot(page, f"Item_{idx}_Product_Page", kind="step")
+
+            with allure.step("Adding item to cart"):
+                try:
+                    confirmation = product_page.add_to_cart(item_url=url)
+                finally:
+                    product_page.attach_wait_timings(f"Item_{idx}_Wait_Timings")
+
+            # Screenshot after adding
+            attach_screenshot(page, f"Item_{idx}_Added_Confirmation", kind="key")
+
+            added_items.append({
+                "index": idx,
+                "url": url,
+                "status": "success",
+                "confirmed_via": confirmation["via"],
+                "cart_count": confirmation["cart_count"],
+                "confirm_ms": confirmation["elapsed_ms"]
+            })
+
+        except Exception as e:
+            error_msg = f"Failed to add item {idx}: {str(e)}"
+            allure.attach(
+                error_msg,
+                name=f"Item_{idx}_Error",
+                attachment_type=AttachmentType.TEXT
+            )
+
+            # Screenshot on error
+            attach_screenshot(page, f"Item_{idx}_Error_Screenshot", kind="failure")
+
+            failed_items.append({"index": idx, "url": url, "error": str(e)})
+            if fail_fast:
+                raise  # Re-raise to fail the test
+
+@flow_step("Verifying cart total does not exceed budget")
 def assertCartTotalNotExceeds(page, budget_per_item: int, items_count: int):
     """
     Verify that cart total is within budget
@@ -104,16 +162,17 @@ def assertCartTotalNotExceeds(page, budget_per_item: int, items_count: int):
         cart_page.open()
     
     # Screenshot of cart
-    allure.attach(
-        page.screenshot(full_page=True),
-        name="Shopping_Cart_Full_View",
-        attachment_type=AttachmentType.PNG
-    )
+    attach_screenshot(page, "Shopping_Cart_Full_View", kind="step")
     
-    with allure.step("Extracting cart total"):
-        total = cart_page.get_total()
+    with allure.step("Reading cart contents"):
+        cart = cart_page.get_cart_model()
+        total = cart["subtotal"]
+    
+    cart_page.attach_wait_timings("Cart Wait Timings")
     
     max_allowed = budget_per_item * items_count
+    # Both sides are exact amounts; round away float noise before comparing
+    difference = round(max_allowed - total, 2)
     
     # Create detailed verification report
     verification_data = {
@@ -121,11 +180,17 @@ def assertCartTotalNotExceeds(page, budget_per_item: int, items_count: int):
         "budget_per_item": f"{budget_per_item} ILS",
         "number_of_items": items_count,
         "max_allowed_total": f"{max_allowed} ILS",
-        "within_budget": total <= max_allowed,
-        "difference": f"{max_allowed - total} ILS" if total <= max_allowed else f"-{total - max_allowed} ILS (OVER BUDGET)"
+        "within_budget": difference >= 0,
+        "difference": f"{difference} ILS" if difference >= 0 else f"{difference} ILS (OVER BUDGET)",
+        "cart_source": cart["source"],
+        "dom_subtotal": cart["dom_subtotal"],
+        "cart_item_count": cart["item_count"],
+        "items_total": cart["items_total"],
+        "shipping_total": cart["shipping_total"],
+        "line_items": cart["items"]
     }
     
-    allure.attach(
+    attach(
         json.dumps(verification_data, indent=2),
         name="Budget Verification Details",
         attachment_type=AttachmentType.JSON
@@ -136,24 +201,26 @@ def assertCartTotalNotExceeds(page, budget_per_item: int, items_count: int):
         f"Cart Total: {total} ILS\n"
         f"Budget Threshold: {max_allowed} ILS\n"
         f"Items: {items_count}\n"
-        f"Status: {'✓ PASS' if total <= max_allowed else '✗ FAIL'}"
+        f"Status: {'✓ PASS' if difference >= 0 else '✗ FAIL'}"
     )
     
     # Attach final verification screenshot
-    allure.attach(
-        page.screenshot(full_page=True),
-        name="Final_Cart_Verification",
-        attachment_type=AttachmentType.PNG
-    )
+    attach_screenshot(page, "Final_Cart_Verification", kind="key")
     
     # Assertion with detailed message
-    assert total <= max_allowed, (
+    # A cart response and the rendered summary must name the same subtotal
+    assert cart["dom_subtotal"] is None or round(cart["dom_subtotal"] - total, 2) == 0, (
+        f"Cart subtotal mismatch: {total} ILS from {cart.get('response_url')}, "
+        f"{cart['dom_subtotal']} ILS on the page"
+    )
+    
+    assert difference >= 0, (
         f"\n{'='*50}\n"
         f"BUDGET EXCEEDED!\n"
         f"{'='*50}\n"
         f"Cart Total: {total} ILS\n"
         f"Max Allowed: {max_allowed} ILS ({budget_per_item} ILS × {items_count} items)\n"
-        f"Over Budget By: {total - max_allowed} ILS\n"
+        f"Over Budget By: {-difference} ILS\n"
         f"{'='*50}"
     )
     
@@ -0,0 +1,118 @@
+from collections import deque
+import allure
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot
+from utils.flow_steps import flow_step
+from utils.rate_limiter import navigate
+from utils.item_cache import get_item_cache
+from pages.search_page import SearchPage
+from services.cart_service import add_item
+import json
+
+# Fewer tabs than this can't load one product page while another is being added
+MIN_PIPELINE_TABS = 2
+
+@flow_step("Searching and adding items to cart")
+def searchAndAddItemsToCart(page, query: str, max_price: int, limit: int = 5, concurrency: int = 2,
+                            fail_fast: bool = True):
+    """
+    Search for items under a specific price and add them to the cart while the
+    search is still running.
+
+    Items are taken from SearchPage.iter_qualifying_items as soon as their card
+    is parsed, and each one starts loading in a cart tab right away, so product
+    pages load while later result pages are still being read. Every tab is in
+    the search page's BrowserContext, so all items land in one guest cart.
+
+    :param query: Search query
+    :param max_price: Maximum price per item (including shipping)
+    :param limit: Number of items to add; the search stops once this many are in the cart
+    :param concurrency: Cart tabs loading product pages at once (at least MIN_PIPELINE_TABS)
+    :param fail_fast: Re-raise on the first failed item. When False, a failed
+        item is replaced by the next search result.
+    :return: URLs of the items added to the cart
+    """
+    attach(
+        json.dumps({
+            "query": query,
+            "max_price": max_price,
+            "limit": limit,
+            "concurrency": concurrency,
+            "fail_fast": fail_fast
+        }, indent=2),
+        name="Search Parameters",
+        attachment_type=AttachmentType.JSON
+    )
+
+    search_page = SearchPage(page)
+
+    with allure.step(f"Searching for '{query}'"):
+        search_page.search(query)
+
+    with allure.step(f"Applying max price filter: {max_price} ILS"):
+        search_page.apply_max_price_filter(max_price)
+
+    added_items = []
+    failed_items = []
+    items = search_page.iter_qualifying_items(max_price)
+    free_tabs = [page.context.new_page() for _ in range(max(MIN_PIPELINE_TABS, concurrency))]
+    all_tabs = list(free_tabs)
+    # (tab, index, url, navigation error) of product pages that are loading
+    loading = deque()
+    found = 0
+
+    try:
+        with allure.step(f"Adding up to {limit} items under {max_price} ILS as they are found"):
+            search_done = False
+            while len(added_items) < limit:
+                # Keep the tabs busy, but never load more items than are still needed
+                while not search_done and free_tabs and len(added_items) + len(loading) < limit:
+                    details = next(items, None)
+                    if details is None:
+                        search_done = True
+                        break
+                    found += 1
+                    tab = free_tabs.pop()
+                    error = None
+                    try:
+                        navigate(tab, details["url"], wait_until="commit")
+                    except Exception as e:
+                        error = e
+                    loading.append((tab, found, details["url"], error))
+
+                if not loading:
+                    break
+
+                tab, idx, url, error = loading.popleft()
+                # idx counts attempts, which go past `limit` when items fail, so no "of n" is shown
+                add_item(tab, idx, url, None, added_items, failed_items, fail_fast,
+                         navigation_started=True, navigation_error=error)
+                free_tabs.append(tab)
+    finally:
+        # Stops the search and cancels product pages that are no longer needed
+        items.close()
+        for tab in all_tabs:
+            try:
+                tab.close()
+            except Exception:
+                pass
+
+    search_page.attach_wait_timings("Search Wait Timings")
+    attach_screenshot(page, "Search Results Page", kind="key")
+
+    urls = [item["url"] for item in added_items]
+    attach(
+        json.dumps({
+            "items_found": found,
+            "successfully_added": len(added_items),
+            "failed": len(failed_items),
+            "added_items": added_items,
+            "failed_items": failed_items,
+            "item_cache": dict(get_item_cache().stats)
+        }, indent=2),
+        name="Add to Cart Summary",
+        attachment_type=AttachmentType.JSON
+    )
+
+    return urls
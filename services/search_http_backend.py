@@ -0,0 +1,90 @@
+import json
+from allure_commons.types import AttachmentType
+from urllib.parse import urlencode
+from lxml import html as lxml_html
+from pages.search_page import SearchPage
+from utils.attachments import attach
+from utils.challenge_detection import is_challenge_page
+from utils.site_urls import site_url
+from utils.rate_limiter import get_rate_limiter, host_of
+
+SEARCH_PATH = "/sch/i.html"
+
+# Same reads as EXTRACT_CARDS_JS in pages/search_page.py, on static HTML
+CARD_XPATH = "//li[contains(concat(' ', normalize-space(@class), ' '), ' s-card ')]"
+PRICE_XPATH = ".//*[contains(concat(' ', normalize-space(@class), ' '), ' s-card__price ')]"
+SHIPPING_XPATH = (
+    ".//span[contains(translate(., 'DELIVERYSHIPPING', 'deliveryshipping'), 'delivery')"
+    " or contains(translate(., 'DELIVERYSHIPPING', 'deliveryshipping'), 'shipping')]"
+)
+LINK_XPATH = ".//a[contains(@href, '/itm/')]/@href"
+
+class SearchChallengeError(Exception):
+    """The HTTP response was a bot check (or otherwise had no readable results) instead of search results"""
+
+def parse_search_results(html: str) -> list:
+    """Parse a results page into the card dicts SearchPage._collect_from_cards expects"""
+    if not html:
+        return []
+    
+    cards = []
+    for card in lxml_html.fromstring(html).xpath(CARD_XPATH):
+        price = card.xpath(PRICE_XPATH)
+        shipping = card.xpath(SHIPPING_XPATH)
+        cards.append({
+            "price_text": price[0].text_content().strip() if price else None,
+            "shipping_text": shipping[0].text_content().strip() if shipping else None,
+            "links": [{"href": str(href)} for href in card.xpath(LINK_XPATH)],
+        })
+    return cards
+
+def search_results_url(query: str, max_price: int, page_number: int) -> str:
+    return f"{site_url(SEARCH_PATH)}?{urlencode({'_nkw': query, '_udhi': max_price, '_pgn': page_number})}"
+
+def collect_item_urls_via_http(page, query: str, max_price: int, limit: int, max_pages: int = 5):
+    """
+    Collect item URLs like SearchPage.collect_item_urls_under_price, but fetch
+    the result pages through the context's APIRequestContext (same cookies as
+    the browser) and parse the HTML without rendering it.
+
+    :raises SearchChallengeError: When a response looks like a challenge page,
+        or the first results page has no cards to parse
+    """
+    # Reuse the page object's pricing and URL validation as-is
+    search_page = SearchPage(page)
+    urls = []
+    collected_items_details = []
+    
+    for page_number in range(1, max_pages + 1):
+        if len(urls) >= limit:
+            break
+        
+        url = search_results_url(query, max_price, page_number)
+        get_rate_limiter().acquire(host_of(url))
+        response = page.context.request.get(url, timeout=15000)
+        body = response.text()
+        
+        if is_challenge_page(response.status, body):
+            get_rate_limiter().report_challenge(host_of(url))
+            raise SearchChallengeError(f"Challenge page on results page {page_number} (HTTP {response.status})")
+        
+        cards = parse_search_results(body)
+        print(f"Found {len(cards)} items on page {page_number} (http)")
+        if not cards:
+            # An empty first page is more likely markup this parser can't read
+            # (or an unrecognised interstitial) than a search with no results
+            if page_number == 1:
+                raise SearchChallengeError(f"No result cards in the HTML of results page 1 (HTTP {response.status})")
+            break
+        
+        search_page._collect_from_cards(cards, max_price, limit, urls, collected_items_details)
+    
+    print(f"Collected {len(urls)} URLs total")
+    
+    attach(
+        json.dumps(collected_items_details, indent=2),
+        name="Collected Items Details",
+        attachment_type=AttachmentType.JSON
+    )
+    
+    return urls
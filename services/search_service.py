@@ -1,30 +1,75 @@
 from pages.search_page import SearchPage
+from services.search_http_backend import collect_item_urls_via_http, SearchChallengeError
 import allure
 from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils.screenshot_helper import attach_screenshot
+from utils.flow_steps import flow_step
 import json
 
-@allure.step("Searching items by name under price")
-def searchItemsByNameUnderPrice(page, query: str, max_price: int, limit: int = 5):
+SEARCH_BACKENDS = ("browser", "http")
+
+@flow_step("Searching items by name under price")
+def searchItemsByNameUnderPrice(page, query: str, max_price: int, limit: int = 5, prefetch_pages: int = 0,
+                                backend: str = "browser"):
     """
     Search for items under a specific price including shipping costs
     
     :param query: Search query
     :param max_price: Maximum price per item (including shipping)
     :param limit: Number of items to collect
+    :param prefetch_pages: Result pages to load in parallel background tabs (0 = click through pages)
+    :param backend: "browser" drives the search UI; "http" fetches and parses the
+        result pages without rendering them, falling back to "browser" when eBay
+        answers with a challenge page
     :return: List of item URLs
     """
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unsupported search backend: {backend}")
     
     # Attach search parameters
-    allure.attach(
+    attach(
         json.dumps({
             "query": query,
             "max_price": max_price,
-            "limit": limit
+            "limit": limit,
+            "prefetch_pages": prefetch_pages,
+            "backend": backend
         }, indent=2),
         name="Search Parameters",
         attachment_type=AttachmentType.JSON
     )
     
+    urls = None
+    
+    if backend == "http":
+        try:
+            with allure.step(f"Collecting up to {limit} items under {max_price} ILS over HTTP"):
+                urls = collect_item_urls_via_http(page, query, max_price, limit)
+        except SearchChallengeError as e:
+            allure.attach(
+                f"{e} - falling back to the browser",
+                name="HTTP Search Fallback",
+                attachment_type=AttachmentType.TEXT
+            )
+            print(f"{e}, falling back to browser search")
+    
+    if urls is None:
+        urls = _search_in_browser(page, query, max_price, limit, prefetch_pages)
+    
+    # Attach collected URLs
+    attach(
+        json.dumps({
+            "total_items_found": len(urls),
+            "urls": urls
+        }, indent=2),
+        name="Collected Items",
+        attachment_type=AttachmentType.JSON
+    )
+    
+    return urls
+
+def _search_in_browser(page, query: str, max_price: int, limit: int, prefetch_pages: int):
     search_page = SearchPage(page)
 
     with allure.step(f"Searching for '{query}'"):
@@ -36,24 +81,13 @@ def searchItemsByNameUnderPrice(page, query: str, max_price: int, limit: int = 5
     with allure.step(f"Collecting up to {limit} items under {max_price} ILS"):
         urls = search_page.collect_item_urls_under_price(
             max_price=max_price,
-            limit=limit
+            limit=limit,
+            prefetch_pages=prefetch_pages
         )
     
-    # Attach collected URLs
-    allure.attach(
-        json.dumps({
-            "total_items_found": len(urls),
-            "urls": urls
-        }, indent=2),
-        name="Collected Items",
-        attachment_type=AttachmentType.JSON
-    )
+    search_page.attach_wait_timings("Search Wait Timings")
     
     # Take screenshot of search results
-    allure.attach(
-        page.screenshot(full_page=True),
-        name="Search Results Page",
-        attachment_type=AttachmentType.PNG
-    )
+    attach_screenshot(page, "Search Results Page", kind="key")
     
-    return urls
\ No newline at end of file
+    return urls
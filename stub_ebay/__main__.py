@@ -0,0 +1,36 @@
+import json
+import time
+import argparse
+from stub_ebay.server import StubEbayServer, DEFAULT_SETTINGS
+
+def parse_setting(text: str):
+    """KEY=VALUE, where VALUE is read as JSON when it parses (numbers, true/false) and as a string otherwise"""
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m stub_ebay", description="Serve the local eBay stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--setting", action="append", default=[], metavar="KEY=VALUE",
+                        help=f"Override a setting ({', '.join(DEFAULT_SETTINGS)})")
+    args = parser.parse_args()
+
+    server = StubEbayServer(args.host, args.port, **dict(parse_setting(s) for s in args.setting))
+    server.start()
+    print(f"Stub eBay on {server.base_url} (cart: {server.cart_url})")
+    print(f"Run the flows against it with EBAY_BASE_URL={server.base_url} EBAY_CART_URL={server.cart_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"Served: {server.stats()}")
+
+if __name__ == "__main__":
+    main()
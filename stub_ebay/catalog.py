@@ -0,0 +1,94 @@
+import random
+
+VARIANT_LABELS = ["Size", "Color", "Style", "Material", "Pattern"]
+VARIANT_VALUES = {
+    "Size": ["US 6", "US 7", "US 8", "US 9", "US 10", "US 11", "US 12", "US 13"],
+    "Color": ["Black", "White", "Red", "Blue", "Green", "Grey", "Brown", "Pink"],
+    "Style": ["Classic", "Sport", "Slim", "Wide", "High", "Low", "Retro", "Trail"],
+    "Material": ["Leather", "Canvas", "Mesh", "Suede", "Knit", "Rubber", "Nylon", "Wool"],
+    "Pattern": ["Solid", "Striped", "Checked", "Camo", "Dotted", "Floral", "Print", "Plain"],
+}
+
+# Item IDs look like real ones (12 digits), which SearchPage._is_valid_ebay_url requires
+FIRST_ITEM_ID = 100000000000
+
+class Catalog:
+    """
+    Deterministic synthetic listings. The same settings always produce the same
+    items, prices and variants, so runs against the stub are comparable.
+    """
+    def __init__(self, catalog_size: int = 200, seed: int = 1, price_min: float = 20, price_max: float = 1500,
+                 range_rate: float = 0.1, free_shipping_rate: float = 0.4, min_variants: int = 0,
+                 max_variants: int = 2, options_per_variant: int = 6, out_of_stock_rate: float = 0.15, **_):
+        self.size = catalog_size
+        self.seed = seed
+        self.price_min = price_min
+        self.price_max = price_max
+        self.range_rate = range_rate
+        self.free_shipping_rate = free_shipping_rate
+        self.max_variants = min(max_variants, len(VARIANT_LABELS))
+        self.min_variants = min(min_variants, self.max_variants)
+        self.options_per_variant = options_per_variant
+        self.out_of_stock_rate = out_of_stock_rate
+        self.items = [self._make_item(n) for n in range(catalog_size)]
+        self._by_id = {item["id"]: item for item in self.items}
+
+    def _make_item(self, n: int) -> dict:
+        rng = random.Random(self.seed * 1_000_003 + n)
+        price = round(rng.uniform(self.price_min, self.price_max), 2)
+
+        labels = rng.sample(VARIANT_LABELS, rng.randint(self.min_variants, self.max_variants))
+        # Only listings shown with a price range change price with the chosen variant
+        is_range = bool(labels) and rng.random() < self.range_rate
+
+        variants = []
+        for label in labels:
+            values = VARIANT_VALUES[label]
+            options = []
+            for index in range(self.options_per_variant):
+                text = values[index % len(values)]
+                if index >= len(values):
+                    text = f"{text} ({index // len(values) + 1})"
+                options.append({
+                    "text": text,
+                    "disabled": rng.random() < self.out_of_stock_rate,
+                    "price_delta": round(rng.uniform(0, price * 0.2), 2) if is_range else 0,
+                })
+            # Keep at least one option buyable
+            if all(option["disabled"] for option in options):
+                options[0]["disabled"] = False
+            variants.append({"label": label, "options": options})
+
+        price_high = None
+        if is_range:
+            price_high = round(price + sum(max(option["price_delta"] for option in variant["options"])
+                                           for variant in variants), 2)
+
+        return {
+            "id": str(FIRST_ITEM_ID + n),
+            "title": f"Stub listing {n} - {', '.join(variant['label'] for variant in variants) or 'one size'}",
+            "price": price,
+            "price_high": price_high if price_high and price_high > price else None,
+            "shipping": 0 if rng.random() < self.free_shipping_rate else round(rng.uniform(5, 60), 2),
+            "variants": variants,
+        }
+
+    def get(self, item_id: str):
+        return self._by_id.get(item_id)
+
+    def search(self, query: str, max_price: float = None) -> list[dict]:
+        """Every item whose (lowest) price is within max_price; the query only changes the order"""
+        offset = sum(map(ord, query or "")) % max(self.size, 1)
+        ordered = self.items[offset:] + self.items[:offset]
+        if max_price is None:
+            return ordered
+        return [item for item in ordered if item["price"] <= max_price]
+
+    def unit_price(self, item: dict, choices: dict) -> float:
+        """Price of an item with the given {label: option text} variant choices"""
+        price = item["price"]
+        for variant in item["variants"]:
+            for option in variant["options"]:
+                if option["text"] == choices.get(variant["label"]):
+                    price += option["price_delta"]
+        return round(price, 2)
@@ -0,0 +1,557 @@
+import json
+import time
+import random
+import threading
+import uuid
+from html import escape
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+from stub_ebay.catalog import Catalog
+
+DEFAULT_SETTINGS = {
+    # Catalog
+    "catalog_size": 200,
+    "seed": 1,
+    "price_min": 20,
+    "price_max": 1500,
+    "range_rate": 0.1,
+    "free_shipping_rate": 0.4,
+    "min_variants": 0,
+    "max_variants": 2,
+    "options_per_variant": 6,
+    "out_of_stock_rate": 0.15,
+    # Pages
+    "cards_per_page": 60,
+    # The cart page fills in its summary from a fetch of /cart/api/summary
+    # (False: the summary is rendered into the page)
+    "cart_api": True,
+    # Every response waits latency_ms plus up to jitter_ms
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    # Share of search/product/cart responses replaced by a 503 or by a bot-check page
+    "failure_rate": 0.0,
+    "challenge_rate": 0.0,
+}
+
+SESSION_COOKIE = "stub_session"
+USER_COOKIE = "stub_user"
+
+def format_price(value: float) -> str:
+    return f"ILS {value:,.2f}"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+header {{ display: flex; gap: 16px; padding: 12px; border-bottom: 1px solid #ddd; }}
+main {{ display: flex; gap: 24px; padding: 16px; }}
+ul.srp-results {{ list-style: none; padding: 0; flex: 1; }}
+li.s-card {{ border-bottom: 1px solid #eee; padding: 8px 0; }}
+.listbox__options[hidden] {{ display: none; }}
+.listbox__options {{ border: 1px solid #ccc; max-height: 240px; overflow: auto; }}
+div[role='option'] {{ padding: 4px 8px; cursor: pointer; }}
+div[role='option'][aria-disabled='true'] {{ color: #aaa; cursor: default; }}
+.ux-overlay[hidden] {{ display: none; }}
+</style></head>
+<body>
+<header>
+  <a href="/" class="gh-logo">stub eBay</a>
+  <form action="/sch/i.html" method="get" id="gh-f">
+    <input type="text" name="_nkw" aria-label="Search for anything" value="{query}">
+    <button type="submit" id="gh-btn">Search</button>
+  </form>
+  <a href="{cart_url}" class="gh-cart">Cart <span id="gh-cart-n" class="gh-cart__icon">{cart_count}</span></a>
+</header>
+{body}
+</body></html>"""
+
+RESULTS_SCRIPT = """
+<script>
+const maxInput = document.querySelector("input[aria-label*='Maximum Value']");
+const submit = document.querySelector("button[aria-label='Submit price range']");
+maxInput.addEventListener('input', () => { submit.disabled = !maxInput.value; });
+</script>"""
+
+PRODUCT_SCRIPT = """
+<script>
+const item = %s;
+const choices = {};
+const price = document.querySelector('.x-price-primary span');
+const format = (value) => 'ILS ' + value.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+const updatePrice = () => {
+    if (!item.price_high) return;
+    if (Object.keys(choices).length < item.variants.length) return;
+    let value = item.price;
+    item.variants.forEach((variant) => {
+        const option = variant.options.find((o) => o.text === choices[variant.label]);
+        value += option ? option.price_delta : 0;
+    });
+    price.textContent = format(value);
+};
+document.querySelectorAll("button[aria-haspopup='listbox']").forEach((button) => {
+    const listbox = document.getElementById(button.getAttribute('aria-controls'));
+    button.addEventListener('click', () => {
+        listbox.hidden = !listbox.hidden;
+        button.setAttribute('aria-expanded', String(!listbox.hidden));
+    });
+    listbox.querySelectorAll("div[role='option']").forEach((option) => {
+        option.addEventListener('click', () => {
+            if (option.getAttribute('aria-disabled') === 'true') return;
+            const text = option.querySelector('.listbox__value').textContent;
+            if (option.dataset.placeholder) return;
+            choices[button.dataset.label] = text;
+            button.querySelector('.btn__text').textContent = text;
+            listbox.querySelectorAll("div[role='option']").forEach((o) => o.setAttribute('aria-selected', 'false'));
+            option.setAttribute('aria-selected', 'true');
+            listbox.hidden = true;
+            button.setAttribute('aria-expanded', 'false');
+            updatePrice();
+        });
+    });
+});
+document.getElementById('atcBtn_btn').addEventListener('click', async (event) => {
+    event.preventDefault();
+    const error = document.querySelector('.x-msku-error');
+    const missing = item.variants.filter((variant) => !choices[variant.label]).map((variant) => variant.label);
+    if (missing.length) {
+        error.textContent = 'Please select a ' + missing.join(', ');
+        error.hidden = false;
+        return;
+    }
+    error.hidden = true;
+    const response = await fetch('/cart/api/add', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ item_id: item.id, variants: choices }),
+    });
+    const cart = await response.json();
+    document.getElementById('gh-cart-n').textContent = String(cart.item_count);
+    document.querySelector('.ux-overlay').hidden = false;
+});
+</script>"""
+
+CART_SCRIPT = """
+<script>
+const price = (value) => 'ILS ' + value.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+fetch('/cart/api/summary', { headers: { 'Accept': 'application/json' } })
+    .then((response) => response.json())
+    .then((cart) => {
+        const summary = document.createElement('aside');
+        summary.className = 'cartsummary';
+        summary.innerHTML =
+            '<div class="cart-summary-line-item"><span>Items (' + cart.item_count + ')</span>' +
+            '<span data-test-id="ITEM_TOTAL">' + price(cart.items_total) + '</span></div>' +
+            '<div class="cart-summary-line-item"><span>Shipping</span>' +
+            '<span data-test-id="SHIPPING">' + price(cart.shipping_total) + '</span></div>' +
+            '<div class="cart-summary-line-item total-row"><span>Subtotal</span>' +
+            '<span class="val-col" data-test-id="SUBTOTAL">' + price(cart.subtotal) + '</span></div>';
+        document.querySelector('main').appendChild(summary);
+    });
+</script>"""
+
+class StubEbayServer:
+    """
+    A local stand-in for the parts of eBay the page objects use: search with
+    price filter and pagination, product pages with listbox variants and an
+    Add-to-cart button, and a cookie-keyed guest cart.
+
+    Settings (see DEFAULT_SETTINGS) control catalog size, cards per page,
+    variants, response latency and injected failures.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **settings):
+        unknown = set(settings) - set(DEFAULT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown stub settings: {', '.join(sorted(unknown))}")
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self.catalog = Catalog(**self.settings)
+        self.carts = {}
+        self.lock = threading.Lock()
+        self.rng = random.Random(self.settings["seed"])
+        self.requests = {}
+        self.injected = {"failures": 0, "challenges": 0}
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def cart_url(self) -> str:
+        return f"{self.base_url}/cart"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-ebay", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "injected": dict(self.injected),
+                "carts": len(self.carts),
+            }
+
+    def _count(self, route: str):
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def _roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def _delay(self):
+        latency = self.settings["latency_ms"]
+        if self.settings["jitter_ms"]:
+            with self.lock:
+                latency += self.rng.uniform(0, self.settings["jitter_ms"])
+        if latency:
+            time.sleep(latency / 1000)
+
+    def _cart(self, session: str) -> list:
+        with self.lock:
+            return self.carts.setdefault(session, [])
+
+    def cart_summary(self, session: str) -> dict:
+        lines = list(self._cart(session))
+        items_total = round(sum(line["price"] * line["quantity"] for line in lines), 2)
+        shipping_total = round(sum(line["shipping"] for line in lines), 2)
+        return {
+            "item_count": sum(line["quantity"] for line in lines),
+            "items": lines,
+            "items_total": items_total,
+            "shipping_total": shipping_total,
+            "subtotal": round(items_total + shipping_total, 2),
+            "currency": "ILS",
+        }
+
+    def add_to_cart(self, session: str, item_id: str, choices: dict):
+        item = self.catalog.get(item_id)
+        if item is None:
+            return None
+        missing = [variant["label"] for variant in item["variants"] if variant["label"] not in choices]
+        if missing:
+            return None
+        cart = self._cart(session)
+        with self.lock:
+            for line in cart:
+                if line["item_id"] == item_id and line["variants"] == choices:
+                    line["quantity"] += 1
+                    break
+            else:
+                cart.append({
+                    "item_id": item_id,
+                    "title": item["title"],
+                    "variants": choices,
+                    "price": self.catalog.unit_price(item, choices),
+                    "shipping": item["shipping"],
+                    "quantity": 1,
+                })
+        return self.cart_summary(session)
+
+    # Markup
+
+    def render_page(self, title: str, body: str, session: str, query: str = "") -> str:
+        return PAGE_TEMPLATE.format(
+            title=escape(title),
+            body=body,
+            query=escape(query),
+            cart_url=self.cart_url,
+            cart_count=self.cart_summary(session)["item_count"],
+        )
+
+    def render_results(self, base: str, query: str, max_price, page_number: int) -> str:
+        per_page = self.settings["cards_per_page"]
+        matches = self.catalog.search(query, max_price)
+        pages = max(1, -(-len(matches) // per_page))
+        page_number = min(max(page_number, 1), pages)
+        cards = []
+        for item in matches[(page_number - 1) * per_page:page_number * per_page]:
+            price = format_price(item["price"])
+            if item["price_high"]:
+                price = f"{price} to {format_price(item['price_high'])}"
+            shipping = "Free delivery" if not item["shipping"] else f"+{format_price(item['shipping'])} delivery"
+            url = f"{base}/itm/{item['id']}?hash=item{item['id'][-6:]}"
+            cards.append(
+                f'<li class="s-card" id="item{item["id"]}">'
+                f'<a href="{url}" class="s-card__image-link"><div class="s-card__image"></div></a>'
+                f'<a href="{url}" class="s-card__title-link"><span class="s-card__title">{escape(item["title"])}</span></a>'
+                f'<div class="s-card__attribute-row"><span class="s-card__price">{price}</span></div>'
+                f'<div class="s-card__attribute-row"><span class="s-card__shipping">{shipping}</span></div>'
+                f'</li>'
+            )
+
+        def page_url(number):
+            params = {"_nkw": query, "_pgn": number}
+            if max_price is not None:
+                params["_udhi"] = max_price
+            return f"{base}/sch/i.html?{urlencode(params)}"
+
+        last = page_number >= pages
+        body = (
+            '<main>'
+            '<aside class="srp-rail"><form action="/sch/i.html" method="get" class="x-price-range">'
+            f'<input type="hidden" name="_nkw" value="{escape(query)}">'
+            f'<input type="text" name="_udhi" aria-label="Maximum Value in ILS" value="{"" if max_price is None else max_price}">'
+            '<button type="submit" aria-label="Submit price range" disabled>Go</button>'
+            '</form></aside>'
+            '<section>'
+            f'<h1 class="srp-controls__count-heading">{len(matches)} results for {escape(query)}</h1>'
+            f'<ul class="srp-results">{"".join(cards)}</ul>'
+            '<nav class="pagination" role="navigation">'
+            f'<a class="pagination__next" href="{page_url(page_number + 1) if not last else "#"}" '
+            f'aria-disabled="{"true" if last else "false"}">Next page</a>'
+            '</nav></section></main>'
+            + RESULTS_SCRIPT
+        )
+        return body
+
+    def render_product(self, item: dict) -> str:
+        price = format_price(item["price"])
+        if item["price_high"]:
+            price = f"{price} to {format_price(item['price_high'])}"
+
+        widgets = []
+        for index, variant in enumerate(item["variants"]):
+            listbox_id = f"x-msku__select-box-{1000 + index}"
+            options = ['<div role="option" aria-disabled="false" data-placeholder="1">'
+                       '<span class="listbox__value">Select</span></div>']
+            for option in variant["options"]:
+                text = option["text"] + (" (Out of stock)" if option["disabled"] else "")
+                options.append(
+                    f'<div role="option" aria-disabled="{"true" if option["disabled"] else "false"}" aria-selected="false">'
+                    f'<span class="listbox__value">{escape(text)}</span></div>'
+                )
+            widgets.append(
+                '<div class="x-msku__box-cont">'
+                f'<button type="button" class="listbox-button__control btn" aria-haspopup="listbox" '
+                f'aria-expanded="false" aria-controls="{listbox_id}" data-label="{escape(variant["label"])}">'
+                f'<span class="btn__cell"><span class="btn__label">{escape(variant["label"])}:</span>'
+                '<span class="btn__text">Select</span></span></button>'
+                f'<div id="{listbox_id}" class="listbox__options" role="listbox" hidden>{"".join(options)}</div>'
+                '</div>'
+            )
+
+        shipping = "Free delivery" if not item["shipping"] else f"{format_price(item['shipping'])} delivery"
+        body = (
+            '<main><section class="x-item">'
+            f'<h1 class="x-item-title__mainTitle"><span>{escape(item["title"])}</span></h1>'
+            f'<div class="x-price-primary"><span class="ux-textspans">{price}</span></div>'
+            f'<div class="ux-labels-values--shipping"><span>{shipping}</span></div>'
+            f'<div class="x-msku-evo">{"".join(widgets)}</div>'
+            '<div class="x-msku-error" role="alert" hidden></div>'
+            '<label>Quantity <select aria-label="Quantity"><option value="1">1</option>'
+            '<option value="2">2</option></select></label>'
+            f'<a id="atcBtn_btn" class="ux-call-to-action fake-btn fake-btn--primary" '
+            f'href="/cart/addToCart?item={item["id"]}"><span class="ux-call-to-action__text">Add to cart</span></a>'
+            '<div class="ux-overlay" role="dialog" hidden><h2>Added to cart</h2>'
+            f'<a href="{self.cart_url}">See in cart</a></div>'
+            '</section></main>'
+            + PRODUCT_SCRIPT % json.dumps(item)
+        )
+        return body
+
+    def render_cart(self, session: str) -> str:
+        summary = self.cart_summary(session)
+        rows = "".join(
+            '<div class="item-container">'
+            f'<a href="/itm/{line["item_id"]}">{escape(line["title"])}</a>'
+            f'<span class="item-variants">{escape(", ".join(f"{k}: {v}" for k, v in line["variants"].items()))}</span>'
+            f'<span class="item-quantity">Qty {line["quantity"]}</span>'
+            f'<span class="item-price">{format_price(line["price"] * line["quantity"])}</span>'
+            '</div>'
+            for line in summary["items"]
+        )
+        if self.settings["cart_api"]:
+            summary_html = ""
+            script = CART_SCRIPT
+        else:
+            summary_html = (
+                '<aside class="cartsummary">'
+                f'<div class="cart-summary-line-item"><span>Items ({summary["item_count"]})</span>'
+                f'<span data-test-id="ITEM_TOTAL">{format_price(summary["items_total"])}</span></div>'
+                f'<div class="cart-summary-line-item"><span>Shipping</span>'
+                f'<span data-test-id="SHIPPING">{format_price(summary["shipping_total"])}</span></div>'
+                '<div class="cart-summary-line-item total-row"><span>Subtotal</span>'
+                f'<span class="val-col" data-test-id="SUBTOTAL">{format_price(summary["subtotal"])}</span></div>'
+                '</aside>'
+            )
+            script = ""
+        return (
+            '<main><section class="cart-bucket">'
+            f'{rows or "<p>You don&apos;t have any items in your cart.</p>"}'
+            '</section>'
+            f'{summary_html}</main>{script}'
+        )
+
+def _make_handler(stub: StubEbayServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _session(self):
+            cookie = SimpleCookie(self.headers.get("Cookie", ""))
+            if SESSION_COOKIE in cookie:
+                return cookie[SESSION_COOKIE].value, False
+            return uuid.uuid4().hex, True
+
+        def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8",
+                  session=None, headers: dict = None):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Cache-Control", "no-store")
+            if session:
+                self.send_header("Set-Cookie", f"{SESSION_COOKIE}={session}; Path=/; SameSite=Lax")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(data)
+
+        def _redirect(self, location: str, session=None, headers: dict = None):
+            self._send(302, "", session=session, headers=dict(headers or {}, Location=location))
+
+        def _inject(self, session, new_session) -> bool:
+            """Replace the response with an injected failure; True when one was sent"""
+            if stub._roll(stub.settings["failure_rate"]):
+                with stub.lock:
+                    stub.injected["failures"] += 1
+                self._send(503, "<h1>Service Unavailable</h1>", session=session if new_session else None)
+                return True
+            if stub._roll(stub.settings["challenge_rate"]):
+                with stub.lock:
+                    stub.injected["challenges"] += 1
+                body = stub.render_page("Security Measure", "<main><h1>Pardon Our Interruption</h1>"
+                                        "<p>Checking your browser before you access eBay.</p></main>", session)
+                self._send(200, body, session=session if new_session else None)
+                return True
+            return False
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            stub._delay()
+            parts = urlsplit(self.path)
+            params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            session, new_session = self._session()
+            set_session = session if new_session else None
+            base = f"http://{self.headers.get('Host') or urlsplit(stub.base_url).netloc}"
+            path = parts.path.rstrip("/") or "/"
+
+            if path == "/":
+                stub._count("home")
+                body = stub.render_page("Electronics, Cars, Fashion, Collectibles & More | eBay",
+                                        '<main><h1>Stub eBay</h1></main>', session)
+                return self._send(200, body, session=set_session)
+
+            if path == "/sch/i.html":
+                stub._count("search")
+                if self._inject(session, new_session):
+                    return
+                query = params.get("_nkw", "")
+                try:
+                    max_price = float(params["_udhi"]) if params.get("_udhi") else None
+                except ValueError:
+                    max_price = None
+                body = stub.render_results(base, query, max_price, int(params.get("_pgn", "1") or 1))
+                return self._send(200, stub.render_page(f"{query} | eBay", body, session, query), session=set_session)
+
+            if path.startswith("/itm/"):
+                stub._count("product")
+                if self._inject(session, new_session):
+                    return
+                item = stub.catalog.get(path[len("/itm/"):].split("/")[0])
+                if item is None:
+                    return self._send(404, stub.render_page("Item not found", "<main><h1>Item not found</h1></main>",
+                                                            session), session=set_session)
+                return self._send(200, stub.render_page(item["title"], stub.render_product(item), session),
+                                  session=set_session)
+
+            if path == "/cart":
+                stub._count("cart")
+                if self._inject(session, new_session):
+                    return
+                return self._send(200, stub.render_page("Shopping cart | eBay", stub.render_cart(session), session),
+                                  session=set_session)
+
+            if path == "/cart/api/summary":
+                stub._count("cart_api")
+                return self._send(200, json.dumps(stub.cart_summary(session)), "application/json",
+                                  session=set_session)
+
+            if path == "/cart/addToCart":
+                # Without JavaScript the button is a plain link; only items without variants can be added this way
+                stub._count("add_to_cart")
+                stub.add_to_cart(session, params.get("item", ""), {})
+                return self._redirect(stub.cart_url, session=set_session)
+
+            if path == "/signin":
+                stub._count("signin")
+                body = ('<main><form method="post" action="/signin">'
+                        '<input id="userid" name="userid"><button type="button" id="signin-continue-btn" '
+                        'onclick="document.getElementById(\'pass\').hidden=false">Continue</button>'
+                        '<input id="pass" name="pass" type="password" hidden>'
+                        '<button id="sgnBt" type="submit">Sign in</button></form></main>')
+                return self._send(200, stub.render_page("Sign in or Register | eBay", body, session),
+                                  session=set_session)
+
+            if path == "/mye/myebay/summary":
+                stub._count("session_check")
+                cookie = SimpleCookie(self.headers.get("Cookie", ""))
+                if USER_COOKIE not in cookie:
+                    return self._redirect(f"{base}/signin", session=set_session)
+                return self._send(200, stub.render_page("My eBay", "<main><h1>My eBay</h1></main>", session),
+                                  session=set_session)
+
+            stub._count("not_found")
+            self._send(404, "<h1>Not found</h1>", session=set_session)
+
+        def do_POST(self):
+            stub._delay()
+            parts = urlsplit(self.path)
+            session, new_session = self._session()
+            set_session = session if new_session else None
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+
+            if parts.path == "/cart/api/add":
+                stub._count("add_to_cart")
+                if stub._roll(stub.settings["failure_rate"]):
+                    with stub.lock:
+                        stub.injected["failures"] += 1
+                    return self._send(503, json.dumps({"error": "unavailable"}), "application/json",
+                                      session=set_session)
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    payload = {}
+                summary = stub.add_to_cart(session, str(payload.get("item_id", "")), payload.get("variants") or {})
+                if summary is None:
+                    return self._send(400, json.dumps({"error": "cannot add item"}), "application/json",
+                                      session=set_session)
+                return self._send(200, json.dumps(summary), "application/json", session=set_session)
+
+            if parts.path == "/signin":
+                stub._count("signin")
+                return self._redirect("/", session=set_session,
+                                      headers={"Set-Cookie": f"{USER_COOKIE}=1; Path=/; SameSite=Lax"})
+
+            stub._count("not_found")
+            self._send(404, "<h1>Not found</h1>", session=set_session)
+
+    return Handler
@@ -0,0 +1,48 @@
+from pages.cart_page import cart_model_from_json
+
+def test_summary_under_a_container_key():
+    model = cart_model_from_json({
+        "cart": {
+            "subtotal": {"value": 55.5},
+            "currency": "ILS",
+            "items": [
+                {"itemId": 1, "title": "Socks", "price": "ILS 20.00", "quantity": 2, "shipping": 5},
+            ],
+        }
+    })
+
+    assert model == {
+        "items": [{"item_id": "1", "title": "Socks", "price": 20.0, "quantity": 2, "shipping": 5.0}],
+        "item_count": 2,
+        "items_total": 40.0,
+        "shipping_total": 5.0,
+        "subtotal": 55.5,
+        "currency": "ILS",
+    }
+
+def test_line_item_totals_are_not_the_cart_subtotal():
+    # Only line items carry a subtotal here, so there is no cart summary
+    assert cart_model_from_json({"items": [{"itemId": 1, "subtotal": 10, "cartTotal": 10}]}) is None
+    assert cart_model_from_json({"cart": {"lineItems": [{"subtotal": 10}]}}) is None
+
+    model = cart_model_from_json({
+        "summary": {"subtotal": 30, "lineItems": [{"itemId": 1, "price": 25, "subtotal": 999}]}
+    })
+    assert model["subtotal"] == 30.0
+
+def test_summary_keys_and_nesting():
+    model = cart_model_from_json({"data": {"summary": {"cartTotal": "ILS 1,234.00", "itemCount": 3}}})
+
+    assert model["subtotal"] == 1234.0
+    assert model["item_count"] == 3
+    assert model["items"] == []
+
+def test_summary_below_max_depth_is_not_found():
+    payload = {"data": {"cart": {"summary": {"subtotal": 10}}}}
+
+    assert cart_model_from_json(payload) is None
+
+def test_not_a_cart_payload():
+    assert cart_model_from_json([{"subtotal": 10}]) is None
+    assert cart_model_from_json(None) is None
+    assert cart_model_from_json({"status": "ok"}) is None
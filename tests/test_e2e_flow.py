@@ -2,9 +2,14 @@ import json
 import pytest
 import allure
 from allure_commons.types import AttachmentType
+from utils.screenshot_helper import attach_screenshot
+from utils.site_urls import base_url
+from utils.rate_limiter import navigate
+from utils.scenarios import TEST_DATA_PATH, load_scenarios, load_test_data
 from services.auth_service import authenticate
 from services.search_service import searchItemsByNameUnderPrice
 from services.cart_service import addItemsToCart, assertCartTotalNotExceeds
+from services.pipeline_service import searchAndAddItemsToCart
 
 @allure.feature("E2E Shopping Flow")
 @allure.story("Complete Purchase Flow")
@@ -19,9 +24,10 @@ This test validates the complete shopping flow on eBay:
 """)
 @allure.severity(allure.severity_level.CRITICAL)
 @pytest.mark.e2e
-def test_full_e2e_flow(page):
+@pytest.mark.parametrize("scenario", load_scenarios(), ids=lambda scenario: scenario["id"])
+def test_full_e2e_flow(page, scenario):
     """
-    Complete E2E test for eBay shopping flow
+    Complete E2E test for eBay shopping flow, once per search scenario of the test data
     
     Test Steps:
     - Load test configuration
@@ -33,59 +39,81 @@ def test_full_e2e_flow(page):
     """
     
     with allure.step("Loading test configuration"):
-        with open("data/test_data.json") as f:
-            data = json.load(f)
+        data = load_test_data(TEST_DATA_PATH)
         
         # Attach test configuration
         allure.attach(
-            json.dumps(data, indent=2),
+            json.dumps({"scenario": scenario, "auth": data["auth"], "cart": data.get("cart", {})}, indent=2),
             name="Test Configuration",
             attachment_type=AttachmentType.JSON
         )
         
         # Set dynamic parameters
-        allure.dynamic.parameter("Search Query", data["search"]["query"])
-        allure.dynamic.parameter("Max Price", f"{data['search']['max_price']} ILS")
-        allure.dynamic.parameter("Items Limit", data["search"]["limit"])
+        allure.dynamic.title(f"End-to-End eBay Shopping Test - {scenario['id']}")
+        allure.dynamic.parameter("scenario", scenario["id"])
+        allure.dynamic.parameter("Search Query", scenario["query"])
+        allure.dynamic.parameter("Max Price", f"{scenario['max_price']} ILS")
+        allure.dynamic.parameter("Items Limit", scenario["limit"])
 
     with allure.step("Navigating to eBay homepage"):
-        page.goto("https://www.ebay.com")
+        navigate(page, base_url())
         page.wait_for_load_state("domcontentloaded")
         
-        allure.attach(
-            page.screenshot(full_page=True),
-            name="eBay Homepage",
-            attachment_type=AttachmentType.PNG
-        )
+        attach_screenshot(page, "eBay Homepage", kind="step")
 
     with allure.step("User Authentication"):
         authenticate(page, data["auth"])
 
-    with allure.step("Searching for products"):
-        urls = searchItemsByNameUnderPrice(
-            page,
-            data["search"]["query"],
-            data["search"]["max_price"],
-            data["search"]["limit"]
-        )
-        
-        allure.dynamic.parameter("Items Found", len(urls))
-        
-        if len(urls) == 0:
-            allure.attach(
-                "No items found matching the criteria",
-                name="Search Result",
-                attachment_type=AttachmentType.TEXT
+    cart_config = data.get("cart", {})
+
+    if cart_config.get("pipeline"):
+        with allure.step("Searching for products and adding them to cart"):
+            urls = searchAndAddItemsToCart(
+                page,
+                scenario["query"],
+                scenario["max_price"],
+                scenario["limit"],
+                concurrency=cart_config.get("concurrency", 1),
+                fail_fast=cart_config.get("fail_fast", True)
             )
-            pytest.skip("No items found under specified price")
+            
+            allure.dynamic.parameter("Items Found", len(urls))
+            
+            if len(urls) == 0:
+                pytest.skip("No items found under specified price")
+    else:
+        with allure.step("Searching for products"):
+            urls = searchItemsByNameUnderPrice(
+                page,
+                scenario["query"],
+                scenario["max_price"],
+                scenario["limit"],
+                prefetch_pages=scenario.get("prefetch_pages", 0),
+                backend=scenario.get("backend", "browser")
+            )
+            
+            allure.dynamic.parameter("Items Found", len(urls))
+            
+            if len(urls) == 0:
+                allure.attach(
+                    "No items found matching the criteria",
+                    name="Search Result",
+                    attachment_type=AttachmentType.TEXT
+                )
+                pytest.skip("No items found under specified price")
 
-    with allure.step(f"Adding {len(urls)} items to cart"):
-        addItemsToCart(page, urls)
+        with allure.step(f"Adding {len(urls)} items to cart"):
+            addItemsToCart(
+                page,
+                urls,
+                concurrency=cart_config.get("concurrency", 1),
+                fail_fast=cart_config.get("fail_fast", True)
+            )
 
     with allure.step("Verifying cart total"):
         assertCartTotalNotExceeds(
             page,
-            data["search"]["max_price"],
+            scenario["max_price"],
             len(urls)
         )
     
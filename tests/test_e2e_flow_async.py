@@ -0,0 +1,96 @@
+import asyncio
+import json
+import pytest
+import allure
+from allure_commons.types import AttachmentType
+from utils.site_urls import base_url
+from utils.attachments import attach
+from utils.flow_steps import quiet_steps
+from utils.rate_limiter import navigate_async
+from services.async_api.auth_service import authenticate
+from services.async_api.search_service import searchItemsByNameUnderPrice
+from services.async_api.cart_service import addItemsToCart, assertCartTotalNotExceeds
+
+async def run_flow(new_async_context, data: dict, search: dict):
+    """
+    Run the full shopping flow for one search in its own context. The flows run
+    side by side, so their steps are attached as one "Flow Steps" list per flow
+    instead of as (interleaved) Allure steps.
+    """
+    with quiet_steps() as steps:
+        try:
+            return await _run_flow(new_async_context, data, search)
+        finally:
+            attach(
+                json.dumps({"query": search["query"], "steps": steps}, indent=2),
+                name=f"Flow Steps: {search['query']}",
+                attachment_type=AttachmentType.JSON
+            )
+
+async def _run_flow(new_async_context, data: dict, search: dict):
+    context = await new_async_context()
+    page = await context.new_page()
+    
+    await navigate_async(page, base_url())
+    await page.wait_for_load_state("domcontentloaded")
+    
+    await authenticate(page, data["auth"])
+    
+    urls = await searchItemsByNameUnderPrice(
+        page,
+        search["query"],
+        search["max_price"],
+        search["limit"]
+    )
+    
+    if len(urls) == 0:
+        return {"query": search["query"], "items": 0, "status": "no items found"}
+    
+    cart_config = data.get("cart", {})
+    await addItemsToCart(
+        page,
+        urls,
+        concurrency=cart_config.get("concurrency", 1),
+        fail_fast=cart_config.get("fail_fast", True)
+    )
+    
+    await assertCartTotalNotExceeds(page, search["max_price"], len(urls))
+    
+    return {"query": search["query"], "items": len(urls), "status": "passed"}
+
+@allure.feature("E2E Shopping Flow")
+@allure.story("Parallel Purchase Flows")
+@allure.title("Parallel eBay Shopping Flows (async API)")
+@allure.severity(allure.severity_level.NORMAL)
+@pytest.mark.e2e
+@pytest.mark.asyncio
+async def test_parallel_e2e_flows(new_async_context):
+    """
+    Run several independent shopping flows concurrently in one event loop
+    and one browser. Every flow gets its own context, so carts don't mix.
+    """
+    with open("data/test_data.json") as f:
+        data = json.load(f)
+    
+    searches = data.get("parallel_searches", [data["search"]])
+    allure.dynamic.parameter("Flows", len(searches))
+    
+    results = await asyncio.gather(
+        *(run_flow(new_async_context, data, search) for search in searches),
+        return_exceptions=True
+    )
+    
+    report = [
+        result if not isinstance(result, BaseException)
+        else {"query": search["query"], "status": "failed", "error": str(result)}
+        for search, result in zip(searches, results)
+    ]
+    allure.attach(
+        json.dumps(report, indent=2),
+        name="Parallel Flow Results",
+        attachment_type=AttachmentType.JSON
+    )
+    
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        raise failures[0]
@@ -0,0 +1,93 @@
+import pytest
+from utils import item_cache
+from utils.item_cache import BAD_AFTER_FAILURES, ItemCache, item_id_from_url
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(item_cache, "time", clock)
+    return clock
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ItemCache(path=str(tmp_path / "items.sqlite"), ttl_hours=1, max_entries=3)
+    yield cache
+    cache.close()
+
+def test_item_id_from_url():
+    assert item_id_from_url("https://www.ebay.com/itm/123456789?hash=x") == "123456789"
+    assert item_id_from_url("https://www.ebay.com/sch/i.html") is None
+    assert item_id_from_url(None) is None
+
+def test_update_merges_facts(cache):
+    cache.update("1", has_variants=True)
+    cache.update("1", add_to_cart_selector="#atc")
+
+    assert cache.get("1") == {"has_variants": True, "add_to_cart_selector": "#atc"}
+    assert cache.get("2") is None
+    assert (cache.stats["hits"], cache.stats["misses"]) == (1, 1)
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.update("1", has_variants=False)
+
+    clock.now += 3599
+    assert cache.get("1") == {"has_variants": False}
+
+    clock.now += 2
+    assert cache.get("1") is None
+    assert cache.stats["expired"] == 1
+    # Expired entries are deleted, not just hidden
+    assert cache.get("1") is None
+    assert cache.stats["misses"] == 1
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    for item_id in ("1", "2", "3"):
+        cache.update(item_id, status="added")
+        clock.now += 1
+
+    # Reading "1" makes "2" the least recently used
+    cache.get("1")
+    clock.now += 1
+    cache.update("4", status="added")
+
+    assert cache.get("2") is None
+    assert [cache.get(item_id) is not None for item_id in ("1", "3", "4")] == [True, True, True]
+    assert cache.stats["evicted"] == 1
+
+def test_failures_make_an_item_known_bad(cache):
+    cache.record_added("1", has_variants=True, variant_choices={"Size": "M"}, add_to_cart_selector="#atc")
+    for _ in range(BAD_AFTER_FAILURES - 1):
+        cache.record_failed("1", "not confirmed")
+    assert not cache.is_known_bad("1")
+
+    cache.record_failed("1", "not confirmed")
+    facts = cache.get("1")
+    assert cache.is_known_bad("1")
+    # The shortcuts that may have caused the failures are forgotten; the variant choices are kept
+    assert (facts["has_variants"], facts["add_to_cart_selector"]) == (None, None)
+    assert facts["variant_choices"] == {"Size": "M"}
+
+    cache.record_added("1", has_variants=True, variant_choices={}, add_to_cart_selector="#atc")
+    assert not cache.is_known_bad("1")
+
+def test_shared_between_instances(cache):
+    cache.update("1", status="added")
+    other = ItemCache(path=cache.path)
+    try:
+        assert other.get("1") == {"status": "added"}
+    finally:
+        other.close()
+
+def test_disabled(tmp_path):
+    cache = ItemCache(path=str(tmp_path / "unused.sqlite"), enabled=False)
+    cache.update("1", status="added")
+
+    assert cache.get("1") is None
+    assert not (tmp_path / "unused.sqlite").exists()
@@ -0,0 +1,68 @@
+import pytest
+from utils.price_utils import BULK_THRESHOLD, parse_price, parse_prices, to_amount
+
+PRICE_TEXTS = [
+    "ILS 25.00",
+    "ILS 10.00 to ILS 25.00",
+    "+ILS 12,50 delivery",
+    "Free delivery",
+    "US $1,234.50",
+    "1 234 €",
+    None,
+    "",
+]
+
+@pytest.mark.parametrize("token, expected", [
+    ("25.00", 25.0),
+    ("1,234.50", 1234.5),
+    ("1.234,50", 1234.5),
+    ("12,50", 12.5),
+    ("1 234", 1234.0),
+    ("1.234.567", 1234567.0),
+    # A lone separator followed by exactly three digits groups thousands
+    ("1.234", 1234.0),
+    ("2,500", 2500.0),
+])
+def test_to_amount_auto(token, expected):
+    assert to_amount(token) == expected
+
+def test_to_amount_forced_decimal_separator():
+    assert to_amount("1.234", decimal=".") == 1.234
+    assert to_amount("1,234", decimal=",") == 1.234
+    assert to_amount("1.234,5", decimal=",") == 1234.5
+
+def test_to_amount_not_a_number():
+    assert to_amount("..") is None
+
+def test_parse_prices_entries():
+    prices = parse_prices(PRICE_TEXTS)
+
+    assert list(prices) == [
+        (25.0, "ILS", False, False),
+        (10.0, "ILS", True, False),
+        (12.5, "ILS", False, False),
+        (None, None, False, True),
+        (1234.5, "USD", False, False),
+        (1234.0, "EUR", False, False),
+        (None, None, False, False),
+        (None, None, False, False),
+    ]
+
+def test_free_delivery_has_no_amount_but_is_free():
+    # Callers count it as 0 shipping; it must not read as "no shipping text"
+    prices = parse_prices(["Free delivery", "Free International Shipping", "+ILS 0.00 delivery"])
+
+    assert [prices.is_free(index) for index in range(3)] == [True, True, False]
+    assert prices.amount(0) is None
+    assert prices.amount(2) == 0.0
+
+def test_bulk_path_matches_per_string_path():
+    texts = PRICE_TEXTS * (BULK_THRESHOLD // len(PRICE_TEXTS) + 1)
+    assert len(texts) >= BULK_THRESHOLD
+
+    assert list(parse_prices(texts)) == list(parse_prices(PRICE_TEXTS)) * (len(texts) // len(PRICE_TEXTS))
+
+def test_parse_price_first_amount():
+    assert parse_price("ILS 1,234.50 each, was ILS 2,000.00") == 1234.5
+    assert parse_price("no price") is None
+    assert parse_price(None) is None
@@ -0,0 +1,107 @@
+import types
+import asyncio
+import pytest
+from utils import rate_limiter
+from utils.rate_limiter import RateLimiter, host_of
+
+HOST = "www.ebay.com"
+
+class Clock:
+    """Stands in for the limiter's time module, so the bucket can be tested without waiting"""
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return RateLimiter(rate=2.0, burst=3, state_dir=str(tmp_path))
+
+def test_burst_then_rate(limiter, clock):
+    assert [limiter.acquire(HOST) for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    # The bucket is empty: the next token comes after 1 / rate seconds
+    assert limiter.acquire(HOST) == pytest.approx(0.5)
+
+    clock.now += 10
+    # Refills up to the burst, not beyond
+    assert [limiter.acquire(HOST) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire(HOST) == pytest.approx(0.5)
+
+def test_hosts_have_their_own_buckets(limiter):
+    for _ in range(3):
+        limiter.acquire(HOST)
+
+    assert limiter.acquire("127.0.0.1:8765") == 0.0
+
+def test_bucket_is_shared_through_the_state_dir(tmp_path, clock):
+    first = RateLimiter(rate=1.0, burst=2, state_dir=str(tmp_path))
+    second = RateLimiter(rate=1.0, burst=2, state_dir=str(tmp_path))
+
+    first.acquire(HOST)
+    first.acquire(HOST)
+
+    assert second.acquire(HOST) == pytest.approx(1.0)
+
+def test_challenge_backs_off_and_recovers(limiter, clock):
+    limiter.report_challenge(HOST)
+
+    # Level 1: a PENALTY_S pause, then half the rate
+    assert limiter.acquire(HOST) == pytest.approx(rate_limiter.PENALTY_S)
+    assert limiter.acquire(HOST) == pytest.approx(1.0)
+    assert limiter.report()[HOST]["backoff_level"] == 1
+
+    limiter.report_challenge(HOST)
+    assert limiter.acquire(HOST) == pytest.approx(rate_limiter.PENALTY_S * 2)
+
+    # One level is dropped per quiet RECOVERY_S
+    clock.now += 2 * rate_limiter.RECOVERY_S + 1
+    for _ in range(3):
+        limiter.acquire(HOST)
+    assert limiter.acquire(HOST) == pytest.approx(0.5)
+
+def test_report(limiter, clock):
+    for _ in range(5):
+        limiter.acquire(HOST)
+
+    report = limiter.report()[HOST]
+    assert report["navigations"] == 5
+    assert report["configured_rate_per_s"] == 2.0
+    assert report["challenges"] == 0
+    assert report["throttled_ms"] == pytest.approx(1000.0)
+
+def test_acquire_async_waits_like_acquire(limiter, clock, monkeypatch):
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        clock.sleep(seconds)
+
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(sleep=fake_sleep, to_thread=asyncio.to_thread))
+
+    async def take(count):
+        return [await limiter.acquire_async(HOST) for _ in range(count)]
+
+    assert asyncio.run(take(4)) == [0.0, 0.0, 0.0, pytest.approx(0.5)]
+    assert waits == [pytest.approx(0.5)]
+
+def test_disabled(tmp_path):
+    limiter = RateLimiter(rate=0, state_dir=str(tmp_path / "unused"))
+
+    assert not limiter.enabled
+    assert limiter.acquire(HOST) == 0.0
+    assert not (tmp_path / "unused").exists()
+
+def test_host_of():
+    assert host_of("https://www.ebay.com/sch/i.html?_nkw=x") == "www.ebay.com"
+    assert host_of("http://127.0.0.1:8765/cart") == "127.0.0.1:8765"
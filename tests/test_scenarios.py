@@ -0,0 +1,59 @@
+import pytest
+from utils.scenarios import expand_scenarios, load_scenarios, scenario_id, shard
+
+BASE = {"query": "shoes", "max_price": 1000, "limit": 5, "backend": "browser"}
+
+def test_search_block_alone():
+    assert expand_scenarios({"search": BASE}) == [dict(BASE, id="shoes-1000-x5")]
+
+def test_scenarios_override_the_search_block():
+    scenarios = expand_scenarios({
+        "search": BASE,
+        "scenarios": [{"query": "hat"}, {"max_price": 200, "backend": "http"}],
+    })
+
+    assert scenarios == [
+        dict(BASE, query="hat", id="hat-1000-x5"),
+        dict(BASE, max_price=200, backend="http", id="shoes-200-x5"),
+    ]
+
+def test_matrix_combinations():
+    scenarios = expand_scenarios({
+        "search": BASE,
+        "scenario_matrix": {"query": ["shoes", "red socks"], "max_price": [500, 1000], "limit": 2},
+    })
+
+    assert [scenario["id"] for scenario in scenarios] == [
+        "shoes-500-x2", "shoes-1000-x2", "red-socks-500-x2", "red-socks-1000-x2",
+    ]
+    assert all(scenario["backend"] == "browser" for scenario in scenarios)
+
+def test_duplicate_ids_are_numbered():
+    scenarios = expand_scenarios({
+        "search": BASE,
+        "scenarios": [{}, {"backend": "http"}, {"id": "custom"}, {"id": "custom"}],
+    })
+
+    assert [scenario["id"] for scenario in scenarios] == ["shoes-1000-x5", "shoes-1000-x5-2", "custom", "custom-2"]
+
+def test_scenario_id_is_safe_for_test_ids():
+    assert scenario_id({"query": "nike air/max 90", "max_price": 99.5, "limit": 3}) == "nike-air-max-90-99.5-x3"
+
+def test_repo_test_data_expands():
+    scenarios = load_scenarios()
+
+    assert scenarios
+    assert len({scenario["id"] for scenario in scenarios}) == len(scenarios)
+
+def test_shards_cover_every_item_once():
+    items = list(range(10))
+    shards = [shard(items, index, 3) for index in range(3)]
+
+    assert shards == [[0, 3, 6, 9], [1, 4, 7], [2, 5, 8]]
+    assert sorted(sum(shards, [])) == items
+
+def test_single_shard_and_bad_index():
+    assert shard([1, 2], 0, 1) == [1, 2]
+    assert shard([1, 2], 5, 0) == [1, 2]
+    with pytest.raises(ValueError):
+        shard([1, 2], 3, 3)
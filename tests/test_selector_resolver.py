@@ -0,0 +1,104 @@
+import json
+import pytest
+from utils import selector_resolver
+from utils.selector_resolver import SelectorResolver, resolve, to_query
+
+CANDIDATES = ["#a", "#b", "#c"]
+
+@pytest.fixture
+def resolver(tmp_path, monkeypatch):
+    resolver = SelectorResolver(path=str(tmp_path / "selector_stats.json"))
+    monkeypatch.setattr(selector_resolver, "_resolver", resolver)
+    return resolver
+
+class FakeLocator:
+    def __init__(self, selector, position=None):
+        self.selector = selector
+        self.position = position
+
+    @property
+    def first(self):
+        return FakeLocator(self.selector, "first")
+
+    @property
+    def last(self):
+        return FakeLocator(self.selector, "last")
+
+class FakePage:
+    """Answers RESOLVE_JS with canned per-selector results"""
+    def __init__(self, results: dict):
+        self.results = results
+        self.queries = []
+
+    def evaluate(self, script, arg):
+        queries, pick, require_visible = arg
+        self.queries.append(queries)
+        return [self.results.get(query["css"], {"matched": False}) for query in queries]
+
+    def locator(self, selector):
+        return FakeLocator(selector)
+
+def test_to_query():
+    assert to_query("button:has-text('Add to cart')") == {"css": "button", "text": "Add to cart"}
+    assert to_query(':has-text("Buy")') == {"css": "*", "text": "Buy"}
+    # Only a trailing :has-text() can be split off
+    assert to_query("a:has-text('x') span") == {"css": "a:has-text('x') span", "text": None}
+    assert to_query("#cart") == {"css": "#cart", "text": None}
+
+def test_unseen_candidates_keep_declared_order(resolver):
+    assert resolver.rank("button", CANDIDATES) == CANDIDATES
+
+def test_rank_by_success_rate(resolver):
+    for _ in range(3):
+        resolver.record("button", ["#a", "#b", "#c"], [False, True, False], chosen="#b")
+
+    assert resolver.rank("button", CANDIDATES) == ["#b", "#a", "#c"]
+    # Stats are per list name
+    assert resolver.rank("other", CANDIDATES) == CANDIDATES
+
+def test_prefer_goes_first(resolver):
+    resolver.record("button", CANDIDATES, [False, True, False], chosen="#b")
+
+    assert resolver.rank("button", CANDIDATES, prefer="#c") == ["#c", "#b", "#a"]
+    # A preference that isn't a candidate is ignored
+    assert resolver.rank("button", CANDIDATES, prefer="#z") == ["#b", "#a", "#c"]
+
+def test_flush_merges_with_counts_written_meanwhile(resolver, tmp_path):
+    resolver.record("button", ["#a", "#b"], [True, False], chosen="#a")
+
+    # Another run flushed after this resolver loaded the file
+    other = SelectorResolver(path=resolver.path)
+    other.record("button", ["#a", "#b"], [True, True], chosen="#a")
+    other.flush()
+
+    resolver.flush()
+
+    with open(resolver.path, encoding="utf-8") as f:
+        assert json.load(f) == {"button": {"#a": {"hits": 2, "misses": 0}, "#b": {"hits": 1, "misses": 1}}}
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # Nothing pending: a second flush doesn't count the same resolutions again
+    resolver.flush()
+    assert SelectorResolver(path=resolver.path).stats["button"]["#a"] == {"hits": 2, "misses": 0}
+
+def test_resolve_takes_first_accepted_match_in_rank_order(resolver):
+    page = FakePage({
+        "#a": {"matched": True, "text": "no price"},
+        "#b": {"matched": True, "text": "ILS 10.00"},
+        "#c": {"matched": True, "text": "ILS 12.00"},
+    })
+
+    resolution = resolve(page, "total", CANDIDATES, pick="last", accept=lambda text: "ILS" in text)
+
+    assert resolution["selector"] == "#b"
+    assert resolution["text"] == "ILS 10.00"
+    assert (resolution["locator"].selector, resolution["locator"].position) == ("#b", "last")
+    # One page query for all candidates
+    assert len(page.queries) == 1
+    # The rejected match counts as a miss, so #b is tried first next time
+    assert resolver.rank("total", CANDIDATES) == ["#b", "#c", "#a"]
+    assert resolver.take_resolutions()[0]["position"] == 1
+
+def test_resolve_without_a_match(resolver):
+    assert resolve(FakePage({}), "total", CANDIDATES) is None
+    assert resolver.take_resolutions()[0]["chosen"] is None
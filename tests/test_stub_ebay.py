@@ -0,0 +1,144 @@
+import json
+import http.client
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+import pytest
+from pages.cart_page import cart_model_from_json
+from services.auth_service import SESSION_CHECK_PATH, session_accepted
+from services.search_http_backend import parse_search_results
+from stub_ebay.catalog import Catalog
+from stub_ebay.server import StubEbayServer
+from utils.challenge_detection import is_challenge_page
+from utils.item_cache import item_id_from_url
+from utils.price_utils import parse_prices
+
+MAX_PRICE = 500
+CARDS_PER_PAGE = 20
+
+@pytest.fixture(scope="module")
+def stub():
+    server = StubEbayServer(catalog_size=120, cards_per_page=CARDS_PER_PAGE)
+    server.start()
+    yield server
+    server.stop()
+
+def request(stub, method: str, path: str, payload=None, cookie: str = None):
+    """(response, body text, session cookie) without following redirects"""
+    connection = http.client.HTTPConnection(urlsplit(stub.base_url).netloc, timeout=10)
+    headers = {"Cookie": cookie} if cookie else {}
+    body = None
+    if payload is not None:
+        body = json.dumps(payload)
+        headers["Content-Type"] = "application/json"
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        text = response.read().decode("utf-8")
+    finally:
+        connection.close()
+    set_cookie = response.getheader("Set-Cookie")
+    return response, text, set_cookie.split(";")[0] if set_cookie else cookie
+
+def test_catalog_is_deterministic():
+    first, second = Catalog(catalog_size=50, seed=3), Catalog(catalog_size=50, seed=3)
+
+    assert first.items == second.items
+    assert first.items != Catalog(catalog_size=50, seed=4).items
+
+def test_catalog_search_filters_by_lowest_price():
+    catalog = Catalog(catalog_size=200)
+    matches = catalog.search("shoes", MAX_PRICE)
+
+    assert matches and all(item["price"] <= MAX_PRICE for item in matches)
+    # The query only changes the order
+    assert sorted(item["id"] for item in catalog.search("socks", MAX_PRICE)) == sorted(item["id"] for item in matches)
+
+def test_results_page_parses_like_the_catalog(stub):
+    response, html, _ = request(stub, "GET", f"/sch/i.html?_nkw=shoes&_udhi={MAX_PRICE}")
+    cards = parse_search_results(html)
+    expected = stub.catalog.search("shoes", MAX_PRICE)[:CARDS_PER_PAGE]
+
+    assert response.status == 200
+    assert [item_id_from_url(card["links"][0]["href"]) for card in cards] == [item["id"] for item in expected]
+
+    prices = parse_prices([card["price_text"] for card in cards])
+    shipping = parse_prices([card["shipping_text"] for card in cards])
+    for index, item in enumerate(expected):
+        assert prices.amount(index) == item["price"]
+        assert prices.is_range(index) == bool(item["price_high"])
+        assert shipping.is_free(index) == (item["shipping"] == 0)
+        if item["shipping"]:
+            assert shipping.amount(index) == item["shipping"]
+
+def test_results_pagination(stub):
+    matches = stub.catalog.search("shoes", MAX_PRICE)
+    last_page = -(-len(matches) // CARDS_PER_PAGE)
+
+    _, page_two, _ = request(stub, "GET", f"/sch/i.html?_nkw=shoes&_udhi={MAX_PRICE}&_pgn=2")
+    _, past_the_end, _ = request(stub, "GET", f"/sch/i.html?_nkw=shoes&_udhi={MAX_PRICE}&_pgn={last_page + 5}")
+
+    assert [item_id_from_url(card["links"][0]["href"]) for card in parse_search_results(page_two)] == \
+        [item["id"] for item in matches[CARDS_PER_PAGE:2 * CARDS_PER_PAGE]]
+    # Past the last page the last page is served again
+    assert len(parse_search_results(past_the_end)) == len(matches) - (last_page - 1) * CARDS_PER_PAGE
+
+def test_cart_summary_builds_a_cart_model(stub):
+    plain = next(item for item in stub.catalog.items if not item["variants"])
+    with_variants = next(item for item in stub.catalog.items if item["variants"])
+    choices = {
+        variant["label"]: next(option["text"] for option in variant["options"] if not option["disabled"])
+        for variant in with_variants["variants"]
+    }
+
+    _, _, cookie = request(stub, "GET", "/")
+    for payload in ({"item_id": plain["id"]}, {"item_id": with_variants["id"], "variants": choices}):
+        response, _, cookie = request(stub, "POST", "/cart/api/add", payload, cookie)
+        assert response.status == 200
+    response, _, _ = request(stub, "POST", "/cart/api/add", {"item_id": with_variants["id"]}, cookie)
+    assert response.status == 400
+
+    _, body, _ = request(stub, "GET", "/cart/api/summary", cookie=cookie)
+    model = cart_model_from_json(json.loads(body))
+
+    assert model["item_count"] == 2
+    assert [item["item_id"] for item in model["items"]] == [plain["id"], with_variants["id"]]
+    assert model["items"][1]["price"] == stub.catalog.unit_price(with_variants, choices)
+    assert model["subtotal"] == round(model["items_total"] + model["shipping_total"], 2)
+    assert model["shipping_total"] == round(plain["shipping"] + with_variants["shipping"], 2)
+
+def test_carts_are_per_session(stub):
+    item = next(item for item in stub.catalog.items if not item["variants"])
+    _, _, first = request(stub, "POST", "/cart/api/add", {"item_id": item["id"]})
+    _, _, second = request(stub, "GET", "/")
+
+    assert json.loads(request(stub, "GET", "/cart/api/summary", cookie=first)[1])["item_count"] == 1
+    assert json.loads(request(stub, "GET", "/cart/api/summary", cookie=second)[1])["item_count"] == 0
+
+def test_session_check(stub):
+    def check(cookie=None):
+        response, _, _ = request(stub, "GET", SESSION_CHECK_PATH, cookie=cookie)
+        return session_accepted(SimpleNamespace(
+            status=response.status,
+            headers={"location": response.getheader("Location") or ""},
+            ok=200 <= response.status < 300
+        ))
+
+    _, _, cookie = request(stub, "GET", "/")
+    assert not check(cookie)
+
+    # Signing in sets the user cookie next to the session cookie
+    response, _, _ = request(stub, "POST", "/signin", cookie=cookie)
+    assert "stub_user=1" in response.getheader("Set-Cookie")
+    assert check(f"{cookie}; stub_user=1")
+
+def test_injected_challenges_are_detected():
+    server = StubEbayServer(catalog_size=10, challenge_rate=1.0)
+    server.start()
+    try:
+        response, html, _ = request(server, "GET", "/sch/i.html?_nkw=shoes")
+    finally:
+        server.stop()
+
+    assert is_challenge_page(response.status, html)
+    assert parse_search_results(html) == []
+    assert server.stats()["injected"]["challenges"] == 1
@@ -0,0 +1,78 @@
+from pages.product_page import plan_variant_selection
+
+def listbox(index, label, options, current="Select", visible=True, controls=None):
+    return {
+        "index": index,
+        "label": label,
+        "current": current,
+        "visible": visible,
+        "controls": controls if controls is not None else f"listbox-{index}",
+        "options": [{"text": text, "disabled": disabled} for text, disabled in options],
+    }
+
+def select(index, label, options, visible=True):
+    return {
+        "index": index,
+        "label": label,
+        "visible": visible,
+        "options": [{"value": value, "text": text, "disabled": disabled} for value, text, disabled in options],
+    }
+
+def test_only_valid_listbox_options_are_picked():
+    variants = {"listboxes": [listbox(0, "Size", [
+        ("Select", False),
+        ("S", True),
+        ("M (Out of stock)", False),
+        ("", False),
+        ("L", False),
+    ])]}
+
+    for _ in range(20):
+        plan = plan_variant_selection(variants)
+        assert [entry["choice"]["text"] for entry in plan["listboxes"]] == ["L"]
+
+def test_controls_left_alone():
+    variants = {
+        "listboxes": [
+            listbox(0, "Color", [("Red", False)], current="Blue"),
+            listbox(1, "Size", [("M", False)], visible=False),
+            listbox(2, "Quantity", [("1", False)]),
+        ],
+        "selects": [
+            select(0, "Qty", [("1", "1", False)]),
+            select(1, "Style", [("a", "A", False)], visible=False),
+        ],
+    }
+
+    assert plan_variant_selection(variants) == {"listboxes": [], "selects": []}
+
+def test_listbox_without_loaded_options_is_planned_without_a_choice():
+    plan = plan_variant_selection({"listboxes": [listbox(0, "Size", [])]})
+
+    assert plan["listboxes"] == [
+        {"index": 0, "label": "Size", "controls": "listbox-0", "options_loaded": False, "choice": None}
+    ]
+
+def test_select_placeholders_are_skipped():
+    variants = {"selects": [
+        select(0, "Color", [("-1", "- Select -", False), ("0", "None", False), ("", "Empty", False),
+                            ("7", "Red", True), ("8", "Blue", False)]),
+        select(1, "Size", [("-1", "Select", False)]),
+    ]}
+
+    plan = plan_variant_selection(variants)
+
+    # A select with nothing to pick is left out entirely
+    assert [(entry["label"], entry["choice"]["value"]) for entry in plan["selects"]] == [("Color", "8")]
+
+def test_preferred_option_wins_while_still_valid():
+    variants = {
+        "listboxes": [listbox(0, "Size", [("S", False), ("M", False), ("L", False)])],
+        "selects": [select(0, "Color", [("1", "Red", False), ("2", "Blue", True)])],
+    }
+
+    for _ in range(20):
+        plan = plan_variant_selection(variants, preferred={"Size": "M", "Color": "Blue"})
+        assert plan["listboxes"][0]["choice"]["text"] == "M"
+        # Blue is disabled now, so the preference is ignored
+        assert plan["selects"][0]["choice"]["text"] == "Red"
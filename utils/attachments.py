@@ -0,0 +1,222 @@
+import os
+import gzip
+import time
+import queue
+import shutil
+import threading
+import allure
+import allure_commons
+from allure_commons import hookimpl
+from allure_commons.logger import AllureFileLogger
+from allure_commons.types import AttachmentType
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_MAX_PENDING_BYTES = 64 * 1024 * 1024
+
+# Text attachments at least this big are gzipped when compression is on
+COMPRESS_MIN_BYTES = 64 * 1024
+COMPRESSIBLE_TYPES = {
+    AttachmentType.TEXT, AttachmentType.JSON, AttachmentType.CSV, AttachmentType.TSV,
+    AttachmentType.XML, AttachmentType.HTML, AttachmentType.URI_LIST, AttachmentType.YAML,
+}
+GZIP_SUFFIX = ".gz"
+
+class AttachmentWriter:
+    """
+    Takes over Allure's attachment writing from its AllureFileLogger.
+
+    allure.attach still registers the attachment (its file name) with the
+    running test or step on the caller's thread; only the bytes are queued and
+    written to the results directory by a background thread. The queue is
+    bounded by count and size, so a burst of screenshots makes the test wait
+    instead of growing memory. File attachments (traces) are hard-linked into
+    the results directory instead of copied where the filesystem allows.
+
+    Results, containers and globals are still written by the file logger, but
+    only after every queued attachment is on disk, so a test's result never
+    points at a missing attachment.
+    """
+    def __init__(self, file_logger: AllureFileLogger, max_pending: int = DEFAULT_MAX_PENDING,
+                 max_pending_bytes: int = DEFAULT_MAX_PENDING_BYTES):
+        self.file_logger = file_logger
+        self.report_dir = file_logger._report_dir
+        self.max_pending_bytes = max_pending_bytes
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._space = threading.Condition()
+        self._pending_bytes = 0
+        # stats is updated by both the writer thread and the test thread
+        self._lock = threading.Lock()
+        self._thread = None
+        self.errors = []
+        self.stats = {
+            "queued": 0,
+            "written": 0,
+            "linked_files": 0,
+            "copied_files": 0,
+            "bytes": 0,
+            "compressed_bytes_saved": 0,
+            "max_queue_depth": 0,
+            "blocked_ms": 0.0,
+            "flush_ms": 0.0,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="allure-attachments", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except Exception as e:
+                self.errors.append(f"{job[0]}: {e}")
+                print(f"Could not write attachment {job[0]}: {e}")
+            finally:
+                if job:
+                    with self._space:
+                        self._pending_bytes -= len(job[1])
+                        self._space.notify_all()
+                self._queue.task_done()
+
+    def _write(self, file_name: str, body: bytes):
+        tmp_destination = self.report_dir / f"{file_name}.tmp"
+        final_destination = self.report_dir / file_name
+        saved = 0
+        if file_name.endswith(GZIP_SUFFIX):
+            compressed = gzip.compress(body, compresslevel=6)
+            saved = len(body) - len(compressed)
+            body = compressed
+        with open(tmp_destination, "wb") as attached_file:
+            attached_file.write(body)
+        os.replace(tmp_destination, final_destination)
+        with self._lock:
+            self.stats["compressed_bytes_saved"] += saved
+            self.stats["written"] += 1
+            self.stats["bytes"] += len(body)
+
+    # Allure hooks
+
+    @hookimpl
+    def report_attached_data(self, body, file_name):
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        start = time.perf_counter()
+        # Wait for room; a single payload bigger than the limit still goes through on an empty queue
+        with self._space:
+            while self._pending_bytes and self._pending_bytes + len(body) > self.max_pending_bytes:
+                self._space.wait()
+            self._pending_bytes += len(body)
+        self._queue.put((file_name, body))
+        with self._lock:
+            self.stats["blocked_ms"] += (time.perf_counter() - start) * 1000
+            self.stats["queued"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+
+    @hookimpl
+    def report_attached_file(self, source, file_name):
+        # Callers may delete the source right after attaching (trace chunks),
+        # so the results directory gets its own link or copy before returning
+        tmp_destination = self.report_dir / f"{file_name}.tmp"
+        final_destination = self.report_dir / file_name
+        try:
+            os.link(source, tmp_destination)
+            counter = "linked_files"
+        except OSError:
+            shutil.copy2(source, tmp_destination)
+            counter = "copied_files"
+        os.replace(tmp_destination, final_destination)
+        with self._lock:
+            self.stats[counter] += 1
+
+    @hookimpl
+    def report_result(self, result):
+        self.flush()
+        self.file_logger.report_result(result)
+
+    @hookimpl
+    def report_container(self, container):
+        self.flush()
+        self.file_logger.report_container(container)
+
+    @hookimpl
+    def report_globals(self, globals_item):
+        self.file_logger.report_globals(globals_item)
+
+    def flush(self):
+        """Block until every queued attachment is written"""
+        start = time.perf_counter()
+        self._queue.join()
+        with self._lock:
+            self.stats["flush_ms"] += (time.perf_counter() - start) * 1000
+
+    def snapshot(self) -> dict:
+        """A consistent copy of stats"""
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=10)
+
+_settings = {"compress": False, "last_stats": None}
+_writer = None
+
+def install(compress: bool = False, **kwargs):
+    """
+    Route Allure attachment writes through a background AttachmentWriter
+    (called from conftest once the Allure plugin is set up). Does nothing
+    without --alluredir.
+    """
+    global _writer
+    _settings["compress"] = compress
+    file_logger = next((plugin for plugin in allure_commons.plugin_manager.get_plugins()
+                        if isinstance(plugin, AllureFileLogger)), None)
+    if file_logger is None or _writer is not None:
+        return _writer
+    _writer = AttachmentWriter(file_logger, **kwargs)
+    _writer.start()
+    allure_commons.plugin_manager.unregister(file_logger)
+    allure_commons.plugin_manager.register(_writer)
+    return _writer
+
+def uninstall():
+    """Write what is queued and give the results back to Allure's own file logger"""
+    global _writer
+    if _writer is None:
+        return None
+    writer, _writer = _writer, None
+    writer.close()
+    _settings["last_stats"] = writer.snapshot()
+    allure_commons.plugin_manager.unregister(writer)
+    allure_commons.plugin_manager.register(writer.file_logger)
+    return writer
+
+def get_writer():
+    return _writer
+
+def stats():
+    """Stats of the running writer, or of the last one after uninstall()"""
+    return _writer.snapshot() if _writer else _settings["last_stats"]
+
+def flush():
+    if _writer:
+        _writer.flush()
+
+def attach(body, name: str = None, attachment_type=None, extension: str = None):
+    """
+    allure.attach, except that with compression on, large text/JSON bodies
+    are stored gzipped (compressed by the background writer, not here).
+    """
+    if _settings["compress"] and _writer is not None and attachment_type in COMPRESSIBLE_TYPES:
+        # The threshold is in bytes; a str's len() counts characters
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if len(body) >= COMPRESS_MIN_BYTES:
+            allure.attach(body, name=f"{name} (gzip)", attachment_type="application/gzip",
+                          extension=f"{attachment_type.extension}{GZIP_SUFFIX}")
+            return
+    allure.attach(body, name=name, attachment_type=attachment_type, extension=extension)
@@ -0,0 +1,14 @@
+import re
+
+# Markers of eBay's bot-check / CAPTCHA interstitials
+CHALLENGE_MARKERS = re.compile(
+    r"splashui/challenge|splashui/captcha|pardon our interruption|checking your browser|g-recaptcha|hcaptcha",
+    re.IGNORECASE
+)
+CHALLENGE_STATUSES = (403, 429, 503)
+
+def is_challenge_page(status: int, html: str) -> bool:
+    """True when a response looks like a challenge page instead of real content"""
+    if status in CHALLENGE_STATUSES:
+        return True
+    return bool(html) and CHALLENGE_MARKERS.search(html) is not None
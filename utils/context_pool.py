@@ -0,0 +1,159 @@
+import time
+from urllib.parse import urlsplit
+from playwright.sync_api import Browser, BrowserContext
+
+# Clears every kind of storage the current origin can hold
+CLEAR_ORIGIN_JS = """
+async () => {
+    try { window.localStorage.clear(); } catch (e) {}
+    try { window.sessionStorage.clear(); } catch (e) {}
+    try {
+        for (const db of await indexedDB.databases()) {
+            indexedDB.deleteDatabase(db.name);
+        }
+    } catch (e) {}
+    try {
+        for (const registration of await navigator.serviceWorker.getRegistrations()) {
+            await registration.unregister();
+        }
+    } catch (e) {}
+    try {
+        for (const key of await caches.keys()) {
+            await caches.delete(key);
+        }
+    } catch (e) {}
+}
+"""
+
+# Served instead of the real page while a released context's origins are wiped
+BLANK_PAGE = "<!DOCTYPE html><html><head></head><body></body></html>"
+
+def origin_of(url: str):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+class ContextPool:
+    """
+    Hands out clean BrowserContexts from one long-lived browser.
+
+    In "recycle" mode a released context is wiped and kept for the next test:
+    cookies, permissions, routes and open pages, plus Web Storage, IndexedDB,
+    service workers and Cache Storage of every origin it loaded a document
+    from or holds cookies/storage for (eBay's signin and cart subdomains
+    included). In "fresh" mode every
+    acquire creates a new context, which is still far cheaper than launching a
+    new browser.
+    """
+    def __init__(self, browser: Browser, context_options: dict, mode: str = "recycle", max_idle: int = 2):
+        if mode not in ("recycle", "fresh"):
+            raise ValueError(f"Unsupported context pool mode: {mode}")
+        self.browser = browser
+        self.context_options = context_options
+        self.mode = mode
+        self.max_idle = max_idle
+        self.launch_ms = None
+        self._idle = []
+        # Origins each context has loaded documents from, to wipe on release
+        self._origins = {}
+
+    @classmethod
+    def launch(cls, browser_type, launch_options: dict, context_options: dict, **kwargs):
+        """Launch the browser and wrap it in a pool, recording the launch time"""
+        start = time.perf_counter()
+        browser = browser_type.launch(**launch_options)
+        pool = cls(browser, context_options, **kwargs)
+        pool.launch_ms = round((time.perf_counter() - start) * 1000, 1)
+        return pool
+
+    def acquire(self) -> tuple[BrowserContext, dict]:
+        """
+        Borrow a clean context.
+
+        :return: The context and a timing dict (acquire_ms, reused)
+        """
+        start = time.perf_counter()
+        reused = bool(self._idle)
+        if reused:
+            context = self._idle.pop()
+        else:
+            context = self.browser.new_context(**self.context_options)
+            self._track_origins(context)
+        timings = {
+            "acquire_ms": round((time.perf_counter() - start) * 1000, 1),
+            "reused": reused,
+        }
+        return context, timings
+
+    def release(self, context: BrowserContext, reusable: bool = True):
+        """
+        Return a context to the pool.
+
+        Contexts from failed tests should be released with reusable=False so
+        whatever state broke the test isn't handed to the next one.
+        """
+        if self.mode == "recycle" and reusable and len(self._idle) < self.max_idle:
+            try:
+                self._reset(context)
+                self._idle.append(context)
+                return
+            except Exception as e:
+                print(f"Could not recycle context, closing it: {e}")
+        self._close(context)
+
+    def close(self):
+        """Close every idle context and the browser"""
+        while self._idle:
+            self._close(self._idle.pop())
+        self.browser.close()
+
+    def _track_origins(self, context: BrowserContext):
+        origins = self._origins[context] = set()
+
+        def on_request(request):
+            if request.resource_type == "document":
+                origin = origin_of(request.url)
+                if origin:
+                    origins.add(origin)
+
+        context.on("request", on_request)
+
+    def _storage_origins(self, context: BrowserContext) -> set:
+        """Every origin the context may hold storage for"""
+        origins = set(self._origins.get(context, ()))
+        state = context.storage_state()
+        origins.update(entry["origin"] for entry in state.get("origins", []))
+        for cookie in state.get("cookies", []):
+            scheme = "https" if cookie.get("secure") else "http"
+            origins.add(f"{scheme}://{cookie['domain'].lstrip('.')}")
+        return origins
+
+    def _reset(self, context: BrowserContext):
+        origins = self._storage_origins(context)
+        for page in context.pages:
+            page.close()
+
+        if origins:
+            # Visit each origin on a locally served blank page, so its storage
+            # can be cleared without a request leaving the browser
+            page = context.new_page()
+            page.route("**/*", lambda route: route.fulfill(status=200, content_type="text/html", body=BLANK_PAGE))
+            try:
+                for origin in sorted(origins):
+                    page.goto(f"{origin}/", wait_until="domcontentloaded")
+                    page.evaluate(CLEAR_ORIGIN_JS)
+            finally:
+                page.close()
+
+        context.clear_cookies()
+        context.clear_permissions()
+        context.unroute_all(behavior="ignoreErrors")
+        self._origins.get(context, set()).clear()
+
+    def _close(self, context: BrowserContext):
+        self._origins.pop(context, None)
+        try:
+            context.close()
+        except Exception:
+            pass
@@ -0,0 +1,92 @@
+import time
+import contextvars
+from contextlib import contextmanager
+import allure
+
+# Objects with step_started(title) / step_finished(title, error) methods that
+# want to know where the service-level steps of a flow begin and end.
+_listeners = []
+
+# Set by quiet_steps(): where this task's steps go instead of the Allure step stack
+_step_log = contextvars.ContextVar("flow_step_log", default=None)
+
+def add_listener(listener):
+    _listeners.append(listener)
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+@contextmanager
+def quiet_steps():
+    """
+    For flows that run concurrently on one thread (asyncio.gather). Allure keeps
+    one step stack per thread, so their steps would nest inside each other.
+    Within this block (and the tasks started from it) step() and flow_step()
+    open no Allure steps; they are recorded in the yielded list instead, for
+    the caller to attach.
+    """
+    log = []
+    token = _step_log.set(log)
+    try:
+        yield log
+    finally:
+        _step_log.reset(token)
+
+@contextmanager
+def step(title: str):
+    """allure.step, unless inside quiet_steps()"""
+    log = _step_log.get()
+    if log is None:
+        with allure.step(title):
+            yield
+        return
+    entry = {"title": title}
+    log.append(entry)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        entry["error"] = str(e).splitlines()[0] if str(e) else type(e).__name__
+        raise
+    finally:
+        entry["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+@contextmanager
+def flow_step(title: str):
+    """
+    allure.step for the service-level steps of a flow, which also notifies the
+    registered listeners. Usable as a context manager or a decorator.
+    """
+    with step(title):
+        for listener in list(_listeners):
+            listener.step_started(title)
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for listener in reversed(list(_listeners)):
+                listener.step_finished(title, error)
+
+class StepTimer:
+    """Listener that records how long every flow step took, in the order the steps started"""
+    def __init__(self):
+        self.steps = []
+        self._open = []
+
+    def step_started(self, title: str):
+        entry = {"title": title, "depth": len(self._open), "_start": time.perf_counter()}
+        self.steps.append(entry)
+        self._open.append(entry)
+
+    def step_finished(self, title: str, error):
+        # Parallel async flows interleave their steps, so close the latest step with this title
+        for entry in reversed(self._open):
+            if entry["title"] == title:
+                self._open.remove(entry)
+                entry["duration_ms"] = round((time.perf_counter() - entry.pop("_start")) * 1000, 1)
+                entry["failed"] = error is not None
+                return
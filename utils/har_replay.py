@@ -0,0 +1,109 @@
+import os
+import json
+import time
+from playwright.sync_api import BrowserContext
+from utils import flow_steps
+from utils.flow_steps import StepTimer
+
+HAR_MODES = ("off", "record", "replay")
+
+# What a replay does with a request that is not in the HAR: "abort" fails it
+# (strict, nothing reaches the network), "fallback" lets it go out live.
+HAR_FALLBACKS = ("abort", "fallback")
+
+DEFAULT_HAR_PATH = "hars/{test}.har"
+
+# Variant choices are random; record and replay seed it the same way so the
+# replay requests the same product variants the recording did
+REPLAY_RANDOM_SEED = 0
+
+def step_key(steps: list[dict]) -> list[tuple]:
+    """(title, occurrence) per step, so repeated titles line up in order"""
+    seen = {}
+    keys = []
+    for step in steps:
+        seen[step["title"]] = seen.get(step["title"], 0) + 1
+        keys.append((step["title"], seen[step["title"]]))
+    return keys
+
+def compare_step_timings(recorded: list[dict], replayed: list[dict]) -> list[dict]:
+    """Line up replayed steps with the recorded ones and report both durations"""
+    recorded_by_key = dict(zip(step_key(recorded), recorded))
+    rows = []
+    for key, step in zip(step_key(replayed), replayed):
+        before = recorded_by_key.get(key)
+        row = {
+            "step": step["title"] if key[1] == 1 else f"{step['title']} (#{key[1]})",
+            "depth": step["depth"],
+            "recorded_ms": before.get("duration_ms") if before else None,
+            "replay_ms": step.get("duration_ms"),
+        }
+        if row["recorded_ms"] and row["replay_ms"] is not None:
+            row["delta_ms"] = round(row["replay_ms"] - row["recorded_ms"], 1)
+            row["speedup"] = round(row["recorded_ms"] / row["replay_ms"], 2) if row["replay_ms"] else None
+        rows.append(row)
+    return rows
+
+class HarSession:
+    """
+    Records every request of a context into a HAR file, or answers them from
+    one with route_from_har, and times the flow steps on both sides.
+
+    The HAR itself is written by Playwright when the context closes; the step
+    timings of the recording go to a .timings.json file next to it.
+    """
+    def __init__(self, context: BrowserContext, mode: str = "off", har_path: str = None, fallback: str = "abort"):
+        if mode not in HAR_MODES:
+            raise ValueError(f"Unsupported HAR mode: {mode} (known: {', '.join(HAR_MODES)})")
+        if fallback not in HAR_FALLBACKS:
+            raise ValueError(f"Unsupported HAR fallback: {fallback} (known: {', '.join(HAR_FALLBACKS)})")
+        self.context = context
+        self.mode = mode
+        self.har_path = har_path
+        self.fallback = fallback
+        self.timer = StepTimer()
+
+    @property
+    def timings_path(self) -> str:
+        return f"{os.path.splitext(self.har_path)[0]}.timings.json"
+
+    def install(self):
+        if self.mode == "off":
+            return
+        if self.mode == "record":
+            directory = os.path.dirname(self.har_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.context.route_from_har(self.har_path, update=True, update_content="embed")
+        else:
+            if not os.path.exists(self.har_path):
+                raise FileNotFoundError(f"No HAR at {self.har_path}; record one first with --har-mode=record")
+            self.context.route_from_har(self.har_path, not_found=self.fallback)
+        flow_steps.add_listener(self.timer)
+
+    def finish(self):
+        """
+        Stop timing steps. A recording saves its step timings; a replay
+        returns them lined up against the recorded ones.
+
+        :return: The replay comparison rows, or None
+        """
+        if self.mode == "off":
+            return None
+        flow_steps.remove_listener(self.timer)
+
+        if self.mode == "record":
+            with open(self.timings_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "har": os.path.basename(self.har_path),
+                    "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "steps": self.timer.steps,
+                }, f, indent=2)
+            return None
+
+        try:
+            with open(self.timings_path, encoding="utf-8") as f:
+                recorded = json.load(f)["steps"]
+        except (OSError, ValueError, KeyError):
+            recorded = []
+        return compare_step_timings(recorded, self.timer.steps)
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import time
+import sqlite3
+
+ITEM_CACHE_PATH = os.getenv("ITEM_CACHE_PATH", ".item_cache.sqlite")
+DEFAULT_TTL_HOURS = 24
+DEFAULT_MAX_ENTRIES = 5000
+
+# Consecutive add-to-cart failures before an item is skipped in searches
+BAD_AFTER_FAILURES = 2
+
+ITEM_ID_RE = re.compile(r"/itm/(\d+)")
+
+def item_id_from_url(url: str):
+    """The numeric eBay item ID in an /itm/ URL, or None"""
+    match = ITEM_ID_RE.search(url or "")
+    return match.group(1) if match else None
+
+class ItemCache:
+    """
+    What earlier runs learned about each listing, keyed by eBay item ID:
+    whether it has variants, which variant options were picked, which
+    add-to-cart selector worked and whether adding it keeps failing.
+
+    Entries older than `ttl_hours` are dropped on read so changed listings are
+    re-learned; past `max_entries` the least recently used entries are evicted.
+    """
+    def __init__(self, path: str = ITEM_CACHE_PATH, ttl_hours: float = DEFAULT_TTL_HOURS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "skipped_bad": 0, "evicted": 0}
+        self._connection = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Several test processes may share the file; wait for their writes
+            self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "item_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, last_access REAL NOT NULL, facts TEXT NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS items_last_access ON items (last_access)")
+            self._connection.commit()
+        return self._connection
+
+    def get(self, item_id: str):
+        """Cached facts for `item_id`, or None when unknown or expired"""
+        if not self.enabled or not item_id:
+            return None
+        db = self._db()
+        row = db.execute("SELECT updated_at, facts FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        updated_at, facts = row
+        now = time.time()
+        if now - updated_at > self.ttl_seconds:
+            db.execute("DELETE FROM items WHERE item_id = ?", (item_id,))
+            db.commit()
+            self.stats["expired"] += 1
+            return None
+        db.execute("UPDATE items SET last_access = ? WHERE item_id = ?", (now, item_id))
+        db.commit()
+        self.stats["hits"] += 1
+        return json.loads(facts)
+
+    def update(self, item_id: str, **facts):
+        """Merge `facts` into the entry for `item_id`"""
+        if not self.enabled or not item_id:
+            return
+        db = self._db()
+        row = db.execute("SELECT facts FROM items WHERE item_id = ?", (item_id,)).fetchone()
+        merged = dict(json.loads(row[0]) if row else {}, **facts)
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO items (item_id, updated_at, last_access, facts) VALUES (?, ?, ?, ?)",
+            (item_id, now, now, json.dumps(merged))
+        )
+        self._evict(db)
+        db.commit()
+
+    def record_added(self, item_id: str, has_variants: bool, variant_choices: dict, add_to_cart_selector: str):
+        self.update(
+            item_id,
+            has_variants=has_variants,
+            variant_choices=variant_choices,
+            add_to_cart_selector=add_to_cart_selector,
+            status="added",
+            failures=0,
+            error=None
+        )
+
+    def record_failed(self, item_id: str, error: str):
+        # Forget the shortcuts too, in case one of them caused the failure
+        facts = self.get(item_id) or {}
+        self.update(
+            item_id,
+            has_variants=None,
+            add_to_cart_selector=None,
+            status="failed",
+            failures=facts.get("failures", 0) + 1,
+            error=error
+        )
+
+    def is_known_bad(self, item_id: str) -> bool:
+        """True when adding the item has failed BAD_AFTER_FAILURES times in a row"""
+        facts = self.get(item_id)
+        bad = bool(facts) and facts.get("failures", 0) >= BAD_AFTER_FAILURES
+        if bad:
+            self.stats["skipped_bad"] += 1
+        return bad
+
+    def _evict(self, db: sqlite3.Connection):
+        (count,) = db.execute("SELECT COUNT(*) FROM items").fetchone()
+        if count > self.max_entries:
+            db.execute(
+                "DELETE FROM items WHERE item_id IN (SELECT item_id FROM items ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            self.stats["evicted"] += count - self.max_entries
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+_cache = ItemCache()
+
+def configure(**kwargs) -> ItemCache:
+    """Replace the process-wide cache (called from conftest.pytest_configure)"""
+    global _cache
+    _cache.close()
+    _cache = ItemCache(**kwargs)
+    return _cache
+
+def get_item_cache() -> ItemCache:
+    return _cache
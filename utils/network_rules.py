@@ -0,0 +1,116 @@
+import re
+from playwright.sync_api import BrowserContext, Route
+
+# A rule matches on resource type and/or URL regex. "abort" fails the request,
+# "stub" answers it locally with an empty body so scripts waiting on it don't error.
+RULE_SETS = {
+    "none": [],
+    "no-images": [
+        {"name": "images", "resource_types": ["image", "media"], "action": "abort"},
+    ],
+    "no-fonts": [
+        {"name": "fonts", "resource_types": ["font"], "action": "abort"},
+    ],
+    "no-analytics": [
+        {
+            "name": "third-party analytics",
+            "url_pattern": r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|googlesyndication\.com"
+                           r"|facebook\.(net|com)/tr|connect\.facebook\.net|scorecardresearch\.com|adnxs\.com"
+                           r"|criteo\.(com|net)|taboola\.com|bat\.bing\.com|hotjar\.com|quantserve\.com",
+            "action": "stub",
+        },
+        {"name": "ebay beacons", "url_pattern": r"rover\.ebay\.com|/roverimp/|pulsar\.ebay\.com", "action": "stub"},
+        {"name": "pings", "resource_types": ["ping", "beacon"], "action": "abort"},
+    ],
+}
+RULE_SETS["lean"] = RULE_SETS["no-images"] + RULE_SETS["no-fonts"] + RULE_SETS["no-analytics"]
+
+# Blocked requests are never downloaded, so their size is estimated per type
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 200_000,
+    "font": 50_000,
+    "script": 30_000,
+    "stylesheet": 20_000,
+}
+DEFAULT_ESTIMATED_BYTES = 2_000
+
+STUB_BODIES = {
+    "script": ("", "application/javascript"),
+    "stylesheet": ("", "text/css"),
+}
+
+def resolve_rule_sets(names: str) -> list[dict]:
+    """Turn a comma-separated list of rule set names into one list of rules"""
+    rules = []
+    for name in filter(None, (part.strip() for part in names.split(","))):
+        if name not in RULE_SETS:
+            raise ValueError(f"Unknown resource rule set: {name} (known: {', '.join(RULE_SETS)})")
+        rules.extend(rule for rule in RULE_SETS[name] if rule not in rules)
+    return rules
+
+class RequestBlocker:
+    """
+    Routes every request of a context through a list of block/stub rules and
+    counts what was blocked and what was let through.
+    """
+    def __init__(self, rules: list[dict]):
+        self.rules = [
+            dict(rule, _regex=re.compile(rule["url_pattern"]) if rule.get("url_pattern") else None)
+            for rule in rules
+        ]
+        self.context = None
+        self.allowed = 0
+        self.blocked = {}
+        self.estimated_bytes_saved = 0
+
+    @classmethod
+    def install(cls, context: BrowserContext, rule_set_names: str):
+        """Create a blocker for the named rule sets and route the context through it"""
+        blocker = cls(resolve_rule_sets(rule_set_names))
+        if blocker.rules:
+            blocker.context = context
+            context.route("**/*", blocker._handle)
+        return blocker
+
+    def uninstall(self):
+        if self.context:
+            self.context.unroute("**/*", self._handle)
+            self.context = None
+
+    def stats(self) -> dict:
+        return {
+            "rules": [rule["name"] for rule in self.rules],
+            "allowed_requests": self.allowed,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_rule": dict(self.blocked),
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+        }
+
+    def _match(self, request):
+        for rule in self.rules:
+            if rule.get("resource_types") and request.resource_type not in rule["resource_types"]:
+                continue
+            if rule["_regex"] and not rule["_regex"].search(request.url):
+                continue
+            return rule
+        return None
+
+    def _handle(self, route: Route):
+        request = route.request
+        rule = self._match(request)
+
+        # Navigations are never blocked, whatever the rules say
+        if rule is None or request.resource_type == "document":
+            self.allowed += 1
+            route.fallback()
+            return
+
+        self.blocked[rule["name"]] = self.blocked.get(rule["name"], 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+
+        if rule["action"] == "stub":
+            body, content_type = STUB_BODIES.get(request.resource_type, ("", "text/plain"))
+            route.fulfill(status=200, body=body, content_type=content_type)
+        else:
+            route.abort("blockedbyclient")
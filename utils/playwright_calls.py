@@ -0,0 +1,113 @@
+import threading
+import functools
+from contextlib import contextmanager
+from playwright import sync_api, async_api
+
+# Public Playwright classes whose method calls are counted
+COUNTED_CLASSES = (
+    "Page", "Frame", "Locator", "FrameLocator", "ElementHandle",
+    "Keyboard", "Mouse", "BrowserContext", "APIRequestContext",
+)
+
+# Build a locator without talking to the browser
+LOCATOR_METHODS = {
+    "locator", "nth", "filter", "and_", "or_", "frame_locator", "content_frame", "owner",
+    "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder",
+    "get_by_alt_text", "get_by_title", "get_by_test_id",
+}
+
+NAVIGATION_METHODS = {"goto", "reload", "go_back", "go_forward"}
+
+# Local bookkeeping, neither a locator nor a round trip
+UNCOUNTED_METHODS = {
+    "on", "once", "remove_listener", "is_closed",
+    "set_default_timeout", "set_default_navigation_timeout",
+}
+
+def call_kind(method: str) -> str:
+    """"locator", "navigation" or "action" (every other call is a browser round trip)"""
+    if method in LOCATOR_METHODS:
+        return "locator"
+    if method in NAVIGATION_METHODS:
+        return "navigation"
+    return "action"
+
+class CallCounter:
+    """Counts Playwright API calls made while it is active, by "Class.method" and by kind"""
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def totals(self) -> dict:
+        totals = {"action": 0, "locator": 0, "navigation": 0}
+        for key, count in list(self.counts.items()):
+            totals[call_kind(key.rsplit(".", 1)[-1])] += count
+        totals["round_trips"] = totals["action"] + totals["navigation"]
+        return totals
+
+# Wrappers are only in place while at least one counter is active, so
+# runs that don't count calls run against the untouched Playwright classes
+_counters = []
+_originals = {}
+_install_lock = threading.Lock()
+
+def _wrap(class_name: str, method_name: str, func):
+    key = f"{class_name}.{method_name}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        for counter in list(_counters):
+            counter.add(key)
+        return func(*args, **kwargs)
+    return wrapper
+
+def _install():
+    for module in (sync_api, async_api):
+        for class_name in COUNTED_CLASSES:
+            cls = getattr(module, class_name, None)
+            if cls is None:
+                continue
+            for method_name, func in list(vars(cls).items()):
+                if method_name.startswith("_") or method_name in UNCOUNTED_METHODS or not callable(func) \
+                        or isinstance(func, (property, staticmethod, classmethod)):
+                    continue
+                _originals[(cls, method_name)] = func
+                setattr(cls, method_name, _wrap(class_name, method_name, func))
+
+def _uninstall():
+    for (cls, method_name), func in _originals.items():
+        setattr(cls, method_name, func)
+    _originals.clear()
+
+def start(counter: CallCounter = None) -> CallCounter:
+    """Start counting into `counter` (a new one by default) and return it"""
+    counter = counter or CallCounter()
+    with _install_lock:
+        if not _counters:
+            _install()
+        _counters.append(counter)
+    return counter
+
+def stop(counter: CallCounter):
+    with _install_lock:
+        if counter in _counters:
+            _counters.remove(counter)
+        if not _counters:
+            _uninstall()
+
+@contextmanager
+def count_calls():
+    """
+    Count the Playwright calls made inside the block.
+
+    :return: The CallCounter, e.g. counter.totals()["round_trips"]
+    """
+    counter = start()
+    try:
+        yield counter
+    finally:
+        stop(counter)
@@ -1,14 +1,176 @@
 import re
+import math
+from array import array
+
+AMOUNT_PATTERN = r"\d(?:[\d.,]|[\u00a0 '’](?=\d{3}(?!\d)))*"
+CURRENCY_PATTERN = r"us\s?\$|c\s?\$|au\s?\$|ils|nis|usd|eur|gbp|cad|aud|₪|\$|€|£"
+
+# Splits one lower-cased price string into: the text before the first number
+# (currency, "free", "+"), the first number, the upper end of a range
+# ("10.00 to ils 25.00", "5 - 9") and the rest. A trailing \x00 ends the
+# entry, so findall over \x00-joined strings yields one tuple per string.
+# Spaces/apostrophes only count as thousands separators when exactly three
+# digits follow.
+ENTRY_RE = re.compile(
+    r"([^\x00\d]*)"
+    r"(" + AMOUNT_PATTERN + r")?"
+    r"(?:\s*(?:to|[–—-])\s*(?:" + CURRENCY_PATTERN + r")?\s*(" + AMOUNT_PATTERN + r"))?"
+    r"([^\x00]*)"
+    r"\x00?"
+)
+AMOUNT_RE = re.compile(AMOUNT_PATTERN)
+CURRENCY_RE = re.compile(CURRENCY_PATTERN)
+GROUPING_RE = re.compile(r"[\u00a0 '’]")
+# A lone separator followed by exactly three digits ("1.234", "2,500")
+THOUSANDS_ONLY_RE = re.compile(r"^\d+[.,]\d{3}$")
+WHITESPACE_RE = re.compile(r"\s")
+
+CURRENCIES = (None, "ILS", "USD", "EUR", "GBP", "CAD", "AUD")
+# Lower-cased spelling -> index into CURRENCIES
+CURRENCY_ALIASES = {
+    "ils": 1, "nis": 1, "₪": 1,
+    "usd": 2, "us$": 2, "$": 2,
+    "eur": 3, "€": 3,
+    "gbp": 4, "£": 4,
+    "cad": 5, "c$": 5,
+    "aud": 6, "au$": 6,
+}
+
+IS_RANGE = 1
+IS_FREE = 2
+
+# From this many strings on, parse_prices scans one joined string instead of each string separately
+BULK_THRESHOLD = 256
+
+def to_amount(token: str, decimal: str = "auto"):
+    """
+    Convert a number as written in a price ("1,234.50", "1.234,50", "12,50",
+    "1 234") to a float.
+
+    :param decimal: "." or "," to force the decimal separator; "auto" guesses it
+        from the last separator (a lone separator followed by exactly three
+        digits is a thousands separator)
+    """
+    if decimal == "." or (decimal == "auto" and not THOUSANDS_ONLY_RE.match(token)):
+        # Plain "25.00" - by far the most common case
+        try:
+            return float(token)
+        except ValueError:
+            pass
+    token = GROUPING_RE.sub("", token).rstrip(".,")
+    if decimal == ",":
+        token = token.replace(".", "").replace(",", ".")
+    elif decimal == ".":
+        token = token.replace(",", "")
+    else:
+        last_dot, last_comma = token.rfind("."), token.rfind(",")
+        if last_dot >= 0 and last_comma >= 0:
+            separator = "." if last_dot > last_comma else ","
+            grouping = "," if separator == "." else "."
+            token = token.replace(grouping, "").replace(separator, ".")
+        elif last_comma >= 0:
+            parts = token.split(",")
+            token = token.replace(",", ".") if len(parts) == 2 and len(parts[1]) != 3 else token.replace(",", "")
+        elif last_dot >= 0:
+            parts = token.split(".")
+            if len(parts) > 2 or len(parts[1]) == 3:
+                token = token.replace(".", "")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+class ParsedPrices:
+    """
+    Parse results for a batch of strings, stored column-wise in flat arrays.
+    Entry i reads as (amount, currency, is_range, is_free); a range keeps its
+    lower bound as the amount, and a string without a number has amount None.
+    """
+    __slots__ = ("amounts", "currencies", "flags")
+
+    def __init__(self, size: int = 0):
+        self.amounts = array("d", [math.nan]) * size
+        self.currencies = array("B", [0]) * size
+        self.flags = array("B", [0]) * size
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def amount(self, index: int):
+        value = self.amounts[index]
+        return None if math.isnan(value) else value
+
+    def currency(self, index: int):
+        return CURRENCIES[self.currencies[index]]
+
+    def is_range(self, index: int) -> bool:
+        return bool(self.flags[index] & IS_RANGE)
+
+    def is_free(self, index: int) -> bool:
+        return bool(self.flags[index] & IS_FREE)
+
+    def __getitem__(self, index: int):
+        return self.amount(index), self.currency(index), self.is_range(index), self.is_free(index)
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+def _parse_entry(entry: tuple, decimal: str) -> tuple:
+    """(amount or NaN, currency index, flags) for one ENTRY_RE match"""
+    prefix, number, range_end, rest = entry
+    amount = math.nan
+    flags = 0
+    if number:
+        value = to_amount(number, decimal)
+        if value is not None:
+            amount = value
+            if range_end:
+                high = to_amount(range_end, decimal)
+                if high is not None:
+                    flags = IS_RANGE
+                    amount = min(amount, high)
+    if "free" in prefix or "free" in rest:
+        flags |= IS_FREE
+    currency = CURRENCY_RE.search(prefix) or CURRENCY_RE.search(rest)
+    currency_index = CURRENCY_ALIASES.get(WHITESPACE_RE.sub("", currency.group()), 0) if currency else 0
+    return amount, currency_index, flags
+
+def parse_prices(texts: list, decimal: str = "auto") -> ParsedPrices:
+    """
+    Parse a list of price/shipping strings in one call.
+
+    :param texts: Strings such as "ILS 25.00", "ILS 10.00 to ILS 25.00",
+        "+ILS 12,50 delivery" or "Free delivery"; None/empty entries are allowed
+    :param decimal: Decimal separator, see to_amount
+    :return: ParsedPrices with one entry per input string
+    """
+    prices = ParsedPrices(len(texts))
+    amounts, currencies, flags = prices.amounts, prices.currencies, prices.flags
+    
+    if len(texts) >= BULK_THRESHOLD:
+        # One regex pass over all strings, and each distinct string parsed once
+        # (shipping texts in particular repeat across a results page)
+        joined = "\x00".join((text or "").replace("\x00", " ") for text in texts).lower()
+        parsed = {}
+        for index, entry in enumerate(ENTRY_RE.findall(joined)[:len(texts)]):
+            result = parsed.get(entry)
+            if result is None:
+                result = parsed[entry] = _parse_entry(entry, decimal)
+            amounts[index], currencies[index], flags[index] = result
+    else:
+        for index, text in enumerate(texts):
+            if text:
+                entry = ENTRY_RE.match(text.replace("\x00", " ").lower()).groups()
+                amounts[index], currencies[index], flags[index] = _parse_entry(entry, decimal)
+    
+    return prices
 
 def parse_price(text: str):
+    """The first amount in `text` as a float, or None when there is no number"""
     if not text:
         return None
-    # Extracts numbers including decimals, ignoring ILS or $ symbols
-    match = re.search(r"([\d,.]+)", text)
+    # Extracts the first number, ignoring ILS or $ symbols and any text after it
+    match = AMOUNT_RE.search(text)
     if not match:
         return None
-    try:
-        # Remove commas for conversion
-        return float(match.group(1).replace(",", ""))
-    except ValueError:
-        return None
\ No newline at end of file
+    return to_amount(match.group())
@@ -0,0 +1,265 @@
+import os
+import re
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from utils.challenge_detection import CHALLENGE_MARKERS, CHALLENGE_STATUSES
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", ".rate_limits")
+
+DEFAULT_RATE = 1.0        # navigations per second per host, across all workers
+DEFAULT_BURST = 3         # navigations allowed back to back after a quiet period
+
+# After a challenge page the host's rate is halved per backoff level and
+# nothing is sent for PENALTY_S * 2^(level - 1) seconds. A level is dropped
+# again after RECOVERY_S seconds without a challenge.
+MAX_BACKOFF_LEVEL = 5
+PENALTY_S = 5.0
+RECOVERY_S = 60.0
+
+# One round trip after a navigation: enough to spot an interstitial by URL or title
+PAGE_SIGNATURE_JS = "() => location.href + ' ' + document.title"
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+@contextmanager
+def _locked(path: str):
+    """Exclusive lock on `path` shared by every thread and process, yielding the open file"""
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            # Other processes must see what was written before they get the lock
+            f.flush()
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class RateLimiter:
+    """
+    Token bucket per host, kept in a small locked file per host under
+    `state_dir` so every thread, asyncio task and worker process draws from
+    the same bucket.
+
+    Callers take a token before each navigation (acquire / acquire_async) and
+    report challenge pages, which slow the host down for everyone until it
+    has been quiet for a while.
+    """
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, state_dir: str = RATE_LIMIT_DIR,
+                 enabled: bool = True):
+        self.rate = rate
+        self.burst = burst
+        self.state_dir = state_dir
+        self.enabled = enabled and rate > 0
+        self._lock = threading.Lock()
+        self.stats = {}
+        if self.enabled:
+            os.makedirs(state_dir, exist_ok=True)
+
+    def _path(self, host: str) -> str:
+        return os.path.join(self.state_dir, re.sub(r"[^\w.-]", "_", host or "local") + ".json")
+
+    def _update(self, host: str, change):
+        """Run change(state, now, rate) on the host's shared state under the file lock"""
+        with self._lock, _locked(self._path(host)) as f:
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or b"{}")
+            except ValueError:
+                state = {}
+            now = time.time()
+            state.setdefault("tokens", float(self.burst))
+            state.setdefault("updated_at", now)
+            state.setdefault("backoff_level", 0)
+            state.setdefault("penalty_until", 0.0)
+            state.setdefault("last_challenge_at", 0.0)
+
+            # Recover one backoff level per quiet RECOVERY_S
+            while state["backoff_level"] and now - state["last_challenge_at"] > RECOVERY_S:
+                state["backoff_level"] -= 1
+                state["last_challenge_at"] += RECOVERY_S
+
+            rate = self.rate / (2 ** state["backoff_level"])
+            # No tokens accrue during a penalty, or it would end in a full burst
+            refill_from = max(state["updated_at"], min(now, state["penalty_until"]))
+            state["tokens"] = min(self.burst, state["tokens"] + (now - refill_from) * rate)
+            state["updated_at"] = now
+            result = change(state, now, rate)
+
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(state).encode())
+            return result
+
+    def _host_stats(self, host: str) -> dict:
+        return self.stats.setdefault(host, {
+            "navigations": 0, "throttled_ms": 0.0, "challenges": 0,
+            "backoff_level": 0, "first_at": None, "last_at": None,
+        })
+
+    def _try_take(self, host: str) -> float:
+        """Take a token and return 0, or return how long to wait before trying again"""
+        def take(state, now, rate):
+            if now < state["penalty_until"]:
+                return state["penalty_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / rate
+        return self._update(host, take)
+
+    def _record(self, host: str, throttled_s: float):
+        with self._lock:
+            stats = self._host_stats(host)
+            now = time.time()
+            stats["navigations"] += 1
+            stats["throttled_ms"] += throttled_s * 1000
+            stats["first_at"] = stats["first_at"] or now
+            stats["last_at"] = now
+
+    def acquire(self, host: str) -> float:
+        """
+        Block until a navigation to `host` is allowed.
+
+        :return: Seconds spent waiting
+        """
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            wait = self._try_take(host)
+            if not wait:
+                break
+            time.sleep(wait)
+            waited += wait
+        self._record(host, waited)
+        return waited
+
+    async def acquire_async(self, host: str) -> float:
+        """acquire() for asyncio code; waits without blocking the event loop"""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            # The file lock can be held by another process, so take it off the event loop
+            wait = await asyncio.to_thread(self._try_take, host)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record(host, waited)
+        return waited
+
+    def report_challenge(self, host: str):
+        """A challenge page came back: slow this host down for every worker"""
+        if not self.enabled:
+            return
+        def back_off(state, now, rate):
+            state["backoff_level"] = min(MAX_BACKOFF_LEVEL, state["backoff_level"] + 1)
+            state["last_challenge_at"] = now
+            state["penalty_until"] = max(state["penalty_until"], now + PENALTY_S * 2 ** (state["backoff_level"] - 1))
+            # One navigation may go as soon as the pause is over, then the halved rate applies
+            state["tokens"] = 1.0
+            return state["backoff_level"]
+        level = self._update(host, back_off)
+        with self._lock:
+            stats = self._host_stats(host)
+            stats["challenges"] += 1
+            stats["backoff_level"] = level
+        print(f"Challenge page from {host}: backing off to level {level}")
+
+    def report(self) -> dict:
+        """Navigations, time throttled and achieved rate per host, for this process"""
+        report = {}
+        with self._lock:
+            for host, stats in self.stats.items():
+                span = (stats["last_at"] or 0) - (stats["first_at"] or 0)
+                report[host] = {
+                    "navigations": stats["navigations"],
+                    "throttled_ms": round(stats["throttled_ms"], 1),
+                    "challenges": stats["challenges"],
+                    "backoff_level": stats["backoff_level"],
+                    "achieved_rate_per_s": round((stats["navigations"] - 1) / span, 3) if span > 0 else None,
+                    "configured_rate_per_s": self.rate,
+                }
+        return report
+
+def _is_challenge(status, signature: str) -> bool:
+    return status in CHALLENGE_STATUSES or bool(signature and CHALLENGE_MARKERS.search(signature))
+
+_limiter = RateLimiter(enabled=False)
+
+def configure(**kwargs) -> RateLimiter:
+    """Replace the process-wide limiter (called from conftest.pytest_configure)"""
+    global _limiter
+    _limiter = RateLimiter(**kwargs)
+    return _limiter
+
+def get_rate_limiter() -> RateLimiter:
+    return _limiter
+
+def check_for_challenge(page, response=None) -> bool:
+    """After a navigation: report a challenge page to the limiter. Returns True if it was one"""
+    if not _limiter.enabled:
+        return False
+    try:
+        signature = page.evaluate(PAGE_SIGNATURE_JS)
+    except Exception:
+        signature = ""
+    if _is_challenge(response.status if response else None, signature):
+        _limiter.report_challenge(host_of(page.url))
+        return True
+    return False
+
+async def check_for_challenge_async(page, response=None) -> bool:
+    """async_api version of check_for_challenge"""
+    if not _limiter.enabled:
+        return False
+    try:
+        signature = await page.evaluate(PAGE_SIGNATURE_JS)
+    except Exception:
+        signature = ""
+    if _is_challenge(response.status if response else None, signature):
+        await asyncio.to_thread(_limiter.report_challenge, host_of(page.url))
+        return True
+    return False
+
+def navigate(page, url: str, **kwargs):
+    """page.goto through the rate limiter; returns the goto response"""
+    _limiter.acquire(host_of(url))
+    response = page.goto(url, **kwargs)
+    # A "commit" goto returns before the document exists, so only the status can be checked
+    if kwargs.get("wait_until") == "commit":
+        if response and response.status in CHALLENGE_STATUSES:
+            _limiter.report_challenge(host_of(url))
+    else:
+        check_for_challenge(page, response)
+    return response
+
+async def navigate_async(page, url: str, **kwargs):
+    """async_api version of navigate"""
+    await _limiter.acquire_async(host_of(url))
+    response = await page.goto(url, **kwargs)
+    if kwargs.get("wait_until") == "commit":
+        if response and response.status in CHALLENGE_STATUSES:
+            await asyncio.to_thread(_limiter.report_challenge, host_of(url))
+    else:
+        await check_for_challenge_async(page, response)
+    return response
@@ -0,0 +1,52 @@
+import re
+import json
+import itertools
+
+TEST_DATA_PATH = "data/test_data.json"
+
+def load_test_data(path: str = TEST_DATA_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def scenario_id(scenario: dict) -> str:
+    return re.sub(r"[^\w.-]+", "-", f"{scenario['query']}-{scenario['max_price']}-x{scenario['limit']}").strip("-")
+
+def expand_scenarios(data: dict) -> list[dict]:
+    """
+    The search scenarios of a test data file. Each one is the "search" block
+    with its own values on top:
+    - every entry of "scenarios" (a list of partial search blocks)
+    - every combination of "scenario_matrix" (lists of values per key)
+    Without either, the "search" block alone is the only scenario.
+
+    :return: Scenario dicts, each with a unique "id"
+    """
+    base = data.get("search", {})
+    scenarios = [dict(base, **entry) for entry in data.get("scenarios", [])]
+
+    matrix = data.get("scenario_matrix") or {}
+    if matrix:
+        keys = list(matrix)
+        values = [value if isinstance(value, list) else [value] for value in matrix.values()]
+        scenarios += [dict(base, **dict(zip(keys, combination))) for combination in itertools.product(*values)]
+
+    if not scenarios:
+        scenarios = [dict(base)]
+
+    seen = {}
+    for scenario in scenarios:
+        base_id = scenario.get("id") or scenario_id(scenario)
+        seen[base_id] = seen.get(base_id, 0) + 1
+        scenario["id"] = base_id if seen[base_id] == 1 else f"{base_id}-{seen[base_id]}"
+    return scenarios
+
+def load_scenarios(path: str = TEST_DATA_PATH) -> list[dict]:
+    return expand_scenarios(load_test_data(path))
+
+def shard(items: list, index: int, count: int) -> list:
+    """Round-robin share `index` (0-based) of `count` shards"""
+    if count <= 1:
+        return list(items)
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index {index} is outside 0..{count - 1}")
+    return items[index::count]
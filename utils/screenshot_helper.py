@@ -0,0 +1,154 @@
+import base64
+import hashlib
+import weakref
+import allure
+from allure_commons.types import AttachmentType
+
+# What each level lets through. "failure" shots are error evidence, "key" shots
+# are the few that summarise the flow, "step" shots are everything else.
+LEVELS = {
+    "none": (),
+    "failures": ("failure",),
+    "key": ("failure", "key"),
+    "all": ("failure", "key", "step"),
+}
+
+# Scales a captured image down (aspect ratio kept) to fit within maxWidth x
+# maxHeight, in the page's own canvas so no imaging library is needed. Returns
+# the new image as base64, or null when it already fits.
+DOWNSCALE_JS = """
+async ({data, mime, quality, maxWidth, maxHeight}) => {
+    const bytes = Uint8Array.from(atob(data), (c) => c.charCodeAt(0));
+    const bitmap = await createImageBitmap(new Blob([bytes], {type: mime}));
+    const factor = Math.min(1, (maxWidth || bitmap.width) / bitmap.width, (maxHeight || bitmap.height) / bitmap.height);
+    if (factor >= 1) {
+        return null;
+    }
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.max(1, Math.round(bitmap.width * factor));
+    canvas.height = Math.max(1, Math.round(bitmap.height * factor));
+    const context = canvas.getContext('2d');
+    context.imageSmoothingQuality = 'high';
+    context.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+    return canvas.toDataURL(mime, quality).split(',')[1];
+}
+"""
+
+class ScreenshotPolicy:
+    """Controls which screenshots are taken and how they are captured and encoded"""
+    def __init__(self, level: str = "all", full_page: bool = True, image_type: str = "png", quality: int = 80,
+                 max_width: int = None, max_height: int = None, dedup: bool = True):
+        if level not in LEVELS:
+            raise ValueError(f"Unsupported screenshot level: {level} (known: {', '.join(LEVELS)})")
+        if image_type not in ("png", "jpeg"):
+            raise ValueError(f"Unsupported screenshot format: {image_type}")
+        self.level = level
+        self.full_page = full_page
+        self.image_type = image_type
+        self.quality = quality
+        self.max_width = max_width
+        self.max_height = max_height
+        self.dedup = dedup
+        # Keyed on the page itself, so a closed page's entry goes away with it
+        self._last_hash = weakref.WeakKeyDictionary()
+        self.stats = {"taken": 0, "skipped_by_level": 0, "skipped_duplicate": 0, "downscaled": 0, "bytes": 0}
+
+    def allows(self, kind: str) -> bool:
+        return kind in LEVELS[self.level]
+
+    def screenshot_options(self) -> dict:
+        """Keyword arguments for page.screenshot() under this policy"""
+        options = {"full_page": self.full_page, "type": self.image_type}
+        if self.image_type == "jpeg":
+            options["quality"] = self.quality
+        if self.caps_size():
+            # One image pixel per CSS pixel, whatever the device scale factor
+            options["scale"] = "css"
+        return options
+
+    def caps_size(self) -> bool:
+        return bool(self.max_width or self.max_height)
+
+    def downscale_args(self, data: bytes) -> dict:
+        """The argument DOWNSCALE_JS takes for the image `data`"""
+        return {
+            "data": base64.b64encode(data).decode("ascii"),
+            "mime": f"image/{self.image_type}",
+            "quality": self.quality / 100,
+            "maxWidth": self.max_width or 0,
+            "maxHeight": self.max_height or 0,
+        }
+
+    def downscaled(self, data: bytes, scaled) -> bytes:
+        """The image to keep: DOWNSCALE_JS's result, or `data` when it already fit"""
+        if not scaled:
+            return data
+        self.stats["downscaled"] += 1
+        return base64.b64decode(scaled)
+
+    def is_duplicate(self, page, data: bytes) -> bool:
+        """Remember this shot for `page` and report whether it matches the previous one"""
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        duplicate = self.dedup and self._last_hash.get(page) == digest
+        self._last_hash[page] = digest
+        return duplicate
+
+    def attachment_type(self):
+        return AttachmentType.JPG if self.image_type == "jpeg" else AttachmentType.PNG
+
+_policy = ScreenshotPolicy()
+
+def configure(**kwargs) -> ScreenshotPolicy:
+    """Replace the process-wide policy (called from conftest.pytest_configure)"""
+    global _policy
+    _policy = ScreenshotPolicy(**kwargs)
+    return _policy
+
+def get_policy() -> ScreenshotPolicy:
+    return _policy
+
+def attach_screenshot(page, name: str, kind: str = "step"):
+    """
+    Take a screenshot of `page` under the current policy and attach it to Allure.
+
+    :param kind: "failure", "key" or "step" - checked against the policy level
+    :return: The image bytes, or None when the shot was skipped
+    """
+    if not _policy.allows(kind):
+        _policy.stats["skipped_by_level"] += 1
+        return None
+
+    data = page.screenshot(**_policy.screenshot_options())
+    if _policy.caps_size():
+        try:
+            data = _policy.downscaled(data, page.evaluate(DOWNSCALE_JS, _policy.downscale_args(data)))
+        except Exception as e:
+            print(f"Could not downscale screenshot '{name}', attaching it at full size: {e}")
+    return _attach(page, name, data, kind)
+
+async def attach_screenshot_async(page, name: str, kind: str = "step"):
+    """async_api version of attach_screenshot"""
+    if not _policy.allows(kind):
+        _policy.stats["skipped_by_level"] += 1
+        return None
+
+    data = await page.screenshot(**_policy.screenshot_options())
+    if _policy.caps_size():
+        try:
+            data = _policy.downscaled(data, await page.evaluate(DOWNSCALE_JS, _policy.downscale_args(data)))
+        except Exception as e:
+            print(f"Could not downscale screenshot '{name}', attaching it at full size: {e}")
+    return _attach(page, name, data, kind)
+
+def _attach(page, name: str, data: bytes, kind: str):
+    # Failure evidence is always attached, even if nothing changed on screen
+    if _policy.is_duplicate(page, data) and kind != "failure":
+        _policy.stats["skipped_duplicate"] += 1
+        print(f"Screenshot '{name}' is identical to the previous one, not attaching")
+        return None
+
+    _policy.stats["taken"] += 1
+    _policy.stats["bytes"] += len(data)
+    allure.attach(data, name=name, attachment_type=_policy.attachment_type())
+    return data
@@ -0,0 +1,197 @@
+import os
+import re
+import json
+import time
+import allure
+from allure_commons.types import AttachmentType
+
+SELECTOR_STATS_PATH = os.getenv("SELECTOR_STATS_PATH", ".selector_stats.json")
+
+HAS_TEXT_RE = re.compile(r"^(?P<css>.*?):has-text\((?P<quote>['\"])(?P<text>.*?)(?P=quote)\)(?P<rest>.*)$")
+
+# Tests every candidate in one round trip. For each candidate it takes the
+# first (or last) element matching the CSS part and the :has-text() part, the
+# same element `page.locator(selector).first/.last` would give, and reports
+# whether it exists (and is visible, when asked) along with its text.
+RESOLVE_JS = """
+([candidates, pick, requireVisible]) => {
+    const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const normalize = (value) => (value || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    return candidates.map((candidate) => {
+        let elements = [];
+        try {
+            elements = Array.from(document.querySelectorAll(candidate.css));
+        } catch (e) {
+            return { matched: false, error: String(e) };
+        }
+        if (candidate.text !== null) {
+            const needle = normalize(candidate.text);
+            elements = elements.filter((el) => normalize(el.textContent).includes(needle));
+        }
+        const el = pick === 'last' ? elements[elements.length - 1] : elements[0];
+        if (!el || (requireVisible && !isVisible(el))) {
+            return { matched: false, count: elements.length };
+        }
+        return { matched: true, count: elements.length, text: (el.innerText || el.textContent || '').trim() };
+    });
+}
+"""
+
+def to_query(selector: str) -> dict:
+    """Split a Playwright selector into plain CSS and an optional trailing :has-text() value"""
+    match = HAS_TEXT_RE.match(selector)
+    if match and not match.group("rest"):
+        return {"css": match.group("css") or "*", "text": match.group("text")}
+    return {"css": selector, "text": None}
+
+class SelectorResolver:
+    """
+    Resolves named lists of fallback selectors and keeps hit/miss counts per
+    selector on disk, so later runs try the selectors that usually work first.
+    """
+    def __init__(self, path: str = SELECTOR_STATS_PATH):
+        self.path = path
+        self.stats = self._load()
+        self._pending = {}
+        self.resolutions = []
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def success_rate(counts: dict) -> float:
+        # Smoothed so an unseen selector starts at 0.5 rather than 0 or 1
+        return (counts.get("hits", 0) + 1) / (counts.get("hits", 0) + counts.get("misses", 0) + 2)
+
+    def rank(self, name: str, candidates: list[str], prefer: str = None) -> list[str]:
+        """
+        Order candidates by observed success rate; ties keep the declared order.
+        `prefer` (e.g. the selector that worked for this exact item before) goes first.
+        """
+        known = self.stats.get(name, {})
+        ranked = sorted(candidates, key=lambda selector: -self.success_rate(known.get(selector, {})))
+        if prefer in ranked:
+            ranked.remove(prefer)
+            ranked.insert(0, prefer)
+        return ranked
+
+    def record(self, name: str, ranked: list[str], matched: list[bool], chosen: str = None, elapsed_ms: float = None):
+        """Count a hit for every candidate that matched and a miss for every one that did not"""
+        for selector, hit in zip(ranked, matched):
+            outcome = "hits" if hit else "misses"
+            for counts in (self.stats, self._pending):
+                entry = counts.setdefault(name, {}).setdefault(selector, {"hits": 0, "misses": 0})
+                entry[outcome] += 1
+        self.resolutions.append({
+            "name": name,
+            "order": ranked,
+            "chosen": chosen,
+            "position": ranked.index(chosen) if chosen in ranked else None,
+            "elapsed_ms": elapsed_ms,
+        })
+
+    def flush(self):
+        """Merge this process's counts into the stats file (other runs may have written it meanwhile)"""
+        if not self._pending:
+            return
+        merged = self._load()
+        for name, selectors in self._pending.items():
+            for selector, counts in selectors.items():
+                entry = merged.setdefault(name, {}).setdefault(selector, {"hits": 0, "misses": 0})
+                entry["hits"] += counts["hits"]
+                entry["misses"] += counts["misses"]
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.stats = merged
+        self._pending = {}
+
+    def report(self, names=None) -> dict:
+        """Ranked stats per name, for the Allure report"""
+        names = names or list(self.stats)
+        return {
+            name: [
+                dict(self.stats[name][selector], selector=selector,
+                     success_rate=round(self.success_rate(self.stats[name][selector]), 3))
+                for selector in self.rank(name, list(self.stats[name]))
+            ]
+            for name in names if name in self.stats
+        }
+
+    def take_resolutions(self) -> list[dict]:
+        """Return and forget the resolutions made since the last call"""
+        resolutions, self.resolutions = self.resolutions, []
+        return resolutions
+
+_resolver = None
+
+def get_resolver() -> SelectorResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = SelectorResolver()
+    return _resolver
+
+def attach_resolution_report(name: str = "Selector Resolution"):
+    """Attach this test's resolutions and the ranked stats of the lists it used"""
+    resolver = get_resolver()
+    resolutions = resolver.take_resolutions()
+    if not resolutions:
+        return
+    allure.attach(
+        json.dumps({
+            "resolutions": resolutions,
+            "ranking": resolver.report(sorted({resolution["name"] for resolution in resolutions}))
+        }, indent=2),
+        name=name,
+        attachment_type=AttachmentType.JSON
+    )
+
+def _finish(page, name, ranked, results, elapsed_ms, pick, accept):
+    matched = [
+        bool(result.get("matched")) and (accept is None or bool(accept(result.get("text", ""))))
+        for result in results
+    ]
+    chosen = next((selector for selector, hit in zip(ranked, matched) if hit), None)
+    get_resolver().record(name, ranked, matched, chosen, elapsed_ms)
+    if chosen is None:
+        return None
+    locator = page.locator(chosen)
+    return {
+        "selector": chosen,
+        "text": results[ranked.index(chosen)].get("text", ""),
+        "locator": locator.last if pick == "last" else locator.first,
+    }
+
+def resolve(page, name: str, candidates: list[str], pick: str = "first", require_visible: bool = True, accept=None,
+            prefer: str = None):
+    """
+    Find the best matching selector out of `candidates` with a single page query.
+
+    :param name: Stats key for this candidate list, e.g. "add_to_cart_button"
+    :param pick: "first" or "last" matching element per candidate
+    :param accept: Optional check on the element text; a match it rejects counts as a miss
+    :param prefer: Candidate to try before the ranked ones
+    :return: {"selector", "text", "locator"} for the winning candidate, or None
+    """
+    ranked = get_resolver().rank(name, candidates, prefer)
+    start = time.perf_counter()
+    results = page.evaluate(RESOLVE_JS, [[to_query(selector) for selector in ranked], pick, require_visible])
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return _finish(page, name, ranked, results, elapsed_ms, pick, accept)
+
+async def resolve_async(page, name: str, candidates: list[str], pick: str = "first", require_visible: bool = True,
+                        accept=None, prefer: str = None):
+    """async_api version of resolve"""
+    ranked = get_resolver().rank(name, candidates, prefer)
+    start = time.perf_counter()
+    results = await page.evaluate(RESOLVE_JS, [[to_query(selector) for selector in ranked], pick, require_visible])
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return _finish(page, name, ranked, results, elapsed_ms, pick, accept)
@@ -0,0 +1,30 @@
+import os
+from urllib.parse import urlsplit
+
+# Where the flows send the browser. Defaults to live eBay; the stub site
+# fixture (or EBAY_BASE_URL / EBAY_CART_URL) points them somewhere else.
+_urls = {
+    "base": os.getenv("EBAY_BASE_URL", "https://www.ebay.com").rstrip("/"),
+    "cart": os.getenv("EBAY_CART_URL", "https://cart.ebay.com").rstrip("/"),
+}
+
+def configure(base_url: str = None, cart_url: str = None):
+    """Point the page objects and services at another site (called from conftest)"""
+    if base_url:
+        _urls["base"] = base_url.rstrip("/")
+    if cart_url:
+        _urls["cart"] = cart_url.rstrip("/")
+
+def base_url() -> str:
+    return _urls["base"]
+
+def cart_url() -> str:
+    return _urls["cart"]
+
+def site_url(path: str) -> str:
+    """Absolute URL for `path` on the main site, e.g. site_url("/signin")"""
+    return f"{_urls['base']}{path}"
+
+def is_site_url(url: str) -> bool:
+    """Whether `url` points at the main site's host"""
+    return urlsplit(url).netloc == urlsplit(_urls["base"]).netloc
@@ -0,0 +1,173 @@
+import os
+import csv
+import time
+import threading
+import contextvars
+import json
+from allure_commons.types import AttachmentType
+from utils.attachments import attach
+from utils import flow_steps, playwright_calls
+from utils.playwright_calls import call_kind
+
+CSV_FIELDS = [
+    "run_id", "test", "step", "depth", "duration_ms", "failed",
+    "action", "locator", "navigation", "round_trips",
+    "waits", "wait_ms", "responses", "bytes",
+]
+
+DEFAULT_PATH = "step-metrics/{run_id}.csv"
+
+_settings = {"enabled": False, "path": None, "run_id": None}
+_file_lock = threading.Lock()
+
+# Recorders currently listening, and every BrowserContext whose responses are counted
+_active = []
+_watched_contexts = set()
+
+# The flow steps open in the current thread / asyncio task. Parallel async
+# flows each see their own stack, so calls and waits land on the right step.
+_open_steps = contextvars.ContextVar("open_steps", default=())
+
+def configure(enabled: bool = False, path: str = DEFAULT_PATH):
+    """Turn step metrics on or off for the run (called from conftest.pytest_configure)"""
+    _settings["enabled"] = enabled
+    _settings["run_id"] = time.strftime("%Y%m%d-%H%M%S")
+    _settings["path"] = path.format(run_id=_settings["run_id"]) if path else None
+
+def is_enabled() -> bool:
+    return _settings["enabled"]
+
+def watch_page(page):
+    """
+    BasePage hook: count the responses of the page's context. A no-op unless
+    a StepMetrics recorder is running.
+    """
+    if not _active:
+        return
+    context = page.context
+    if id(context) in _watched_contexts:
+        return
+    _watched_contexts.add(id(context))
+    context.on("response", _on_response)
+    context.on("close", lambda _: _watched_contexts.discard(id(context)))
+
+def record_wait(elapsed_ms: float):
+    """BasePage hook: add a finished condition wait to the open steps"""
+    for entry in _open_steps.get():
+        entry["waits"] += 1
+        entry["wait_ms"] += elapsed_ms
+
+def _on_response(response):
+    # Content-Length when the server sends it; chunked responses count as 0 bytes
+    try:
+        size = int(response.headers.get("content-length") or 0)
+    except ValueError:
+        size = 0
+    for recorder in list(_active):
+        recorder.add_response(size)
+
+class StepMetrics:
+    """
+    flow_steps listener that records, for every flow step: wall time,
+    Playwright calls by kind (see utils.playwright_calls), condition waits
+    from BasePage, and responses/bytes received by the watched contexts.
+
+    Counts are inclusive (a step includes its sub-steps). Calls and waits are
+    attributed per thread/asyncio task; responses go to every step open at
+    the time, so parallel flows share them.
+    """
+    def __init__(self):
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        _active.append(self)
+        playwright_calls.start(self)
+        flow_steps.add_listener(self)
+
+    def stop(self):
+        flow_steps.remove_listener(self)
+        playwright_calls.stop(self)
+        if self in _active:
+            _active.remove(self)
+
+    # playwright_calls counter interface
+    def add(self, key: str):
+        kind = call_kind(key.rsplit(".", 1)[-1])
+        for entry in _open_steps.get():
+            if entry["_recorder"] is self:
+                entry[kind] += 1
+
+    def add_response(self, size: int):
+        with self._lock:
+            for entry in self.steps:
+                if "_start" in entry:
+                    entry["responses"] += 1
+                    entry["bytes"] += size
+
+    def step_started(self, title: str):
+        stack = _open_steps.get()
+        entry = {
+            "title": title,
+            "depth": sum(1 for open_entry in stack if open_entry["_recorder"] is self),
+            "_start": time.perf_counter(),
+            "_recorder": self,
+            "action": 0, "locator": 0, "navigation": 0,
+            "waits": 0, "wait_ms": 0.0,
+            "responses": 0, "bytes": 0,
+        }
+        with self._lock:
+            self.steps.append(entry)
+        _open_steps.set(stack + (entry,))
+
+    def step_finished(self, title: str, error):
+        stack = _open_steps.get()
+        for entry in reversed(stack):
+            if entry["title"] == title and entry["_recorder"] is self:
+                with self._lock:
+                    entry["duration_ms"] = round((time.perf_counter() - entry.pop("_start")) * 1000, 1)
+                entry["failed"] = error is not None
+                entry["round_trips"] = entry["action"] + entry["navigation"]
+                entry["wait_ms"] = round(entry["wait_ms"], 1)
+                _open_steps.set(tuple(open_entry for open_entry in stack if open_entry is not entry))
+                return
+
+    def report(self) -> list[dict]:
+        """The finished steps, in the order they started"""
+        return [
+            {key: value for key, value in entry.items() if not key.startswith("_")}
+            for entry in self.steps if "duration_ms" in entry
+        ]
+
+def write_rows(test: str, steps: list[dict]):
+    """Append a test's steps to the run's flat timing file"""
+    path = _settings["path"]
+    if not path or not steps:
+        return
+    with _file_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            for step in steps:
+                writer.writerow(dict(step, run_id=_settings["run_id"], test=test, step=step["title"]))
+
+def run_file() -> str:
+    return _settings["path"]
+
+def finish(recorder: StepMetrics, test: str, name: str = "Step Metrics"):
+    """Stop `recorder`, attach its steps to Allure and append them to the run's timing file"""
+    recorder.stop()
+    steps = recorder.report()
+    if not steps:
+        return
+    attach(
+        json.dumps({"run_id": _settings["run_id"], "test": test, "steps": steps}, indent=2),
+        name=name,
+        attachment_type=AttachmentType.JSON
+    )
+    write_rows(test, steps)
@@ -0,0 +1,122 @@
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import deque
+from playwright.sync_api import BrowserContext
+
+TRACE_MODES = ("off", "full", "chunks")
+
+class TraceRecorder:
+    """
+    Playwright tracing for one test.
+
+    "full" records the whole test (the previous behaviour). "chunks" records
+    only inside flow steps, one trace chunk per step, and keeps the last
+    `ring_size` chunks. Chunks are removed again when the test passes, so a
+    trace only survives for the steps leading up to a failure. "off" records
+    nothing, which makes it the baseline for measuring tracing overhead.
+    """
+    def __init__(self, context: BrowserContext, mode: str = "full", ring_size: int = 3):
+        if mode not in TRACE_MODES:
+            raise ValueError(f"Unsupported trace mode: {mode} (known: {', '.join(TRACE_MODES)})")
+        self.context = context
+        self.mode = mode
+        self.ring_size = ring_size
+        self.overhead_ms = 0.0
+        self.chunks_recorded = 0
+        self._ring = deque()
+        self._stack = []
+        self._recording = False
+        self._chunk_dir = None
+        self._chunk_title = None
+        self._failed_step = None
+
+    def _timed(self, call, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.overhead_ms += (time.perf_counter() - start) * 1000
+
+    def start(self):
+        if self.mode == "full":
+            self._timed(self.context.tracing.start, screenshots=True, snapshots=True, sources=True)
+        elif self.mode == "chunks":
+            self._chunk_dir = tempfile.mkdtemp(prefix="trace_chunks_")
+            self._timed(self.context.tracing.start, screenshots=True, snapshots=True)
+            # start() opens a first chunk; drop it so nothing is recorded between steps
+            self._timed(self.context.tracing.stop_chunk)
+
+    # flow_steps listener interface
+
+    def step_started(self, title: str):
+        if self.mode != "chunks":
+            return
+        if self._recording:
+            self._stop_chunk()
+        self._stack.append(title)
+        self._start_chunk(title)
+
+    def step_finished(self, title: str, error):
+        if self.mode != "chunks" or not self._stack:
+            return
+        if error is not None and self._failed_step is None:
+            self._failed_step = title
+        self._stop_chunk()
+        self._stack.pop()
+        if self._stack:
+            self._start_chunk(f"{self._stack[-1]} (continued)")
+
+    def _start_chunk(self, title: str):
+        self._timed(self.context.tracing.start_chunk, title=title)
+        self._recording = True
+        self._chunk_title = title
+
+    def _stop_chunk(self):
+        self.chunks_recorded += 1
+        safe_title = re.sub(r"[^\w.-]+", "_", self._chunk_title)[:60]
+        path = os.path.join(self._chunk_dir, f"{self.chunks_recorded:03d}_{safe_title}.zip")
+        self._timed(self.context.tracing.stop_chunk, path=path)
+        self._recording = False
+        self._ring.append(path)
+        while len(self._ring) > self.ring_size:
+            os.remove(self._ring.popleft())
+
+    def finish(self, failed: bool, full_trace_path: str) -> list:
+        """
+        Stop tracing. On failure returns the trace files to attach: the full
+        trace, or the last chunks in step order. Returns [] otherwise.
+        """
+        if self.mode == "full":
+            if failed:
+                self._timed(self.context.tracing.stop, path=full_trace_path)
+                return [full_trace_path]
+            self._timed(self.context.tracing.stop)
+            return []
+        
+        if self.mode == "chunks":
+            if self._recording:
+                self._stop_chunk()
+            self._stack.clear()
+            self._timed(self.context.tracing.stop)
+            if failed:
+                return list(self._ring)
+            self.cleanup()
+        return []
+
+    def cleanup(self):
+        if self._chunk_dir:
+            shutil.rmtree(self._chunk_dir, ignore_errors=True)
+            self._chunk_dir = None
+
+    def stats(self, test_duration_ms: float) -> dict:
+        return {
+            "mode": self.mode,
+            "test_duration_ms": round(test_duration_ms, 1),
+            "tracing_calls_ms": round(self.overhead_ms, 1),
+            "chunks_recorded": self.chunks_recorded,
+            "chunks_kept": len(self._ring),
+            "failed_step": self._failed_step,
+        }